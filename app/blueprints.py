@@ -8,7 +8,8 @@ from google.cloud import ndb
 
 from main import client, mc
 from forms import SettingsForm
-from helper import create_optimal, create_schedule_key, parse_players, readable_schedule, schedule_summary
+from helper import create_schedule_key, parse_players, readable_schedule, schedule_summary
+from jobs import get_job, job_status, submit_job
 from model import CustomSchedule, OptimalSchedule
 
 
@@ -30,72 +31,138 @@ def index():
         # the schedule generation logic needs to be here
         # the schedule page can then be a lookup and display
         data = session.get('form_data')
-        skey = create_schedule_key(data.get('n_courts'), data.get('n_rounds'), data.get('n_players'))
 
-        # look up the optimal schedule in the app
-        optimal = current_app.schedule.get(skey)
-
-        # if not in the app, see if it is in the cache
-        if not optimal:
-            optimal = mc.get(skey)
-
-        # if not in the cache, check the datastore
-        if not optimal:
-            optimal = OptimalSchedule.find_by_id(skey)
-            mc.put(skey, optimal)
-        
-        # if not in the datastore, generate new optimal
-        if not optimal:
-            optimal = create_optimal(data.get('n_courts'), data.get('n_rounds'), data.get('n_players'))
-            mc.put(skey, optimal)
-            
-            with client.context():
-                optimal.put()
-
-        custom_sched = CustomSchedule(
-            n_courts=form.courts.data,
-            n_rounds=form.rounds.data,
-            players=parse_players(form.players.data),
-            optimal_schedule=optimal
-        )
-
-        # put schedule in session, cache, and datastore
-        session[custom_sched.custom_schedule_id] = custom_sched.to_json()
-        mc.put(custom_sched.custom_schedule_id, custom_sched)
-        with client.context():
-            custom_sched.put()
-
-        return redirect(url_for('blueprint.schedule', id=custom_sched.custom_schedule_id))
+        # look up the optimal schedule in the packaged library, then in what any instance has optimized
+        # anything else is optimized in the background while the job page polls for progress
+        optimal = None
+        if sched := current_app.optimal_schedules.get(int(data.get('n_courts')), int(data.get('n_rounds')), int(data.get('n_players'))):
+            optimal = sched.schedule.tolist()
+        else:
+            optimal = find_optimal_schedule(create_schedule_key(data.get('n_courts'), data.get('n_rounds'), data.get('n_players')))
+        if optimal:
+            custom_sched = save_custom_schedule(form.courts.data, form.rounds.data, parse_players(form.players.data), optimal)
+            return redirect(url_for('blueprint.schedule', id=custom_sched.custom_schedule_id))
+        job_id = submit_job(data.get('n_courts'), data.get('n_rounds'), data.get('n_players'), players=parse_players(form.players.data))
+        return redirect(url_for('blueprint.job', id=job_id))
     return render_template('index.html', form=form)
 
 
-    @blueprint.route('/schedule', methods=('GET', 'POST'))
-    def schedule():
-        # if no schedule id, then redirect to schedule form
-        schedule_id = request.args.get('id')
-        if not schedule_id:
-            redirect(url_for('blueprint.index'))
-
-        # find the schedule
-        # try the session first
+def find_optimal_schedule(skey):
+    """Finds a schedule optimized by any instance, checking memcache and then the datastore"""
+    if optimal := mc.get(skey):
+        return json.loads(optimal)
+    with client.context():
+        optimal = OptimalSchedule.find_by_id(skey).get()
+    if optimal:
+        mc.put(skey, json.dumps(optimal.schedule))
+        return optimal.schedule
+    return None
+
+
+def save_optimal_schedule(n_courts, n_rounds, n_players, optimal):
+    """Shares an optimized schedule with every instance through memcache and the datastore"""
+    optimal_sched = OptimalSchedule(n_courts=n_courts, n_rounds=n_rounds, n_players=n_players, schedule=optimal)
+    mc.put(optimal_sched.optimal_schedule_id, json.dumps(optimal))
+    with client.context():
+        optimal_sched.put()
+    return optimal_sched
+
+
+def save_custom_schedule(n_courts, n_rounds, players, optimal) -> CustomSchedule:
+    """Creates a CustomSchedule and puts it in session, cache, and datastore"""
+    custom_sched = CustomSchedule(
+        n_courts=n_courts,
+        n_rounds=n_rounds,
+        players=players,
+        optimal_schedule=optimal
+    )
+    session[custom_sched.custom_schedule_id] = custom_sched.to_json()
+    mc.put(custom_sched.custom_schedule_id, custom_sched)
+    with client.context():
+        custom_sched.put()
+    return custom_sched
+
+
+@blueprint.route('/job', methods=('GET',))
+def job():
+    """Shows the progress of a background optimization until it finishes"""
+    job_id = request.args.get('id')
+    if not job_id or not get_job(job_id):
+        return redirect(url_for('blueprint.index'))
+    return render_template('job.html', job_id=job_id)
+
+
+@blueprint.route('/jobs', methods=('POST',))
+def create_job():
+    """Queues an optimization from json with courts, rounds and players and returns its job id"""
+    params = request.get_json(force=True, silent=True)
+    if not isinstance(params, dict):
+        return jsonify({'error': 'Expected a json object with courts, rounds and players'}), 400
+    players = params.get('players') or []
+    if not isinstance(players, list):
+        return jsonify({'error': f'Invalid value for players: {players}'}), 400
+    values = {'courts': params.get('courts'), 'rounds': params.get('rounds'), 'n_players': params.get('n_players') or len(players)}
+    for name, value in values.items():
+        if value is None:
+            return jsonify({'error': f'Missing {name}'}), 400
         try:
-            schedule = CustomSchedule.from_json(session.get(schedule_id))
-        except:
-            schedule = None
-            
-        # try the cache
-        if not schedule:
-            schedule = mc.get(schedule_id)
+            values[name] = int(value)
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Invalid value for {name}: {value}'}), 400
+        if values[name] < 1:
+            return jsonify({'error': f'Invalid value for {name}: {value}'}), 400
+    if values['n_players'] < 4 * values['courts']:
+        return jsonify({'error': f"Invalid value for n_players: {values['n_players']} cannot fill {values['courts']} courts"}), 400
+    job_id = submit_job(values['courts'], values['rounds'], values['n_players'], players=players)
+    return jsonify({'job_id': job_id, 'status_url': url_for('blueprint.job_status_json', job_id=job_id)}), 202
+
+
+@blueprint.route('/jobs/<job_id>', methods=('GET',))
+def job_status_json(job_id):
+    """Reports a job's status, iterations done and best score so far"""
+    if not (status := job_status(job_id)):
+        return jsonify({'error': f'No job {job_id}'}), 404
+    return jsonify(status)
+
+
+@blueprint.route('/jobs/<job_id>/schedule', methods=('GET',))
+def job_schedule(job_id):
+    """Saves a finished job's schedule for its players and shows it"""
+    finished = get_job(job_id)
+    if not finished or finished['status'] != 'done':
+        return redirect(url_for('blueprint.job', id=job_id))
+    save_optimal_schedule(finished['n_courts'], finished['n_rounds'], finished['n_players'], finished['schedule'])
+    custom_sched = save_custom_schedule(finished['n_courts'], finished['n_rounds'], finished['data'].get('players'), finished['schedule'])
+    return redirect(url_for('blueprint.schedule', id=custom_sched.custom_schedule_id))
+
+
+@blueprint.route('/schedule', methods=('GET', 'POST'))
+def schedule():
+    # if no schedule id, then redirect to schedule form
+    schedule_id = request.args.get('id')
+    if not schedule_id:
+        redirect(url_for('blueprint.index'))
+
+    # find the schedule
+    # try the session first
+    try:
+        schedule = CustomSchedule.from_json(session.get(schedule_id))
+    except:
+        schedule = None
+        
+    # try the cache
+    if not schedule:
+        schedule = mc.get(schedule_id)
 
-        # try the datastore
-        if not schedule:
-            with client.context():
-                schedule = CustomSchedule.find_by_id(schedule_id)
-                mc.put(schedule_id, schedule)
+    # try the datastore
+    if not schedule:
+        with client.context():
+            schedule = CustomSchedule.find_by_id(schedule_id)
+            mc.put(schedule_id, schedule)
 
-        # create the readable schedule        
-        _ = schedule.readable_schedule()
-        return render_template('schedule.html', data=schedule.to_dict())
+    # create the readable schedule        
+    _ = schedule.readable_schedule()
+    return render_template('schedule.html', data=schedule.to_dict())
 
 
 @blueprint.route('/summary', methods=('GET',))
@@ -111,7 +178,9 @@ def summary():
         schedule = json.loads(schedule)
     else:
         logging.info('Got schedule from app')
-        schedule = f.get('schedule', current_app.schedule.get((int(f['courts']), int(f['rounds']), len(f['players']))))
+        schedule = f.get('schedule')
+        if not schedule and (sched := current_app.optimal_schedules.get(int(f['courts']), int(f['rounds']), len(f['players']))):
+            schedule = sched.schedule.tolist()
     if not schedule:
         raise ValueError(f'Cannot find schedule for {skey}')
     logging.info(f'Schedule type is {str(type(schedule))}')
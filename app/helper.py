@@ -1,23 +1,27 @@
-from collections import defaultdict
 import datetime
 import json
-import itertools
+from pathlib import Path
 import re
+import tempfile
 from typing import Any, Dict, List, Tuple
 
 import numpy as np
-from pyscheduler import Scheduler
+from pyscheduler import PairCounts, ScheduleCache, Scheduler
 
 from model import OptimalSchedule
 
 
-def create_optimal(**kwargs) -> dict:
-    """Creates optimal schedule given parameters"""
-    s = Scheduler(**kwargs)
+# schedules optimized by this instance, shared by every request and worker process it serves
+# the disk tier lets concurrent requests in different processes wait on one optimization
+schedule_cache = ScheduleCache(maxsize=512, ttl=24 * 60 * 60, path=Path(tempfile.gettempdir()) / 'pyscheduler')
+
+
+def create_optimal(n_courts: int, n_rounds: int, n_players: int) -> OptimalSchedule:
+    """Creates optimal schedule given parameters, optimizing each configuration once per instance"""
+    n_courts, n_rounds, n_players = int(n_courts), int(n_rounds), int(n_players)
+    s = Scheduler(n_rounds, n_courts, n_players=n_players, cache=schedule_cache)
     sched = s.optimize_schedule()
-    d = sched.to_dict()
-    sched = d.get('schedule')
-    return OptimalSchedule(schedule=sched.tolist(), **kwargs)
+    return OptimalSchedule(n_courts=n_courts, n_rounds=n_rounds, n_players=n_players, schedule=sched.schedule.tolist())
 
 
 def create_schedule_key(*args):
@@ -51,8 +55,10 @@ def readable_schedule(players: list, sched: str, sep=' - ') -> List[List]:
     items = []
     for idx, rnd in enumerate(sched):
         for court, matchup in enumerate(rnd):
-            team1 = sep.join([players[int(i)].strip() for i in matchup[0:2]])
-            team2 = sep.join([players[int(i)].strip() for i in matchup[2:]])            
+            # first half of the court is team 1, whatever the number of players per court
+            half = len(matchup) // 2
+            team1 = sep.join([players[int(i)].strip() for i in matchup[:half]])
+            team2 = sep.join([players[int(i)].strip() for i in matchup[half:]])
             items.append([idx + 1, court + 1, team1, team2])
     return items
 
@@ -71,44 +77,15 @@ def schedule_summary(players: List[str], sched: Any) -> Tuple[Dict[str, Any], Di
         the far outer list is the schedule
 
     """
-    # build up lists of tuples
-    # then can count at the end
-    # ultimately want to implement this as part of schedule optimizer
-    # this is a simple fix for the time being
     if isinstance(sched, str):
         sched = json.loads(sched)
-    if isinstance(sched, np.ndarray):
-        sched = sched.tolist()
-        
-    partners = defaultdict(int)
-    opponents = defaultdict(int)
-
-    for rnd in sched:
-        for matchup in rnd:
-            team1 = tuple(sorted(matchup[0:2]))
-            team2 = tuple(sorted(matchup[2:]))
-            partners[team1] += 1
-            partners[team2] += 1
-            for opp in itertools.product(team1, team2):
-                opponents[tuple(sorted(opp))] += 1
-
-    dup_partners = {idx: 0 for idx in range(len(players))}
-    dup_opponents = {idx: 0 for idx in range(len(players))}
-    
-    for pairing, cnt in partners.items():
-        if cnt > 1:
-            player1, player2 = pairing
-            dup_partners[player1] += 1
-            dup_partners[player2] += 1
-            
-    for pairing, cnt in opponents.items():
-        if cnt > 1:
-            player1, player2 = pairing
-            dup_opponents[player1] += 1
-            dup_opponents[player2] += 1
-        
-    return ({players[k]: v for k, v in dup_partners.items()}, 
-            {players[k]: v for k, v in dup_opponents.items()})
+
+    # pair counts are kept in matrices, so per-player duplicates are row counts
+    pc = PairCounts.from_schedule(np.array(sched), n_players=len(players))
+    dup_partners = pc.player_dupcounts('partner')
+    dup_opponents = pc.player_dupcounts('opponent')
+    return ({players[k]: int(v) for k, v in enumerate(dup_partners)}, 
+            {players[k]: int(v) for k, v in enumerate(dup_opponents)})
 
 
 def test_summ():
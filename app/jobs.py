@@ -0,0 +1,132 @@
+# pyplayscheduler/app/jobs.py
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from pyscheduler import Scheduler
+
+from helper import schedule_cache
+
+
+# optimizations run here so requests return right away
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='optimize')
+
+# each job is a json file next to the schedule cache's disk tier, so any worker process
+# on the instance can answer a poll and finished jobs survive a restart
+JOBS_DIR = Path(tempfile.gettempdir()) / 'pyscheduler' / 'jobs'
+
+# job files are removed this many seconds after they were last updated
+JOB_TTL = 24 * 60 * 60
+
+# progress is written at most this often, status changes are always written
+PROGRESS_INTERVAL = 0.25
+
+# the jobs this process is running, so progress updates do not read their file back
+_jobs = {}
+_lock = threading.Lock()
+
+
+def _path(job_id: str) -> Optional[Path]:
+    """The job's file, or None if job_id is not one submit_job could have made"""
+    if not re.fullmatch(r'[0-9a-f]{32}', job_id or ''):
+        return None
+    return JOBS_DIR / f'{job_id}.json'
+
+
+def _write(job: Dict[str, Any]):
+    # written to a temporary file first so readers never see a partial file
+    fn = _path(job['job_id'])
+    tmp = fn.with_name(f'{fn.stem}.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp.write_text(json.dumps(job))
+    os.replace(tmp, fn)
+
+
+def _update(job_id: str, **kwargs):
+    with _lock:
+        job = _jobs[job_id]
+        changed = kwargs.get('status', job['status']) != job['status']
+        job.update(kwargs)
+        if changed or time.time() - job['updated'] >= PROGRESS_INTERVAL:
+            job['updated'] = time.time()
+            _write(job)
+        if job['status'] in ('done', 'failed'):
+            del _jobs[job_id]
+
+
+def _prune():
+    """Removes job files that have not been updated for JOB_TTL seconds"""
+    cutoff = time.time() - JOB_TTL
+    for fn in JOBS_DIR.glob('*.json'):
+        try:
+            if fn.stat().st_mtime < cutoff:
+                fn.unlink()
+        except OSError:
+            pass
+
+
+def _run(job_id: str, n_courts: int, n_rounds: int, n_players: int, iterations: int):
+    """Optimizes one schedule, recording progress and the result in the job's file"""
+    _update(job_id, status='running')
+    try:
+        s = Scheduler(n_rounds, n_courts, n_players=n_players, iterations=iterations, cache=schedule_cache)
+        sched = s.optimize_schedule(progress=lambda p: _update(job_id, **p))
+        _update(job_id, status='done', schedule=sched.schedule.tolist(),
+                partner_dupcount=int(sched.partner_dupcount), opponent_dupcount=int(sched.opponent_dupcount))
+    except Exception as e:
+        logging.exception(f'Job {job_id} failed')
+        _update(job_id, status='failed', error=str(e))
+
+
+def submit_job(n_courts: int, n_rounds: int, n_players: int, iterations: int = 500, **data) -> str:
+    """Queues an optimization and returns its job id
+
+    Args:
+        n_courts(int): number of courts to use
+        n_rounds(int): number of rounds of play
+        n_players(int): total number of players in pool
+        iterations(int): default 500
+        **data: anything the caller needs back with the result, like the player names
+
+    Returns:
+        str
+
+    """
+    job_id = uuid.uuid4().hex
+    n_courts, n_rounds, n_players = int(n_courts), int(n_rounds), int(n_players)
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    _prune()
+    job = {'job_id': job_id, 'status': 'queued', 'n_courts': n_courts, 'n_rounds': n_rounds,
+           'n_players': n_players, 'iterations_done': 0, 'iterations': iterations,
+           'partner_dupcount': None, 'opponent_dupcount': None, 'data': data, 'updated': time.time()}
+    with _lock:
+        _jobs[job_id] = job
+        _write(job)
+    executor.submit(_run, job_id, n_courts, n_rounds, n_players, iterations)
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Gets a copy of a job's status, or None if there is no such job"""
+    if (fn := _path(job_id)) is None:
+        return None
+    try:
+        return json.loads(fn.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """The public part of a job's status, without the schedule or caller data"""
+    job = get_job(job_id)
+    if job is None:
+        return None
+    return {k: v for k, v in job.items() if k not in ('schedule', 'data', 'updated')}
@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import sys
@@ -8,6 +7,7 @@ from flask_bootstrap import Bootstrap
 from google.appengine.api import wrap_wsgi_app
 from google.appengine.api.memcache import Client
 import google.cloud.logging as gcl
+from pyscheduler.library import default_library
 
 from blueprints import blueprint
 from config import config
@@ -30,10 +30,8 @@ app = Flask(__name__)
 app.config.from_object(config[os.getenv('FLASK_ENV', 'dev')])
 app.secret_key = 'xyzabc'
 app.wsgi_app = wrap_wsgi_app(app.wsgi_app)
-filename = os.path.join(app.static_folder, 'schedule.json')
-with open(filename) as fh:
-    app.optimal_schedules = {f"schedule_{item['n_courts']}_{item['n_rounds']}_{item['n_players']}": item['schedule'] 
-                             for item in json.load(fh)}
+# memory-mapped, so nothing is parsed at startup
+app.optimal_schedules = default_library()
 app.register_blueprint(blueprint)
 Bootstrap(app)
 nav.init_app(app)
@@ -58,8 +58,9 @@ class CustomSchedule(ndb.Model):
         items = []
         for idx, rnd in enumerate(sched):
             for court, matchup in enumerate(rnd):
-                team1 = sep.join([self.players[int(i)].strip() for i in matchup[0:2]])
-                team2 = sep.join([self.players[int(i)].strip() for i in matchup[2:]])            
+                half = len(matchup) // 2
+                team1 = sep.join([self.players[int(i)].strip() for i in matchup[:half]])
+                team2 = sep.join([self.players[int(i)].strip() for i in matchup[half:]])
                 items.append([idx + 1, court + 1, team1, team2])
         self.readable_schedule = items
         return items
@@ -0,0 +1,246 @@
+# pyplayscheduler/benchmarks/bench_scheduler.py
+"""Benchmarks the scheduler hot paths and compares them to a stored baseline
+
+Usage:
+    python benchmarks/bench_scheduler.py
+    python benchmarks/bench_scheduler.py --quick --output bench.json
+    python benchmarks/bench_scheduler.py --update-baseline
+
+Exits with status 1 when a case is slower or uses more memory than the
+baseline by more than the tolerance, or is missing from the baseline.
+
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pyscheduler import PairCounts, Scheduler, kernels  # noqa: E402
+
+
+BASELINE = Path(__file__).parent / 'baseline.json'
+ROOT = Path(__file__).resolve().parents[1]
+
+# increases smaller than these are timer and allocator noise, not regressions
+MIN_DELTA = {'p50_ms': 0.5, 'peak_mb': 0.1}
+
+# n_players, n_courts, n_rounds, iterations
+MATRIX = [
+    (13, 3, 5, 1000),
+    (22, 5, 8, 5000),
+    (50, 12, 12, 5000),
+]
+QUICK_MATRIX = [
+    (13, 3, 5, 200),
+    (22, 5, 8, 500),
+]
+
+
+def _cases(n_players: int, n_courts: int, n_rounds: int, iterations: int) -> Dict[str, Callable[[], None]]:
+    """The callables to time for one cell of the matrix"""
+    s = Scheduler(n_rounds, n_courts, n_players=n_players, iterations=iterations, seed=0)
+    scheds = s.create_schedules()
+    sample = scheds[:100]
+    best = s.optimize_schedule(seed=0).schedule
+    return {
+        'create_schedules': lambda: s.create_schedules(),
+        'calculate_byes': lambda: s.calculate_byes(),
+        'dupcount': lambda: [s.dupcount(sched) for sched in sample],
+        'oppdupcount': lambda: [s.oppdupcount(sched) for sched in sample],
+        'dupcount_weighted': lambda: [s.dupcount_weighted(sched) for sched in sample],
+        'batch_dupcount': lambda: s.batch_dupcount(scheds),
+        'batch_oppdupcount': lambda: s.batch_oppdupcount(scheds),
+        'optimize_schedule_naive': lambda: s.optimize_schedule(scoring_function='naive'),
+        'optimize_schedule_weighted': lambda: s.optimize_schedule(scoring_function='weighted'),
+        'pair_counts_summary': lambda: PairCounts.from_schedule(best, n_players).summary(),
+    }
+
+
+# number of candidates each case handles per call, for throughput
+def _candidates(name: str, iterations: int) -> int:
+    if name in ('dupcount', 'oppdupcount', 'dupcount_weighted'):
+        return min(100, iterations)
+    if name in ('calculate_byes', 'pair_counts_summary'):
+        return 1
+    return iterations
+
+
+def measure(fn: Callable[[], None], repeats: int) -> dict:
+    """Times fn repeats times, then measures its peak traced memory in a separate call
+
+    Args:
+        fn(Callable): the function to benchmark
+        repeats(int): the number of timed calls
+
+    Returns:
+        dict
+
+    """
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    # tracing slows allocation down, so memory is measured apart from timing
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p90, p99 = np.percentile(np.array(times) * 1000, [50, 90, 99])
+    return {'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99, 'peak_mb': peak / 1e6}
+
+
+# cold import in a fresh interpreter, timing then traced memory like measure
+IMPORT_CODE = '''
+import sys, time, tracemalloc
+if sys.argv[1] == 'memory':
+    tracemalloc.start()
+start = time.perf_counter()
+import pyscheduler
+print(time.perf_counter() - start, tracemalloc.get_traced_memory()[1])
+'''
+
+
+def measure_import(repeats: int) -> dict:
+    """Times a cold import of pyscheduler repeats times, each in a new interpreter
+
+    Args:
+        repeats(int): the number of timed imports
+
+    Returns:
+        dict
+
+    """
+    def cold_import(mode):
+        out = subprocess.run([sys.executable, '-c', IMPORT_CODE, mode], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout.split()
+        return float(out[0]), int(out[1])
+
+    times = [cold_import('time')[0] for _ in range(repeats)]
+    _, peak = cold_import('memory')
+    p50, p90, p99 = np.percentile(np.array(times) * 1000, [50, 90, 99])
+    return {'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99, 'peak_mb': peak / 1e6}
+
+
+def run(matrix: List[tuple], repeats: int) -> dict:
+    """Runs every case for every cell of the matrix
+
+    Args:
+        matrix(List[tuple]): (n_players, n_courts, n_rounds, iterations) cells
+        repeats(int): the number of timed calls per case
+
+    Returns:
+        dict
+
+    """
+    # serverless cold starts pay for the import on every new instance
+    result = measure_import(repeats)
+    result.update({'candidates_per_sec': 0.0, 'name': 'import_pyscheduler', 'n_players': 0, 'n_courts': 0,
+                   'n_rounds': 0, 'iterations': 0})
+    results = [result]
+    print(f"{'import_pyscheduler':28} {'':20} p50 {result['p50_ms']:9.2f} ms  p99 {result['p99_ms']:9.2f} ms  "
+          f"{'':12}    {result['peak_mb']:8.2f} MB")
+    for n_players, n_courts, n_rounds, iterations in matrix:
+        for name, fn in _cases(n_players, n_courts, n_rounds, iterations).items():
+            result = measure(fn, repeats)
+            result['candidates_per_sec'] = _candidates(name, iterations) / (result['p50_ms'] / 1000)
+            result.update({'name': name, 'n_players': n_players, 'n_courts': n_courts,
+                           'n_rounds': n_rounds, 'iterations': iterations})
+            results.append(result)
+            print(f"{name:28} {n_players:3}p {n_courts:2}c {n_rounds:2}r {iterations:6}i "
+                  f"p50 {result['p50_ms']:9.2f} ms  p99 {result['p99_ms']:9.2f} ms  "
+                  f"{result['candidates_per_sec']:12.0f}/s  {result['peak_mb']:8.2f} MB")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'backend': kernels.backend.name,
+            'machine': platform.machine(),
+            'repeats': repeats
+        },
+        'results': results
+    }
+
+
+def _key(result: dict) -> tuple:
+    return result['name'], result['n_players'], result['n_courts'], result['n_rounds'], result['iterations']
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25) -> Tuple[List[str], List[str]]:
+    """Finds cases that are slower or use more memory than the baseline
+
+    Args:
+        current(dict): results from run
+        baseline(dict): stored results from run
+        tolerance(float): allowed relative increase, default .25
+
+    Returns:
+        Tuple[List[str], List[str]]
+        one message per regression, one message per case the baseline does not have
+
+    """
+    stored = {_key(result): result for result in baseline['results']}
+    regressions, missing = [], []
+    for result in current['results']:
+        base = stored.get(_key(result))
+        if not base:
+            missing.append(f'{_key(result)}: not in the baseline')
+            continue
+        for metric in ('p50_ms', 'peak_mb'):
+            if result[metric] > max(base[metric] * (1 + tolerance), base[metric] + MIN_DELTA[metric]):
+                regressions.append(f'{_key(result)} {metric}: {base[metric]:.2f} -> {result[metric]:.2f}')
+    return regressions, missing
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='run the small matrix')
+    parser.add_argument('--repeats', type=int, default=7, help='timed calls per case')
+    parser.add_argument('--output', type=Path, help='write results as json')
+    parser.add_argument('--baseline', type=Path, default=BASELINE, help='baseline json to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative increase')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='write results for both matrices to the baseline')
+    args = parser.parse_args(argv)
+
+    # the baseline covers both matrices so either can be compared against it
+    if args.update_baseline:
+        matrix = MATRIX + QUICK_MATRIX
+    else:
+        matrix = QUICK_MATRIX if args.quick else MATRIX
+    results = run(matrix, args.repeats)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        return 0
+    if not args.baseline.exists():
+        print(f'No baseline at {args.baseline}')
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline['meta'].get('backend') != results['meta']['backend']:
+        print(f"Baseline used the {baseline['meta'].get('backend')} backend, this run used {results['meta']['backend']}")
+    # a case without a baseline fails too, otherwise a run could compare nothing and pass
+    regressions, missing = compare(results, baseline, args.tolerance)
+    for msg in regressions:
+        print(f'REGRESSION {msg}')
+    for msg in missing:
+        print(f'MISSING {msg}')
+    return 1 if regressions or missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
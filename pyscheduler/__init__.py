@@ -1,2 +1,13 @@
+from .batch import ScheduleBatch
+from .cache import ScheduleCache
+from .pairs import PairCounts
 from .scheduler import Scheduler, Schedule
-from .schedulesearch import ScheduleSearch
\ No newline at end of file
+from .stats import SearchStats
+
+
+def __getattr__(name: str):
+    # ScheduleSearch needs pandas, so it is imported the first time it is used
+    if name == 'ScheduleSearch':
+        from .schedulesearch import ScheduleSearch
+        return ScheduleSearch
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
\ No newline at end of file
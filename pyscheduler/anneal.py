@@ -0,0 +1,163 @@
+# pyscheduler/anneal.py
+
+import math
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from pyscheduler.pairs import PairCounts
+
+
+def _lineups(sched: np.ndarray, players: np.ndarray) -> np.ndarray:
+    """Appends the byes to each round so every row is a permutation of the players
+
+    Args:
+        sched(np.ndarray): array of shape (n_rounds, n_courts * players_per_court)
+        players(np.ndarray): the players available each round
+
+    Returns:
+        np.ndarray of shape (n_rounds, len(players))
+
+    """
+    sched = sched.reshape(sched.shape[0], -1)
+    return np.array([np.concatenate([row, np.setdiff1d(players, row)]) for row in sched], dtype=np.int64)
+
+
+def anneal_schedule(sched: np.ndarray,
+                    n_players: int,
+                    players_per_court: int = 4,
+                    iterations: int = 10000,
+                    time_budget_ms: float = None,
+                    seed: int = None,
+                    partner_weight: float = 10.0,
+                    t_start: float = 2.0,
+                    t_end: float = 0.05,
+                    target: List[Tuple[float, float]] = None,
+                    players: np.ndarray = None,
+                    history: PairCounts = None,
+                    prior_byes: np.ndarray = None,
+                    progress: Callable[[dict], None] = None) -> Tuple[np.ndarray, int, int, int]:
+    """Improves a schedule with simulated annealing over swap moves
+
+    Moves either swap two players on different teams within a round
+    or swap a playing player with a player on a bye. A bye swap is only
+    made when the player going to the bye has had fewer byes, so bye counts
+    never get less balanced than in the starting schedule, and, when there are
+    few enough byes to avoid it, when the player did not sit out an adjacent round.
+
+    Args:
+        sched(np.ndarray): the starting schedule, shape (n_rounds, n_courts * players_per_court)
+        n_players(int): the total number of players in the pool
+        players_per_court(int): default 4
+        iterations(int): the number of moves to try, default 10000
+        time_budget_ms(float): stop after this many milliseconds, default None
+        seed(int): seed for the move generator, default None
+        partner_weight(float): cost of a partner duplicate relative to an opponent duplicate, default 10
+        t_start(float): starting temperature, default 2.0
+        t_end(float): final temperature, default .05
+        target(List[Tuple]): stop once the best (partner, opponent) dupcount is at most one of these, default None
+        players(np.ndarray): the players available each round, default every player in the pool
+        history(PairCounts): pairs played before this schedule, counted in the dupcounts, default None
+        prior_byes(np.ndarray): rounds each player missed before this schedule, used to balance byes, default None
+        progress(Callable): called every 1024 moves with a dict of iterations_done, iterations,
+                            and the best partner_dupcount and opponent_dupcount so far, default None
+
+    Returns:
+        tuple of np.ndarray, int, int, int
+        the best schedule (n_rounds, n_courts, players_per_court), partner dupcount, opponent dupcount,
+        number of moves tried
+
+    """
+    # the clock starts before the setup so it counts toward the time budget
+    start = time.perf_counter()
+    deadline = start + time_budget_ms / 1000 if time_budget_ms else None
+    rng = np.random.default_rng(seed)
+    n_rounds = sched.shape[0]
+    slots = sched.reshape(n_rounds, -1).shape[1]
+    n_courts = slots // players_per_court
+    team_size = players_per_court // 2
+
+    # courts[r][c] is a list of players, byes[r] is a list of players
+    # the swap moves modify these lists in place
+    players = np.arange(n_players) if players is None else np.asarray(players)
+    lineups = _lineups(sched, players).tolist()
+    courts = [[row[c * players_per_court:(c + 1) * players_per_court] for c in range(n_courts)] for row in lineups]
+    byes = [row[slots:] for row in lineups]
+    pc = history.copy() if history is not None else PairCounts(n_players, players_per_court)
+    for rnd in courts:
+        for court in rnd:
+            pc.add_court(court)
+
+    bye_counts = [0] * n_players if prior_byes is None else [int(count) for count in prior_byes]
+    for rnd in byes:
+        for player in rnd:
+            bye_counts[player] += 1
+
+    # back-to-back byes are unavoidable when more than half the pool sits out each round
+    avoid_repeats = 2 * len(byes[0]) <= len(players)
+    cost = pc.cost(partner_weight)
+    best = (pc.partner_dupcount, pc.opponent_dupcount)
+    best_courts = np.array(courts)
+    ratio = t_end / t_start
+    target = target or []
+
+    def reached(score):
+        return any(score[0] <= tp and score[1] <= to for tp, to in target)
+
+    moves = 0
+    next_check = 0
+    for it in range(0 if reached(best) else iterations):
+        # progress is the larger of the move budget and the time budget used
+        if deadline is not None and it >= next_check:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            done = max(it / iterations, (now - start) * 1000 / time_budget_ms)
+            temperature = t_start * ratio ** done
+            # the clock is read every 256 moves, and more often once fewer than that fit before the deadline
+            per_move = (now - start) / it if it else 0
+            next_check = it + (256 if not per_move else int(min(max((deadline - now) / per_move / 2, 1), 256)))
+        elif deadline is None:
+            temperature = t_start * ratio ** (it / iterations)
+        moves += 1
+        if progress is not None and it % 1024 == 0:
+            progress({'iterations_done': it, 'iterations': iterations,
+                      'partner_dupcount': best[0], 'opponent_dupcount': best[1]})
+
+        r = int(rng.integers(n_rounds))
+        a = int(rng.integers(slots))
+        b = int(rng.integers(len(players)))
+        court_a, i = courts[r][a // players_per_court], a % players_per_court
+        if b < slots:
+            if a // team_size == b // team_size:
+                continue
+            court_b, j = courts[r][b // players_per_court], b % players_per_court
+            undo = dict(court_a=court_a, i=i, court_b=court_b, j=j)
+            pc.swap(court_a, i, court_b, j)
+        else:
+            k = b - slots
+            incoming, outgoing = byes[r][k], court_a[i]
+            if bye_counts[outgoing] >= bye_counts[incoming]:
+                continue
+            if avoid_repeats and ((r > 0 and outgoing in byes[r - 1]) or (r + 1 < n_rounds and outgoing in byes[r + 1])):
+                continue
+            undo = dict(court_a=court_a, i=i, player=outgoing)
+            pc.swap(court_a, i, player=incoming)
+
+        delta = pc.cost(partner_weight) - cost
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            cost += delta
+            if b >= slots:
+                byes[r][k] = outgoing
+                bye_counts[incoming] -= 1
+                bye_counts[outgoing] += 1
+            if (pc.partner_dupcount, pc.opponent_dupcount) < best:
+                best = (pc.partner_dupcount, pc.opponent_dupcount)
+                best_courts = np.array(courts)
+                if reached(best):
+                    break
+        else:
+            pc.swap(**undo)
+
+    return best_courts.astype(sched.dtype), best[0], best[1], moves
@@ -0,0 +1,139 @@
+# pyscheduler/batch.py
+
+from dataclasses import dataclass
+from typing import Iterator, List, Sequence, Union
+
+import numpy as np
+
+from pyscheduler import selection
+from pyscheduler.stats import SearchStats
+
+
+def index_dtype(n: int) -> np.dtype:
+    """The smallest unsigned integer dtype that holds 0 through n - 1
+
+    Args:
+        n(int): the number of distinct values, for example the number of players
+
+    Returns:
+        np.dtype
+
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if n - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+@dataclass
+class ScheduleBatch:
+    """Many scored schedules for one configuration stored as parallel arrays
+
+    schedules holds every schedule in one contiguous array of the smallest
+    dtype that fits n_players, and partner_dupcounts and opponent_dupcounts hold
+    one score per schedule. Indexing with an int returns a Schedule whose
+    schedule is a view into the batch, anything else returns a ScheduleBatch.
+
+    Usage:
+        batch = s.top_schedules(k=1000, as_batch=True)
+        best = batch.sort(objective='weighted')[:10]
+        sched = best[0]
+
+    """
+    schedules: np.ndarray
+    partner_dupcounts: np.ndarray
+    opponent_dupcounts: np.ndarray
+    n_players: int
+    players_per_court: int = 4
+    iterations_used: int = None
+    stats: SearchStats = None
+
+    def __post_init__(self):
+        # one row of n_courts * players_per_court slots per round, like create_schedules
+        schedules = np.asarray(self.schedules)
+        schedules = schedules.reshape(schedules.shape[:2] + (int(np.prod(schedules.shape[2:])),))
+        self.schedules = np.ascontiguousarray(schedules, dtype=index_dtype(self.n_players))
+        self.partner_dupcounts = np.asarray(self.partner_dupcounts)
+        self.opponent_dupcounts = np.asarray(self.opponent_dupcounts)
+        if not self.schedules.shape[0] == self.partner_dupcounts.shape[0] == self.opponent_dupcounts.shape[0]:
+            raise ValueError(f'Invalid value for partner_dupcounts or opponent_dupcounts: '
+                             f'{self.partner_dupcounts.shape[0]}, {self.opponent_dupcounts.shape[0]} scores '
+                             f'for {self.schedules.shape[0]} schedules')
+
+    @classmethod
+    def from_schedules(cls, schedules: Sequence, iterations_used: int = None) -> 'ScheduleBatch':
+        """Stacks schedules that share one configuration
+
+        Args:
+            schedules(Sequence[Schedule]): the schedules
+            iterations_used(int): default None
+
+        Returns:
+            ScheduleBatch
+
+        """
+        first = schedules[0]
+        return cls(schedules=np.stack([sched.schedule.reshape(first.schedule.shape) for sched in schedules]),
+                   partner_dupcounts=np.array([sched.partner_dupcount for sched in schedules]),
+                   opponent_dupcounts=np.array([sched.opponent_dupcount for sched in schedules]),
+                   n_players=first.n_players,
+                   players_per_court=first.players_per_court,
+                   iterations_used=iterations_used)
+
+    def __len__(self):
+        return self.schedules.shape[0]
+
+    def __iter__(self) -> Iterator:
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, idx: Union[int, slice, np.ndarray]):
+        if isinstance(idx, (int, np.integer)):
+            return self._schedule(int(idx))
+        return ScheduleBatch(schedules=self.schedules[idx],
+                             partner_dupcounts=self.partner_dupcounts[idx],
+                             opponent_dupcounts=self.opponent_dupcounts[idx],
+                             n_players=self.n_players,
+                             players_per_court=self.players_per_court,
+                             iterations_used=self.iterations_used,
+                             stats=self.stats)
+
+    @property
+    def n_rounds(self):
+        return self.schedules.shape[1]
+
+    @property
+    def n_courts(self):
+        return self.schedules.shape[2] // self.players_per_court
+
+    def _schedule(self, idx: int):
+        from pyscheduler.scheduler import Schedule
+
+        return Schedule(n_players=self.n_players,
+                        players_per_court=self.players_per_court,
+                        schedule=self.schedules[idx].reshape(self.n_rounds, self.n_courts, self.players_per_court),
+                        partner_dupcount=self.partner_dupcounts[idx],
+                        opponent_dupcount=self.opponent_dupcounts[idx],
+                        iterations_used=self.iterations_used,
+                        stats=self.stats)
+
+    def sort(self, objective: str = 'lexicographic', partner_weight: float = 10.0) -> 'ScheduleBatch':
+        """Orders the batch from best to worst score, see selection.objective_order
+
+        Args:
+            objective(str): 'lexicographic' or 'weighted', default 'lexicographic'
+            partner_weight(float): cost of a partner duplicate relative to an opponent duplicate, default 10
+
+        Returns:
+            ScheduleBatch
+
+        """
+        return self[selection.objective_order(self.partner_dupcounts, self.opponent_dupcounts, objective, partner_weight)]
+
+    def to_schedules(self) -> List:
+        """Splits the batch into Schedule objects that share its memory
+
+        Returns:
+            List[Schedule]
+
+        """
+        return list(self)
@@ -0,0 +1,60 @@
+# pyscheduler/bounds.py
+
+from typing import Tuple
+
+import numpy as np
+
+
+def games_played(n_players: int, n_rounds: int, n_courts: int, players_per_court: int = 4) -> np.ndarray:
+    """The number of games each player plays when byes are spread as evenly as possible
+
+    Args:
+        n_players(int): the total number of players in the pool
+        n_rounds(int): number of rounds of play
+        n_courts(int): number of courts to use
+        players_per_court(int): default 4
+
+    Returns:
+        np.ndarray of shape (n_players,)
+
+    """
+    slots = n_rounds * n_courts * players_per_court
+    return slots // n_players + (np.arange(n_players) < slots % n_players)
+
+
+def _dup_lower_bound(n_players: int, n_pairs: int, pairs_per_game: np.ndarray) -> int:
+    """Duplicates forced by n_pairs pair occurrences among n_players
+
+    A duplicate count is pair occurrences minus distinct pairs, so it is at least
+    the occurrences beyond the n_players * (n_players - 1) / 2 distinct pairs. Counted
+    per player, a player with g games meets g * pairs_per_game others, at most
+    n_players - 1 of them distinct, and every duplicate is counted by both players.
+
+    """
+    overall = n_pairs - n_players * (n_players - 1) // 2
+    per_player = int(np.maximum(pairs_per_game - (n_players - 1), 0).sum() + 1) // 2
+    return max(0, overall, per_player)
+
+
+def lower_bounds(n_players: int, n_rounds: int, n_courts: int, players_per_court: int = 4) -> Tuple[int, int]:
+    """Lower bounds on the partner and opponent dupcounts of any schedule
+
+    The bounds hold for any bye assignment, spreading byes evenly only lowers them.
+
+    Args:
+        n_players(int): the total number of players in the pool
+        n_rounds(int): number of rounds of play
+        n_courts(int): number of courts to use
+        players_per_court(int): default 4
+
+    Returns:
+        tuple of int, int
+        partner dupcount, opponent dupcount
+
+    """
+    team_size = players_per_court // 2
+    n_games = n_rounds * n_courts
+    games = games_played(n_players, n_rounds, n_courts, players_per_court)
+    partners = _dup_lower_bound(n_players, n_games * 2 * team_size * (team_size - 1) // 2, games * (team_size - 1))
+    opponents = _dup_lower_bound(n_players, n_games * team_size * team_size, games * team_size)
+    return partners, opponents
@@ -0,0 +1,126 @@
+# pyscheduler/byes.py
+
+from typing import Tuple
+
+import numpy as np
+
+from pyscheduler import kernels
+from pyscheduler.batch import index_dtype
+
+
+# Byes are handed out cyclically from an ordering of the players: round r sits out
+# order[r * byes_per_round:(r + 1) * byes_per_round], wrapping around the end.
+# Every player sits out before anyone sits out twice, so bye counts never differ by
+# more than one, and a player's next bye is at least n_players // byes_per_round rounds
+# later, so there are no back-to-back byes when byes_per_round <= n_players / 2.
+# The players on court in round r are the rest of the cycle, which makes both
+# selections a gather with a fixed index template.
+
+
+def byes_per_round(n_players: int, n_courts: int, players_per_court: int = 4) -> int:
+    """The number of players sitting out each round
+
+    Args:
+        n_players(int): the total number of players in the pool
+        n_courts(int): number of courts to use
+        players_per_court(int): default 4
+
+    Returns:
+        int
+
+    """
+    byes = n_players - n_courts * players_per_court
+    if byes < 0:
+        raise ValueError(f'Need at least {n_courts * players_per_court} players for {n_courts} courts, got {n_players}')
+    return byes
+
+
+def cycle_indexes(n_players: int, n_rounds: int, n_byes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions in a player ordering that sit out and that play in each round
+
+    Args:
+        n_players(int): the total number of players in the pool
+        n_rounds(int): number of rounds of play
+        n_byes(int): the number of byes per round
+
+    Returns:
+        tuple of np.ndarray, np.ndarray
+        shapes (n_rounds, n_byes) and (n_rounds, n_players - n_byes)
+
+    """
+    starts = np.arange(n_rounds)[:, None] * n_byes
+    bye_idx = (starts + np.arange(n_byes)) % n_players
+    play_idx = (starts + n_byes + np.arange(n_players - n_byes)) % n_players
+    return bye_idx, play_idx
+
+
+def fair_byes(n_players: int, n_rounds: int, n_byes: int, order: np.ndarray = None) -> np.ndarray:
+    """Assigns byes so counts are balanced and no one sits out twice in a row when avoidable
+
+    Args:
+        n_players(int): the total number of players in the pool
+        n_rounds(int): number of rounds of play
+        n_byes(int): the number of byes per round
+        order(np.ndarray): the order players take byes in, default player order
+
+    Returns:
+        np.ndarray of shape (n_rounds, n_byes)
+
+    """
+    order = np.arange(n_players) if order is None else np.asarray(order)
+    bye_idx, _ = cycle_indexes(n_players, n_rounds, n_byes)
+    return order[bye_idx]
+
+
+def random_lineups(n_players: int,
+                   n_rounds: int,
+                   n_byes: int,
+                   iterations: int,
+                   rng: np.random.Generator,
+                   dtype: np.dtype = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Draws a fair bye assignment for every candidate and the players left on court
+
+    Args:
+        n_players(int): the total number of players in the pool
+        n_rounds(int): number of rounds of play
+        n_byes(int): the number of byes per round
+        iterations(int): the number of candidates
+        rng(np.random.Generator): the generator for the bye orders
+        dtype(np.dtype): the player dtype, default the smallest that fits n_players, see batch.index_dtype
+
+    Returns:
+        tuple of np.ndarray, np.ndarray
+        byes of shape (iterations, n_rounds, n_byes), players of shape (iterations, n_rounds, n_players - n_byes)
+
+    """
+    orders = np.tile(np.arange(n_players, dtype=dtype or index_dtype(n_players)), (iterations, 1))
+    kernels.backend.shuffle_rows(orders, rng)
+    bye_idx, play_idx = cycle_indexes(n_players, n_rounds, n_byes)
+    return orders[:, bye_idx], orders[:, play_idx]
+
+
+def history_order(players: np.ndarray, played: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Orders players for fair_byes after some rounds have been played
+
+    Players with the most games so far sit out first, and players who sat out
+    the last round played go last, so a late arrival or a player coming off
+    a bye is not benched again straight away. Ties are broken at random.
+
+    Args:
+        players(np.ndarray): the players available for the remaining rounds
+        played(np.ndarray): the rounds played so far, shape (n_played, n_courts * players_per_court)
+        rng(np.random.Generator): the tie-breaking generator
+
+    Returns:
+        np.ndarray
+        a permutation of players
+
+    """
+    players = np.asarray(players)
+    # with nothing played yet every player has 0 games and the order is random
+    played = np.asarray(played)
+    played = played.reshape(len(played), -1) if played.size else np.zeros((0, 0), dtype=np.intp)
+    n_pool = max(int(players.max()), int(played.max(initial=0))) + 1
+    games = np.bincount(played.ravel().astype(np.intp), minlength=n_pool)[players]
+    sat_last = ~np.isin(players, played[-1]) if len(played) else np.zeros(len(players), dtype=bool)
+    return players[np.lexsort((rng.random(len(players)), sat_last, -games))]
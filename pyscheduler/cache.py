@@ -0,0 +1,243 @@
+# pyscheduler/cache.py
+
+from collections import OrderedDict
+import dataclasses
+import os
+from pathlib import Path
+import threading
+import time
+import zipfile
+from typing import Callable, Dict, Hashable, Tuple, Union
+
+import numpy as np
+
+from pyscheduler.singleflight import SingleFlight
+
+
+def cache_key(n_players: int,
+              n_courts: int,
+              n_rounds: int,
+              players_per_court: int = 4,
+              strategy: str = 'sample',
+              seed: int = None,
+              scoring_function: str = 'naive',
+              iterations: int = None,
+              chunk_size: int = 1000,
+              workers: int = None,
+              initial: str = 'random') -> Tuple:
+    """Creates the canonical cache key for an optimization
+
+    Args:
+        n_players(int): total number of players in pool
+        n_courts(int): number of courts to use
+        n_rounds(int): number of rounds of play
+        players_per_court(int): default 4
+        strategy(str): the optimize_schedule strategy, default 'sample'
+        seed(int): the seed, default None
+        scoring_function(str): default 'naive'
+        iterations(int): the number of iterations, default None
+        chunk_size(int): schedules generated per block, default 1000
+        workers(int): the number of processes, default None
+        initial(str): the schedule the anneal strategy starts from, default 'random'
+
+    Returns:
+        tuple
+
+    """
+    # one worker runs the same search as none
+    workers = int(workers) if workers and workers > 1 else None
+    return (int(n_players), int(n_courts), int(n_rounds), int(players_per_court), strategy,
+            None if seed is None else int(seed), scoring_function, None if iterations is None else int(iterations),
+            None if chunk_size is None else int(chunk_size), workers, initial)
+
+
+def _copy(sched):
+    """Copies a schedule and its array so callers and the cache never share memory"""
+    return dataclasses.replace(sched, schedule=np.array(sched.schedule))
+
+
+class ScheduleCache:
+    """Least-recently-used cache of optimized schedules with an optional disk tier
+
+    Entries expire ttl seconds after they are stored. When path is set,
+    every stored schedule is also written there as an .npz file, so a new
+    process, or one that evicted the entry, can reload it instead of optimizing again.
+    get_or_compute runs concurrent misses for the same key only once, across
+    processes too when there is a disk tier.
+
+    Usage:
+        cache = ScheduleCache(maxsize=256, ttl=3600, path='/tmp/schedules')
+        s = Scheduler(n_rounds=8, n_courts=5, n_players=22, cache=cache)
+        s.optimize_schedule()
+        s.optimize_schedule()
+        cache.stats()['hits']
+
+    """
+    def __init__(self, maxsize: int = 256, ttl: float = None, path: Union[str, Path] = None):
+        """Instantiate ScheduleCache object
+
+        Args:
+            maxsize(int): the most schedules kept in memory, default 256
+            ttl(float): seconds before an entry expires, default None never expires
+            path(str or Path): directory for the disk tier, default None
+
+        Returns:
+            ScheduleCache
+
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+        if self.path:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.flights = SingleFlight(self.path / 'locks' if self.path else None)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        with self._lock:
+            return self._live(key) is not None
+
+    def _live(self, key: Hashable):
+        """The entry for key if it has not expired, caller holds the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def _file(self, key: Hashable) -> Path:
+        return self.path / ('schedule_' + '_'.join(str(part) for part in key) + '.npz')
+
+    def get(self, key: Hashable):
+        """Gets a schedule, checking memory then disk
+
+        Args:
+            key(Hashable): see cache_key
+
+        Returns:
+            Schedule or None
+
+        """
+        with self._lock:
+            entry = self._live(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(entry[1])
+
+        sched = self._read(key)
+        with self._lock:
+            if sched is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, sched)
+        return _copy(sched)
+
+    def get_or_compute(self, key: Hashable, fn: Callable):
+        """Gets a schedule, or computes and stores it with concurrent identical calls sharing one computation
+
+        Args:
+            key(Hashable): see cache_key
+            fn(Callable): computes the schedule when it is not cached
+
+        Returns:
+            Schedule
+
+        """
+        sched = self.get(key)
+        if sched is not None:
+            return sched
+
+        def compute():
+            sched = fn()
+            self.put(key, sched)
+            return sched
+
+        return _copy(self.flights.do(key, compute, lookup=lambda: self._peek(key)))
+
+    def _peek(self, key: Hashable):
+        """Gets a schedule without touching the counters"""
+        with self._lock:
+            entry = self._live(key)
+        return entry[1] if entry is not None else self._read(key)
+
+    def put(self, key: Hashable, sched):
+        """Stores a schedule in memory and, when there is a disk tier, on disk
+
+        Args:
+            key(Hashable): see cache_key
+            sched(Schedule): the schedule
+
+        Returns:
+            None
+
+        """
+        sched = _copy(sched)
+        with self._lock:
+            self._store(key, sched)
+        if self.path:
+            self._write(key, sched)
+
+    def _store(self, key: Hashable, sched):
+        """Adds an entry and evicts the least recently used, caller holds the lock"""
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[key] = (expires, sched)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _write(self, key: Hashable, sched):
+        # written to a temporary file first so readers never see a partial file
+        fn = self._file(key)
+        tmp = fn.with_name(fn.stem + f'.{os.getpid()}.{threading.get_ident()}.tmp.npz')
+        np.savez(tmp, schedule=sched.schedule, partner_dupcount=sched.partner_dupcount,
+                 opponent_dupcount=sched.opponent_dupcount, n_players=sched.n_players,
+                 players_per_court=sched.players_per_court)
+        os.replace(tmp, fn)
+
+    def _read(self, key: Hashable):
+        """Loads a schedule from the disk tier if it is there and has not expired"""
+        from pyscheduler.scheduler import Schedule
+
+        if not self.path:
+            return None
+        fn = self._file(key)
+        try:
+            if self.ttl and fn.stat().st_mtime + self.ttl < time.time():
+                return None
+            with np.load(fn) as data:
+                return Schedule(n_players=int(data['n_players']),
+                                players_per_court=int(data['players_per_court']),
+                                schedule=data['schedule'],
+                                partner_dupcount=data['partner_dupcount'][()],
+                                opponent_dupcount=data['opponent_dupcount'][()])
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+
+    def clear(self):
+        """Removes every entry from memory, the disk tier is left alone"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters
+
+        Returns:
+            dict
+            keys are hits, disk_hits, misses, evictions, size
+
+        """
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self._entries)}
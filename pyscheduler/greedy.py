@@ -0,0 +1,93 @@
+# pyscheduler/greedy.py
+
+from typing import List
+
+import numpy as np
+
+from pyscheduler.pairs import PairCounts
+
+
+def greedy_round(players: np.ndarray,
+                 pc: PairCounts,
+                 n_courts: int,
+                 rng: np.random.Generator,
+                 partner_weight: float = 10.0) -> List[List[int]]:
+    """Builds one round of courts that adds as few duplicates as possible to pc
+
+    Teams are formed first, each time taking the first open player in random order
+    and adding the teammates they have partnered least. Teams are then matched the
+    same way on opponent counts. Random noise below 1 breaks ties between equal counts.
+
+    Args:
+        players(np.ndarray): the players available this round
+        pc(PairCounts): the pairs already played, not updated
+        n_courts(int): number of courts to fill
+        rng(np.random.Generator): the tie-breaking generator
+        partner_weight(float): cost of a repeated partner relative to a repeated opponent, default 10
+
+    Returns:
+        List[List[int]]
+        one list per court, team 1 then team 2
+
+    """
+    team_size = pc.players_per_court // 2
+    open_players = rng.permutation(players)[:n_courts * pc.players_per_court].tolist()
+
+    teams = []
+    while open_players:
+        team = [open_players.pop(0)]
+        while len(team) < team_size:
+            # teammates that have played against the team cost a little, partners cost a lot
+            others = np.array(open_players)
+            cost = (partner_weight * pc.partners[np.ix_(team, others)].sum(axis=0)
+                    + pc.opponents[np.ix_(team, others)].sum(axis=0)
+                    + rng.random(others.shape[0]))
+            team.append(open_players.pop(int(np.argmin(cost))))
+        teams.append(team)
+
+    courts = []
+    while teams:
+        team = teams.pop(0)
+        others = np.array(teams)
+        cost = pc.opponents[team][:, others].sum(axis=(0, 2)) + rng.random(others.shape[0])
+        courts.append(team + teams.pop(int(np.argmin(cost))))
+    return courts
+
+
+def greedy_schedule(n_players: int,
+                    n_rounds: int,
+                    n_courts: int,
+                    players_per_court: int = 4,
+                    byes: np.ndarray = None,
+                    pc: PairCounts = None,
+                    seed: int = None,
+                    partner_weight: float = 10.0,
+                    players: np.ndarray = None) -> np.ndarray:
+    """Builds a schedule round by round, each round avoiding the pairs used before it
+
+    Args:
+        n_players(int): the total number of players in the pool
+        n_rounds(int): number of rounds of play
+        n_courts(int): number of courts to use
+        players_per_court(int): default 4
+        byes(np.ndarray): the players sitting out each round, shape (n_rounds, byes_per_round), default None
+        pc(PairCounts): pairs already played, for example earlier rounds of the same event, default None
+        seed(int): int, SeedSequence or np.random.Generator, default None
+        partner_weight(float): cost of a repeated partner relative to a repeated opponent, default 10
+        players(np.ndarray): the players available each round, default every player in the pool
+
+    Returns:
+        np.ndarray of shape (n_rounds, n_courts * players_per_court)
+
+    """
+    rng = np.random.default_rng(seed)
+    pc = pc.copy() if pc is not None else PairCounts(n_players, players_per_court)
+    pool = np.arange(n_players) if players is None else np.asarray(players)
+    rounds = []
+    for r in range(n_rounds):
+        available = np.setdiff1d(pool, byes[r]) if byes is not None else pool
+        courts = greedy_round(available, pc, n_courts, rng, partner_weight)
+        for court in courts:
+            pc.add_court(court)
+        rounds.append(np.concatenate(courts))
+    return np.array(rounds)
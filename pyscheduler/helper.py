@@ -1,13 +1,87 @@
-from collections import Counter, defaultdict
-import itertools
-from typing import Dict, List, Tuple, Union
+from __future__ import annotations
+
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
 
 import numpy as np
-import pandas as pd
+
+from pyscheduler.pairs import PairCounts
+
+# pandas is imported by the functions that build DataFrames, so the array functions do not load it
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def pair_table(counts: np.ndarray) -> np.ndarray:
+    """Lists every pair that played from a symmetric pair count matrix
+
+    Both sides of each pairing get a row, that is if 1 and 2 play together
+    there is a row for 1, 2 and a row for 2, 1, for easier filtering
+
+    Args:
+        counts(np.ndarray): the (n_players, n_players) matrix, see PairCounts
+
+    Returns:
+        np.ndarray of shape (n_rows, 3)
+        columns: player, other player, times
+
+    """
+    players, others = np.nonzero(counts)
+    return np.column_stack((players, others, counts[players, others]))
+
+
+def pair_summary(schedule: np.ndarray,
+                 kind: str = 'partner',
+                 n_players: int = None,
+                 players_per_court: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+    """Summarizes the partners or opponents in a schedule without leaving numpy
+
+    Args:
+        schedule(np.ndarray): the schedule, any shape that reshapes to (n_games, players_per_court)
+        kind(str): 'partner' or 'opponent', default 'partner'
+        n_players(int): the total number of players in the pool, default max player + 1
+        players_per_court(int): default 4
+
+    Returns:
+        tuple of np.ndarray, np.ndarray
+        the histogram, where index k is the number of pairs that played k times,
+        and the pair_table with columns player, other player, times
+
+    """
+    pc = PairCounts.from_schedule(schedule, n_players, players_per_court)
+    hist = pc.histogram(kind)
+    return hist, pair_table(pc.partners if kind == 'partner' else pc.opponents)
+
+
+def histogram_counter(hist: np.ndarray) -> Counter:
+    """Converts a pair histogram to a Counter of times played to number of pairs"""
+    return Counter({k: int(v) for k, v in enumerate(hist.tolist()) if v})
 
 
-def opponent_summary(self, df: pd.DataFrame) -> Tuple[Counter, pd.DataFrame]:
-    """Takes schedule_table df and creates summary of opponents
+def summary_frame(table: np.ndarray, kind: str = 'partner') -> pd.DataFrame:
+    """Converts a pair_table to a DataFrame
+
+    Args:
+        table(np.ndarray): the pair_table
+        kind(str): 'partner' or 'opponent', names the second column, default 'partner'
+
+    Returns:
+        pd.DataFrame
+        columns: player, partner or opponent, times
+
+    """
+    import pandas as pd
+
+    return pd.DataFrame({'player': table[:, 0], kind: table[:, 1], 'times': table[:, 2]})
+
+
+def _table_courts(df: pd.DataFrame) -> np.ndarray:
+    """Stacks the team1 and team2 columns of a schedule_table df into one row per game"""
+    return np.hstack((np.array(df.team1.tolist()), np.array(df.team2.tolist())))
+
+
+def opponent_summary(df: pd.DataFrame) -> Tuple[Counter, pd.DataFrame]:
+    """Takes schedule_table df and creates summary of opponents, see pair_summary
 
     Args:
         df(pd.DataFrame): dataframe created by schedule_table   
@@ -22,24 +96,13 @@ def opponent_summary(self, df: pd.DataFrame) -> Tuple[Counter, pd.DataFrame]:
         >>> opponent_summary(df.query(q))
         
     """
-    # part one: get the counts of tuples
-    summ = defaultdict(int)
-    for row in df.itertuples():
-        for item in itertools.product(row.team1, row.team2):
-            summ[tuple(sorted(item))] += 1
-        
-    # part two: convert to tabular format
-    # show both sides of pairing for easier filtering
-    # that is if 1 and 2 play together, have a row for 1, 2
-    # and a row for 2, 1
-    sched = [{'player': k[0], 'opponent': k[1], 'times': v}
-            for k,v in summ.items()]
-    sched += [{'player': k[1], 'opponent': k[0], 'times': v}
-            for k,v in summ.items()]
-    return Counter(summ.values()), pd.DataFrame(sched)
+    courts = _table_courts(df)
+    hist, table = pair_summary(courts, 'opponent', players_per_court=courts.shape[1])
+    return histogram_counter(hist), summary_frame(table, 'opponent')
+
 
 def partner_summary(df: pd.DataFrame) -> Tuple[Counter, pd.DataFrame]:
-    """Takes schedule_table df and creates summary of partners
+    """Takes schedule_table df and creates summary of partners, see pair_summary
 
     Args:
         df(pd.DataFrame): dataframe created by schedule_table   
@@ -54,20 +117,9 @@ def partner_summary(df: pd.DataFrame) -> Tuple[Counter, pd.DataFrame]:
         >>> partner_summary(df.query(q))
         
     """
-    # part one: get the counts of tuples
-    summ = defaultdict(int)
-    for pairing in df.team1.values.tolist() + df.team2.values.tolist():
-        summ[pairing] += 1
-    
-    # part two: convert to tabular format
-    # show both sides of pairing for easier filtering
-    # that is if 1 and 2 play together, have a row for 1, 2
-    # and a row for 2, 1
-    sched = [{'player': k[0], 'partner': k[1], 'times': v}
-             for k,v in summ.items()]
-    sched += [{'player': k[1], 'partner': k[0], 'times': v}
-              for k,v in summ.items()]
-    return Counter(summ.values()), pd.DataFrame(sched)
+    courts = _table_courts(df)
+    hist, table = pair_summary(courts, 'partner', players_per_court=courts.shape[1])
+    return histogram_counter(hist), summary_frame(table, 'partner')
 
 
 def readable_schedule(players: Union[np.ndarray, List[str]], schedule: np.ndarray) -> List[dict]:
@@ -87,9 +139,11 @@ def readable_schedule(players: Union[np.ndarray, List[str]], schedule: np.ndarra
         return players[np.setdiff1d(np.arange(len(players)), round_schedule.flatten())]
 
     def _matchups(players, round_schedule):
-        """Creates array of strings from schedule"""
-        return [f'{players[item[0]]}-{players[item[1]]}\n{players[item[2]]}-{players[item[3]]}'
-                for item in round_schedule]
+        """Creates array of strings from schedule, one team per line"""
+        # names are gathered for the whole round at once, first half of each court is team 1
+        names = players[np.asarray(round_schedule)]
+        half = names.shape[-1] // 2
+        return ['-'.join(map(str, court[:half])) + '\n' + '-'.join(map(str, court[half:])) for court in names.tolist()]
             
     if not isinstance(players, np.ndarray):
         players = np.array(players)
@@ -99,19 +153,21 @@ def readable_schedule(players: Union[np.ndarray, List[str]], schedule: np.ndarra
             for idx, round_schedule in enumerate(schedule)]
 
             
-def schedule_table(d: Dict[Tuple[int, int, int], np.ndarray]) -> pd.DataFrame:
+def schedule_table(d: Dict[Tuple[int, int, int], np.ndarray], players_per_court: int = 4) -> pd.DataFrame:
     """Converts a results dictionary into tabular format"""
-    data = []
-    for k, v in d.items():
-        n_players, n_rounds, n_courts = k
-        for idx, row in enumerate(v):
-            for jdx, irow in enumerate(row):
-                data.append({'n_players': n_players, 
-                        'n_rounds': n_rounds, 
-                        'n_courts': n_courts, 
-                        'round': idx + 1,
-                        'game': jdx + 1,
-                        'team1': tuple(sorted(irow[0:2])),
-                        'team2': tuple(sorted(irow[2:]))})
-    return pd.DataFrame(data)
-
+    import pandas as pd
+
+    frames = []
+    for (n_players, n_rounds, n_courts), v in d.items():
+        games = np.asarray(v).reshape(-1, players_per_court)
+        team1 = np.sort(games[:, :players_per_court // 2], axis=1)
+        team2 = np.sort(games[:, players_per_court // 2:], axis=1)
+        rounds, courts = np.divmod(np.arange(games.shape[0]), games.shape[0] // np.asarray(v).shape[0])
+        frames.append(pd.DataFrame({'n_players': n_players,
+                                    'n_rounds': n_rounds,
+                                    'n_courts': n_courts,
+                                    'round': rounds + 1,
+                                    'game': courts + 1,
+                                    'team1': list(map(tuple, team1.tolist())),
+                                    'team2': list(map(tuple, team2.tolist()))}))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -0,0 +1,152 @@
+# pyscheduler/kernels.py
+
+import logging
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+
+def _numpy_count_duplicates(codes: np.ndarray) -> np.ndarray:
+    """Counts repeated pair codes in each row (number of pairs - number of unique pairs)"""
+    codes = np.sort(codes, axis=1)
+    return np.count_nonzero(codes[:, 1:] == codes[:, :-1], axis=1)
+
+
+def _numpy_multiplicity_histogram(codes: np.ndarray) -> np.ndarray:
+    """Counts, for each row, how many pairs occur exactly k times"""
+    n_rows, n_pairs = codes.shape
+    if n_pairs == 0:
+        return np.zeros((n_rows, 1), dtype=np.int64)
+
+    # a run of equal codes in a sorted row is one distinct pair
+    # runs always start at the beginning of each row
+    codes = np.sort(codes, axis=1)
+    starts = np.ones(codes.shape, dtype=bool)
+    starts[:, 1:] = codes[:, 1:] != codes[:, :-1]
+    start_idx = np.flatnonzero(starts)
+    lengths = np.diff(np.append(start_idx, codes.size))
+    rows = start_idx // n_pairs
+    width = lengths.max() + 1
+    hist = np.bincount(rows * width + lengths, minlength=n_rows * width)
+    return hist.reshape(n_rows, width)
+
+
+def _numpy_shuffle_rows(X: np.ndarray, rng: np.random.Generator):
+    """Shuffles each row of a 2d array in place with one batched call"""
+    rng.permuted(X, axis=1, out=X)
+
+
+def _numpy_backend() -> SimpleNamespace:
+    return SimpleNamespace(
+        name='numpy',
+        count_duplicates=_numpy_count_duplicates,
+        multiplicity_histogram=_numpy_multiplicity_histogram,
+        shuffle_rows=_numpy_shuffle_rows
+    )
+
+
+def _numba_backend() -> SimpleNamespace:
+    """Compiles the numba kernels, raises ImportError if numba is not installed"""
+    import numba
+
+    @numba.njit(cache=True)
+    def count_duplicates(codes):
+        n_rows, n_pairs = codes.shape
+        out = np.zeros(n_rows, dtype=np.int64)
+        for row in range(n_rows):
+            s = np.sort(codes[row])
+            dups = 0
+            for i in range(1, n_pairs):
+                if s[i] == s[i - 1]:
+                    dups += 1
+            out[row] = dups
+        return out
+
+    @numba.njit(cache=True)
+    def _row_histograms(codes, width):
+        n_rows, n_pairs = codes.shape
+        hist = np.zeros((n_rows, width), dtype=np.int64)
+        for row in range(n_rows):
+            s = np.sort(codes[row])
+            run = 1
+            for i in range(1, n_pairs + 1):
+                if i < n_pairs and s[i] == s[i - 1]:
+                    run += 1
+                else:
+                    hist[row, run] += 1
+                    run = 1
+        return hist
+
+    @numba.njit(cache=True)
+    def _max_run(codes):
+        n_rows, n_pairs = codes.shape
+        best = 1
+        for row in range(n_rows):
+            s = np.sort(codes[row])
+            run = 1
+            for i in range(1, n_pairs):
+                run = run + 1 if s[i] == s[i - 1] else 1
+                if run > best:
+                    best = run
+        return best
+
+    def multiplicity_histogram(codes):
+        if codes.shape[1] == 0:
+            return np.zeros((codes.shape[0], 1), dtype=np.int64)
+        codes = np.ascontiguousarray(codes)
+        return _row_histograms(codes, _max_run(codes) + 1)
+
+    return SimpleNamespace(
+        name='numba',
+        count_duplicates=lambda codes: count_duplicates(np.ascontiguousarray(codes)),
+        multiplicity_histogram=multiplicity_histogram,
+        # numba keeps its own random state, shuffling from the caller's generator
+        # keeps a seed giving the same schedules whichever backend scores them
+        shuffle_rows=_numpy_shuffle_rows
+    )
+
+
+BACKENDS = {'numpy': _numpy_backend, 'numba': _numba_backend}
+
+
+def get_backend(name: str = None) -> SimpleNamespace:
+    """Creates a kernel backend
+
+    Args:
+        name(str): 'numba' or 'numpy', default None is numpy
+
+    Returns:
+        SimpleNamespace
+        with name, count_duplicates, multiplicity_histogram and shuffle_rows
+
+    """
+    # numba is opt in, it scores no faster than numpy at these sizes and adds JIT time to a cold start
+    name = name or 'numpy'
+    if name not in BACKENDS:
+        raise ValueError(f'Invalid value for backend: {name}')
+    return BACKENDS[name]()
+
+
+def set_backend(name: str = None) -> SimpleNamespace:
+    """Selects the backend used by the scoring functions
+
+    Args:
+        name(str): 'numba' or 'numpy', default None is numpy
+
+    Returns:
+        SimpleNamespace
+
+    """
+    global backend
+    backend = get_backend(name)
+    logging.getLogger(__name__).info(f'Using {backend.name} kernels')
+    return backend
+
+
+def __getattr__(name: str):
+    # the backend is selected on first use, not at import
+    # PYSCHEDULER_BACKEND=numba opts in to the numba kernels
+    if name == 'backend':
+        return set_backend(os.environ.get('PYSCHEDULER_BACKEND'))
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
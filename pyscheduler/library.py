@@ -0,0 +1,335 @@
+# pyscheduler/library.py
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import functools
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from pyscheduler.batch import index_dtype
+from pyscheduler.scheduler import Schedule, _optimize_shard
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+DEFAULT_LIBRARY = DATA_DIR / 'schedules.bin'
+DEFAULT_JSON = DATA_DIR / 'schedule.json'
+
+# file layout: header, index of INDEX_DTYPE records, then every schedule as unsigned ints of itemsize bytes
+# a schedule of shape (n_rounds, n_courts, players_per_court) starts at offset bytes into the data section
+# version 1 files have no itemsize field and store every schedule as uint8
+MAGIC = b'PYSCHLIB'
+VERSION = 2
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '<u4'), ('n_entries', '<u4')])
+INDEX_DTYPE_V1 = np.dtype([
+    ('n_courts', '<u2'),
+    ('n_rounds', '<u2'),
+    ('n_players', '<u2'),
+    ('players_per_court', '<u2'),
+    ('partner_dupcount', '<i4'),
+    ('opponent_dupcount', '<i4'),
+    ('offset', '<u8')
+])
+INDEX_DTYPE = np.dtype(INDEX_DTYPE_V1.descr + [('itemsize', '<u2')])
+
+
+class ScheduleLibrary:
+    """Memory-mapped store of precomputed optimal schedules
+
+    Usage:
+        lib = ScheduleLibrary(path)
+        sched = lib.get(n_courts=2, n_rounds=5, n_players=9)
+
+    """
+    def __init__(self, path: Union[str, Path] = DEFAULT_LIBRARY):
+        """Instantiate ScheduleLibrary object
+
+        Args:
+            path(str or Path): the library file, default is the packaged library
+
+        Returns:
+            ScheduleLibrary
+
+        """
+        self.path = Path(path)
+        self._mm = np.memmap(self.path, dtype=np.uint8, mode='r')
+        header = self._mm[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header['magic'] != MAGIC:
+            raise ValueError(f'Not a schedule library: {self.path}')
+        if header['version'] not in (1, VERSION):
+            raise ValueError(f'Unsupported schedule library version {header["version"]}: {self.path}')
+        index_dtype = INDEX_DTYPE if header['version'] == VERSION else INDEX_DTYPE_V1
+        index_end = HEADER_DTYPE.itemsize + int(header['n_entries']) * index_dtype.itemsize
+        self.index = self._mm[HEADER_DTYPE.itemsize:index_end].view(index_dtype)
+        self._data = self._mm[index_end:]
+        keys = zip(*(self.index[field].tolist() for field in ('n_courts', 'n_rounds', 'n_players', 'players_per_court')))
+        self._lookup = {key: idx for idx, key in enumerate(keys)}
+
+    def __contains__(self, key: Tuple[int, ...]) -> bool:
+        return self._key(*key) in self._lookup
+
+    def __iter__(self) -> Iterator[Schedule]:
+        return (self._entry(idx) for idx in range(len(self)))
+
+    def __len__(self) -> int:
+        return self.index.shape[0]
+
+    @staticmethod
+    def _key(n_courts: int, n_rounds: int, n_players: int, players_per_court: int = 4) -> Tuple[int, int, int, int]:
+        return int(n_courts), int(n_rounds), int(n_players), int(players_per_court)
+
+    def _entry(self, idx: int) -> Schedule:
+        row = self.index[idx]
+        shape = int(row['n_rounds']), int(row['n_courts']), int(row['players_per_court'])
+        offset = int(row['offset'])
+        itemsize = int(row['itemsize']) if 'itemsize' in row.dtype.names else 1
+        data = self._data[offset:offset + int(np.prod(shape)) * itemsize].view(f'<u{itemsize}')
+        return Schedule(n_players=int(row['n_players']),
+                        players_per_court=int(row['players_per_court']),
+                        schedule=data.reshape(shape),
+                        partner_dupcount=int(row['partner_dupcount']),
+                        opponent_dupcount=int(row['opponent_dupcount']))
+
+    def get(self, n_courts: int, n_rounds: int, n_players: int, players_per_court: int = 4) -> Schedule:
+        """Looks up a schedule without copying it
+
+        Args:
+            n_courts(int): number of courts
+            n_rounds(int): number of rounds
+            n_players(int): number of players
+            players_per_court(int): default 4
+
+        Returns:
+            Schedule or None
+            the schedule attribute is a read-only view into the library file
+
+        """
+        idx = self._lookup.get(self._key(n_courts, n_rounds, n_players, players_per_court))
+        return None if idx is None else self._entry(idx)
+
+    def keys(self) -> List[Tuple[int, int, int, int]]:
+        """The (n_courts, n_rounds, n_players, players_per_court) keys in the library"""
+        return list(self._lookup)
+
+
+def write_library(path: Union[str, Path], schedules: Iterable[Schedule]) -> Path:
+    """Writes schedules to a library file
+
+    Args:
+        path(str or Path): the file to write
+        schedules(Iterable[Schedule]): the schedules, the last one wins for a repeated key
+
+    Returns:
+        Path
+
+    """
+    entries: Dict[Tuple[int, int, int, int], Schedule] = {}
+    for sched in schedules:
+        arr = np.asarray(sched.schedule)
+        if arr.size and arr.min() < 0:
+            raise ValueError(f'Schedule has negative player indexes: {arr.min()}')
+        if sched.n_players > np.iinfo(np.uint16).max:
+            raise ValueError(f'Invalid value for n_players: {sched.n_players}')
+        key = ScheduleLibrary._key(sched.n_courts, sched.n_rounds, sched.n_players, sched.players_per_court)
+        entries[key] = sched
+
+    # each schedule is stored in the smallest dtype that fits its players, aligned to its itemsize
+    index = np.zeros(len(entries), dtype=INDEX_DTYPE)
+    data = []
+    offset = 0
+    for row, (key, sched) in zip(index, sorted(entries.items())):
+        arr = np.asarray(sched.schedule)
+        dtype = index_dtype(max(key[2], int(arr.max(initial=0)) + 1)).newbyteorder('<')
+        offset += -offset % dtype.itemsize
+        row['n_courts'], row['n_rounds'], row['n_players'], row['players_per_court'] = key
+        row['partner_dupcount'] = sched.partner_dupcount
+        row['opponent_dupcount'] = sched.opponent_dupcount
+        row['offset'] = offset
+        row['itemsize'] = dtype.itemsize
+        data.append((offset, arr.astype(dtype).tobytes()))
+        offset += arr.size * dtype.itemsize
+
+    header = np.array([(MAGIC, VERSION, len(entries))], dtype=HEADER_DTYPE)
+    path = Path(path)
+    with path.open('wb') as fh:
+        fh.write(header.tobytes())
+        fh.write(index.tobytes())
+        written = 0
+        for start, chunk in data:
+            fh.write(b'\0' * (start - written))
+            fh.write(chunk)
+            written = start + len(chunk)
+    return path
+
+
+def read_json(path: Union[str, Path] = DEFAULT_JSON) -> List[Schedule]:
+    """Reads schedules from the json format used by schedule.json
+
+    Args:
+        path(str or Path): the json file, default is the packaged schedule.json
+
+    Returns:
+        List[Schedule]
+
+    """
+    with Path(path).open() as fh:
+        items = json.load(fh)
+    schedules = []
+    for item in items:
+        sched = item['schedule']
+        sched = np.array(json.loads(sched) if isinstance(sched, str) else sched)
+        schedules.append(Schedule(n_players=item['n_players'],
+                                  players_per_court=sched.shape[-1],
+                                  schedule=sched,
+                                  partner_dupcount=item['partner_dupcount'],
+                                  opponent_dupcount=item['opponent_dupcount']))
+    return schedules
+
+
+def build_library(json_path: Union[str, Path] = DEFAULT_JSON, path: Union[str, Path] = DEFAULT_LIBRARY) -> Path:
+    """Converts a schedule.json file to a library file
+
+    Args:
+        json_path(str or Path): the json file, default is the packaged schedule.json
+        path(str or Path): the library file to write, default is the packaged library
+
+    Returns:
+        Path
+
+    """
+    return write_library(path, read_json(json_path))
+
+
+def _is_better(new: Schedule, old: Schedule) -> bool:
+    """Whether new has strictly lower (partner_dupcount, opponent_dupcount) than old"""
+    return (new.partner_dupcount, new.opponent_dupcount) < (old.partner_dupcount, old.opponent_dupcount)
+
+
+def merge_library(path: Union[str, Path], schedules: Iterable[Schedule]) -> Tuple[Path, int]:
+    """Merges schedules into a library file, replacing a stored schedule only when the new score is strictly better
+
+    The file is replaced atomically, so readers with the old file mapped are not affected.
+
+    Args:
+        path(str or Path): the library file, created if it does not exist
+        schedules(Iterable[Schedule]): the new schedules
+
+    Returns:
+        tuple of Path, int
+        the library file and the number of schedules added or replaced
+
+    """
+    path = Path(path)
+    entries = {}
+    if path.exists():
+        entries = {ScheduleLibrary._key(s.n_courts, s.n_rounds, s.n_players, s.players_per_court): s 
+                   for s in ScheduleLibrary(path)}
+    changed = 0
+    for sched in schedules:
+        key = ScheduleLibrary._key(sched.n_courts, sched.n_rounds, sched.n_players, sched.players_per_court)
+        if key not in entries or _is_better(sched, entries[key]):
+            entries[key] = sched
+            changed += 1
+    tmp = path.with_name(path.name + '.tmp')
+    write_library(tmp, entries.values())
+    os.replace(tmp, path)
+    return path, changed
+
+
+def _read_checkpoint(checkpoint: Path) -> Dict[Tuple[int, int, int, int], Schedule]:
+    """Reads finished cells from a checkpoint file, ignoring a partially written last line"""
+    done = {}
+    if not checkpoint.exists():
+        return done
+    with checkpoint.open() as fh:
+        for line in fh:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f'Skipping incomplete checkpoint line in {checkpoint}')
+                continue
+            sched = Schedule(n_players=item['n_players'],
+                             players_per_court=item['players_per_court'],
+                             schedule=np.array(item['schedule']),
+                             partner_dupcount=item['partner_dupcount'],
+                             opponent_dupcount=item['opponent_dupcount'])
+            done[ScheduleLibrary._key(item['n_courts'], item['n_rounds'], item['n_players'], item['players_per_court'])] = sched
+    return done
+
+
+def sweep_library(n_players_range: tuple = (9, 26),
+                  n_rounds_range: tuple = (4, 13),
+                  n_courts_range: tuple = (2, 9),
+                  players_per_court: int = 4,
+                  iterations: int = 10000,
+                  strategy: str = 'anneal',
+                  path: Union[str, Path] = DEFAULT_LIBRARY,
+                  checkpoint: Union[str, Path] = None,
+                  workers: int = None,
+                  seed: int = None) -> Tuple[Path, int]:
+    """Optimizes every cell of the parameter grid in parallel and merges the results into a library
+
+    Each finished cell is appended to the checkpoint file, so a crashed sweep
+    picks up where it left off when run again with the same checkpoint.
+
+    Args:
+        n_players_range(tuple): default (9, 26)
+        n_rounds_range(tuple): default (4, 13)
+        n_courts_range(tuple): default (2, 9)
+        players_per_court(int): default 4
+        iterations(int): iterations per cell, default 10000
+        strategy(str): optimize_schedule strategy, default 'anneal'
+        path(str or Path): the library file, default is the packaged library
+        checkpoint(str or Path): the checkpoint file, default is path with a .checkpoint suffix
+        workers(int): number of processes, default None (one per cpu)
+        seed(int): seed for the sweep, each cell gets its own stream, default None
+
+    Returns:
+        tuple of Path, int
+        the library file and the number of schedules added or replaced
+
+    """
+    path = Path(path)
+    checkpoint = Path(checkpoint) if checkpoint else path.with_suffix('.checkpoint')
+    done = _read_checkpoint(checkpoint)
+    entropy = np.random.SeedSequence(seed).entropy
+    params = [{'n_players': n_players, 'n_rounds': n_rounds, 'n_courts': n_courts, 'iterations': iterations,
+               'players_per_court': players_per_court, 'strategy': strategy,
+               'seed': np.random.SeedSequence(entropy, spawn_key=(n_courts, n_rounds, n_players))}
+              for n_players in range(*n_players_range)
+              for n_rounds in range(*n_rounds_range)
+              for n_courts in range(*n_courts_range)
+              if n_players // players_per_court >= n_courts
+              and ScheduleLibrary._key(n_courts, n_rounds, n_players, players_per_court) not in done]
+    logging.info(f'{len(done)} cells already done, {len(params)} cells to run')
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, checkpoint.open('a') as fh:
+        # a crash can leave a partial last line, so start appending on a fresh line
+        if checkpoint.stat().st_size and not checkpoint.read_bytes().endswith(b'\n'):
+            fh.write('\n')
+        futures = {executor.submit(_optimize_shard, p): p for p in params}
+        for future in as_completed(futures):
+            p = futures[future]
+            try:
+                sched = future.result()
+            except ValueError as e:
+                logging.exception(e)
+                continue
+            item = {'n_courts': p['n_courts'], 'n_rounds': p['n_rounds'], 'n_players': p['n_players'], 
+                    'players_per_court': p['players_per_court'], 'partner_dupcount': int(sched.partner_dupcount),
+                    'opponent_dupcount': int(sched.opponent_dupcount), 'schedule': sched.schedule.tolist()}
+            fh.write(json.dumps(item) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+            done[ScheduleLibrary._key(p['n_courts'], p['n_rounds'], p['n_players'], p['players_per_court'])] = sched
+
+    return merge_library(path, done.values())
+
+
+@functools.lru_cache(maxsize=None)
+def default_library() -> ScheduleLibrary:
+    """The packaged library, memory-mapped once per process"""
+    return ScheduleLibrary(DEFAULT_LIBRARY)
@@ -0,0 +1,258 @@
+# pyscheduler/pairs.py
+
+from collections import Counter
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from pyscheduler.scoring import opponent_positions, partner_positions, schedule_pairs, weighted_score
+
+
+class PairCounts:
+    """Partner and opponent counts for every pair of players
+
+    Counts are kept in two symmetric (n_players, n_players) matrices
+    along with running duplicate counts, so adding a court or swapping
+    two players costs O(players_per_court) no matter how big the pool is.
+
+    Usage:
+        pc = PairCounts.from_schedule(sched, n_players=13)
+        d_partner, d_opponent = pc.swap_delta(court_a, 0, court_b, 2)
+        summary = pc.summary()
+
+    """
+    def __init__(self, n_players: int, players_per_court: int = 4):
+        """Instantiate PairCounts object
+
+        Args:
+            n_players(int): the total number of players in the pool
+            players_per_court(int): default 4
+
+        Returns:
+            PairCounts
+
+        """
+        self.n_players = n_players
+        self.players_per_court = players_per_court
+        self.partners = np.zeros((n_players, n_players), dtype=np.int64)
+        self.opponents = np.zeros((n_players, n_players), dtype=np.int64)
+        self.partner_dupcount = 0
+        self.opponent_dupcount = 0
+        self._positions = ((self.partners, partner_positions(players_per_court).tolist(), 0),
+                           (self.opponents, opponent_positions(players_per_court).tolist(), 1))
+
+    @classmethod
+    def from_schedule(cls, sched: np.ndarray, n_players: int = None, players_per_court: int = 4) -> 'PairCounts':
+        """Creates PairCounts from a single schedule
+
+        Args:
+            sched(np.ndarray): the schedule, any shape that reshapes to (n_games, players_per_court)
+            n_players(int): the total number of players in the pool, default max player + 1
+            players_per_court(int): default 4
+
+        Returns:
+            PairCounts
+
+        """
+        sched = np.asarray(sched)
+        n_players = n_players if n_players else int(sched.max()) + 1
+        pc = cls(n_players, players_per_court)
+        pc.add_pairs(schedule_pairs(sched, 'partner', players_per_court), 'partner')
+        pc.add_pairs(schedule_pairs(sched, 'opponent', players_per_court), 'opponent')
+        return pc
+
+    def copy(self) -> 'PairCounts':
+        """Creates an independent copy"""
+        pc = PairCounts(self.n_players, self.players_per_court)
+        pc.partners[:] = self.partners
+        pc.opponents[:] = self.opponents
+        pc.partner_dupcount = self.partner_dupcount
+        pc.opponent_dupcount = self.opponent_dupcount
+        return pc
+
+    def _matrix(self, kind: str) -> np.ndarray:
+        if kind == 'partner':
+            return self.partners
+        if kind == 'opponent':
+            return self.opponents
+        raise ValueError(f'Invalid value for kind: {kind}')
+
+    def _recount(self):
+        """Recalculates the duplicate counts from the matrices"""
+        self.partner_dupcount = int(np.maximum(self.partners - 1, 0).sum()) // 2
+        self.opponent_dupcount = int(np.maximum(self.opponents - 1, 0).sum()) // 2
+
+    def add_pairs(self, pairs: np.ndarray, kind: str, step: int = 1):
+        """Adds (or removes, with step=-1) an array of pairs in one vectorized update
+
+        Args:
+            pairs(np.ndarray): array of shape (n_pairs, 2)
+            kind(str): 'partner' or 'opponent'
+            step(int): default 1
+
+        Returns:
+            None
+
+        """
+        matrix = self._matrix(kind)
+        pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+        np.add.at(matrix, (pairs[:, 0], pairs[:, 1]), step)
+        np.add.at(matrix, (pairs[:, 1], pairs[:, 0]), step)
+        self._recount()
+
+    def _update(self, court: Sequence[int], step: int):
+        # adding a pair that has been seen adds a dup, removing a repeated pair removes one
+        dups = [0, 0]
+        for matrix, positions, which in self._positions:
+            for i, j in positions:
+                a, b = court[i], court[j]
+                c = matrix[a, b]
+                if step > 0 and c >= 1:
+                    dups[which] += 1
+                elif step < 0 and c >= 2:
+                    dups[which] -= 1
+                matrix[a, b] = c + step
+                matrix[b, a] = c + step
+        self.partner_dupcount += dups[0]
+        self.opponent_dupcount += dups[1]
+
+    def add_court(self, court: Sequence[int]):
+        """Adds the pairs from one court assignment
+
+        Args:
+            court(Sequence[int]): the players on the court, team 1 then team 2
+
+        Returns:
+            None
+
+        """
+        self._update(court, 1)
+
+    def remove_court(self, court: Sequence[int]):
+        """Removes the pairs from one court assignment
+
+        Args:
+            court(Sequence[int]): the players on the court, team 1 then team 2
+
+        Returns:
+            None
+
+        """
+        self._update(court, -1)
+
+    def swap(self, court_a: list, i: int, court_b: list = None, j: int = None, player: int = None) -> Tuple[int, int]:
+        """Swaps court_a[i] with court_b[j], or with a player on a bye, updating the courts in place
+
+        Pass the same list as court_a and court_b to swap players across teams on one court.
+
+        Args:
+            court_a(list): the players on the first court
+            i(int): the position on the first court
+            court_b(list): the players on the second court, default None
+            j(int): the position on the second court, default None
+            player(int): the player on a bye to swap in when court_b is None
+
+        Returns:
+            tuple of int, int
+            change in partner dupcount, change in opponent dupcount
+
+        """
+        before = self.partner_dupcount, self.opponent_dupcount
+        courts = [court_a] if court_b is None or court_b is court_a else [court_a, court_b]
+        for court in courts:
+            self._update(court, -1)
+        if court_b is None:
+            court_a[i] = player
+        else:
+            court_a[i], court_b[j] = court_b[j], court_a[i]
+        for court in courts:
+            self._update(court, 1)
+        return self.partner_dupcount - before[0], self.opponent_dupcount - before[1]
+
+    def swap_delta(self, court_a: list, i: int, court_b: list = None, j: int = None, player: int = None) -> Tuple[int, int]:
+        """Calculates the change in dupcounts from a swap without making it
+
+        Args:
+            court_a(list): the players on the first court
+            i(int): the position on the first court
+            court_b(list): the players on the second court, default None
+            j(int): the position on the second court, default None
+            player(int): the player on a bye to swap in when court_b is None
+
+        Returns:
+            tuple of int, int
+            change in partner dupcount, change in opponent dupcount
+
+        """
+        outgoing = court_a[i]
+        delta = self.swap(court_a, i, court_b, j, player)
+        self.swap(court_a, i, court_b, j, outgoing)
+        return delta
+
+    def cost(self, partner_weight: float = 1.0) -> float:
+        """Weighted sum of partner and opponent dupcounts"""
+        return partner_weight * self.partner_dupcount + self.opponent_dupcount
+
+    def histogram(self, kind: str = 'partner') -> np.ndarray:
+        """Counts how many pairs occur exactly k times (index 0 is always 0)
+
+        Args:
+            kind(str): 'partner' or 'opponent', default 'partner'
+
+        Returns:
+            np.ndarray
+
+        """
+        matrix = self._matrix(kind)
+        hist = np.bincount(matrix[np.triu_indices(self.n_players, 1)])
+        hist[0] = 0
+        return hist
+
+    def weighted_dupcount(self, kind: str = 'partner', weights: np.ndarray = None) -> float:
+        """Applies weights to the pair histogram, see scoring.weighted_score
+
+        Args:
+            kind(str): 'partner' or 'opponent', default 'partner'
+            weights(np.ndarray): the weights to apply to duplicate counts
+
+        Returns:
+            float
+
+        """
+        return weighted_score(self.histogram(kind)[None, :], weights)[0]
+
+    def player_dupcounts(self, kind: str = 'partner') -> np.ndarray:
+        """Counts, for each player, the other players they are paired with more than once
+
+        Args:
+            kind(str): 'partner' or 'opponent', default 'partner'
+
+        Returns:
+            np.ndarray of shape (n_players,)
+
+        """
+        return np.count_nonzero(self._matrix(kind) > 1, axis=1)
+
+    def pair_counter(self, kind: str = 'partner') -> Counter:
+        """Converts pair counts to a Counter keyed by (player, player) with player < player"""
+        matrix = self._matrix(kind)
+        rows, cols = np.nonzero(np.triu(matrix, 1))
+        return Counter({(int(a), int(b)): int(matrix[a, b]) for a, b in zip(rows, cols)})
+
+    def summary(self) -> Dict[str, np.ndarray]:
+        """Summarizes duplicates without rebuilding pairs
+
+        Returns:
+            dict
+            keys are partner_dupcount, opponent_dupcount, partner_histogram, opponent_histogram,
+            partner_player_dupcounts, opponent_player_dupcounts
+
+        """
+        return {
+            'partner_dupcount': self.partner_dupcount,
+            'opponent_dupcount': self.opponent_dupcount,
+            'partner_histogram': self.histogram('partner'),
+            'opponent_histogram': self.histogram('opponent'),
+            'partner_player_dupcounts': self.player_dupcounts('partner'),
+            'opponent_player_dupcounts': self.player_dupcounts('opponent')
+        }
@@ -1,12 +1,26 @@
 # pyscheduler/scheduler.py
 
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import cached_property
 import logging
-from typing import List
+import time
+from typing import Callable, Iterator, List, Sequence, Tuple, Union
 
 import numpy as np
 
+from pyscheduler import bounds, byes, kernels, scoring, selection
+from pyscheduler.anneal import anneal_schedule
+from pyscheduler.batch import ScheduleBatch, index_dtype
+from pyscheduler.cache import ScheduleCache, cache_key
+from pyscheduler.greedy import greedy_schedule
+from pyscheduler.pairs import PairCounts
+from pyscheduler.stats import SearchStats, timer
+
+
+# the share of a reoptimize time budget held back for work after the search stops
+REOPTIMIZE_MARGIN = 0.05
+
 
 @dataclass
 class Schedule:
@@ -18,6 +32,8 @@ class Schedule:
     partner_dupcount: float = None
     opponent_dupcount: float = None
     player_names: List[str] = None
+    iterations_used: int = None
+    stats: SearchStats = None
     
     """
     n_players: int = None
@@ -26,6 +42,8 @@ class Schedule:
     partner_dupcount: float = None
     opponent_dupcount: float = None
     player_names: List[str] = None
+    iterations_used: int = None
+    stats: SearchStats = None
     
     @property
     def n_rounds(self):
@@ -33,11 +51,12 @@ class Schedule:
 
     @property
     def n_courts(self):
-        return self.schedule.shape[1] // self.players_per_court
+        return self.schedule.reshape(self.n_rounds, -1).shape[1] // self.players_per_court
 
-    @property
+    @cached_property
     def player_count(self):
-        return np.unique(self.schedule.flatten()).shape[0]
+        # computed once, schedules are not changed in place after they are scored
+        return np.unique(self.schedule).shape[0]
 
     def to_dict(self, convert_numpy=True):
         """Converts object to three-keyed dict: schedule, partner_dupcount, opponent_dupcount"""
@@ -69,7 +88,10 @@ class Scheduler:
                  n_players: int = None,
                  player_names: List[str] = None, 
                  players_per_court: int = 4, 
-                 iterations: int = 500):
+                 iterations: int = 500,
+                 seed: int = None,
+                 cache: ScheduleCache = None,
+                 time_budget_ms: float = None):
         """Instantiate Scheduler object
         
         Args:
@@ -78,6 +100,9 @@ class Scheduler:
             n_courts(int): number of courts to use
             players_per_court(int): default 4
             iterations(int): the number of schedules to draw optimal from
+            seed(int): default seed for creating and optimizing schedules, default None
+            cache(ScheduleCache): where optimize_schedule looks up and stores results, default None
+            time_budget_ms(float): default time limit for optimize_schedule, default None
 
         Returns:
             Scheduler
@@ -99,6 +124,9 @@ class Scheduler:
         self.n_rounds = n_rounds
         self.players_per_court = players_per_court
         self.iterations = iterations
+        self.seed = seed
+        self.cache = cache
+        self.time_budget_ms = time_budget_ms
         self.optimal_schedule = None
 
     @property
@@ -112,7 +140,9 @@ class Scheduler:
                          n_rounds: int = None, 
                          n_courts: int = None, 
                          iterations: int = None, 
-                         players_per_court: int = None) -> np.ndarray:
+                         players_per_court: int = None,
+                         seed: int = None,
+                         stats: SearchStats = None) -> np.ndarray:
         """Creates array of schedules
         
         Args:
@@ -121,6 +151,8 @@ class Scheduler:
             n_courts(int): number of courts to use
             iterations(int): the number of schedules to draw optimal from
             players_per_court(int): default 4
+            seed(int): int, SeedSequence or np.random.Generator, default None
+            stats(SearchStats): times the byes and generation stages, default None
         
         Returns:
             np.ndarray
@@ -132,22 +164,101 @@ class Scheduler:
         n_rounds = n_rounds if n_rounds else self.n_rounds
         players_per_court = players_per_court if players_per_court else self.players_per_court
         iterations = iterations if iterations else self.iterations
+        rng = np.random.default_rng(seed if seed is not None else self.seed)
         
-        # create 2d aray byeschedule (iterations * n_rounds, n_courts * players_per_court)
-        # then shuffle each row inplace using shuffle_along
+        # every schedule gets its own fair bye assignment so byes are searched along with pairings
+        # the players left on court are gathered into 2d array byeschedule (iterations * n_rounds, n_courts * players_per_court)
+        # then shuffle every row inplace at once using shuffle_along
         # after shuffle, can reshape to 3d array (iterations, n_rounds, n_courts * players_per_court)
-        sched = np.tile(np.arange(n_players, dtype=np.uint8), n_rounds).reshape(n_rounds, n_players)
-        byes = self.calculate_byes(n_players, n_courts, n_rounds, players_per_court)
-        byesched = np.tile(np.array([np.setdiff1d(sched[i], byes[i]) for i in range(n_rounds)]), (iterations, 1, 1)).reshape(iterations * n_rounds, players_per_court * n_courts)
-        self.shuffle_along(byesched)
+        with timer(stats, 'byes'):
+            n_byes = byes.byes_per_round(n_players, n_courts, players_per_court)
+            _, players = byes.random_lineups(n_players, n_rounds, n_byes, iterations, rng)
+        byesched = players.reshape(iterations * n_rounds, players_per_court * n_courts)
+        with timer(stats, 'generation'):
+            self.shuffle_along(byesched, rng)
         return byesched.reshape(iterations, n_rounds, n_courts * players_per_court)
 
+    def iter_schedules(self, 
+                       n_players: int = None, 
+                       n_rounds: int = None, 
+                       n_courts: int = None, 
+                       iterations: int = None, 
+                       players_per_court: int = None,
+                       chunk_size: int = 1000,
+                       seed: int = None,
+                       stats: SearchStats = None) -> Iterator[np.ndarray]:
+        """Creates schedules in blocks so the whole array never has to be in memory
+        
+        Args:
+            n_players(int): the total number of players in the pool
+            n_rounds(int): number of play rounds
+            n_courts(int): number of courts to use
+            iterations(int): the total number of schedules to create
+            players_per_court(int): default 4
+            chunk_size(int): the maximum number of schedules per block, default 1000
+            seed(int): int, SeedSequence or np.random.Generator, default None
+            stats(SearchStats): times the byes and generation stages, default None
+
+        Yields:
+            np.ndarray of shape (<= chunk_size, n_rounds, n_courts * players_per_court)
+
+        """
+        iterations = iterations if iterations else self.iterations
+        chunk_size = chunk_size if chunk_size else iterations
+        rng = np.random.default_rng(seed if seed is not None else self.seed)
+        for start in range(0, iterations, chunk_size):
+            size = min(chunk_size, iterations - start)
+            yield self.create_schedules(n_players, n_rounds, n_courts, size, players_per_court, seed=rng, stats=stats)
+
+    def iter_greedy_schedules(self, 
+                              n_players: int = None, 
+                              n_rounds: int = None, 
+                              n_courts: int = None, 
+                              iterations: int = None, 
+                              players_per_court: int = None,
+                              chunk_size: int = 1000,
+                              seed: int = None,
+                              stats: SearchStats = None) -> Iterator[np.ndarray]:
+        """Builds schedules round by round with randomized greedy matching, see greedy.greedy_schedule
+        
+        Args:
+            n_players(int): the total number of players in the pool
+            n_rounds(int): number of play rounds
+            n_courts(int): number of courts to use
+            iterations(int): the total number of schedules to create
+            players_per_court(int): default 4
+            chunk_size(int): the maximum number of schedules per block, default 1000
+            seed(int): int, SeedSequence or np.random.Generator, default None
+            stats(SearchStats): times the byes and generation stages, default None
+
+        Yields:
+            np.ndarray of shape (<= chunk_size, n_rounds, n_courts * players_per_court)
+
+        """
+        n_players = n_players if n_players else self.n_players
+        n_courts = n_courts if n_courts else self.n_courts
+        n_rounds = n_rounds if n_rounds else self.n_rounds
+        players_per_court = players_per_court if players_per_court else self.players_per_court
+        iterations = iterations if iterations else self.iterations
+        chunk_size = chunk_size if chunk_size else iterations
+        rng = np.random.default_rng(seed if seed is not None else self.seed)
+        n_byes = byes.byes_per_round(n_players, n_courts, players_per_court)
+        for start in range(0, iterations, chunk_size):
+            size = min(chunk_size, iterations - start)
+            scheds = np.empty((size, n_rounds, n_courts * players_per_court), dtype=index_dtype(n_players))
+            for i in range(size):
+                with timer(stats, 'byes'):
+                    bye_players = byes.fair_byes(n_players, n_rounds, n_byes, rng.permutation(n_players))
+                with timer(stats, 'generation'):
+                    scheds[i] = greedy_schedule(n_players, n_rounds, n_courts, players_per_court, seed=rng, byes=bye_players)
+            yield scheds
+
     def calculate_byes(self, 
                        n_players: int = None, 
                        n_courts: int = None, 
                        n_rounds: int = None, 
                        players_per_court: int = None) -> np.ndarray:
-        """Calculates the byes
+        """Calculates the byes, see byes.fair_byes
         
         Args:
             n_players (int): the total number of players
@@ -165,12 +276,9 @@ class Scheduler:
         n_rounds = n_rounds if n_rounds else self.n_rounds
         players_per_court = players_per_court if players_per_court else self.players_per_court
 
-        # determine the number of needed byes
-        # in large field, could need more than 1 bye per player
-        # so create large list of byes and cut it down accordingly
-        byes_per_round = n_players % 4 if n_players < (n_courts + 1) * players_per_court else n_players - (n_courts * players_per_court)
-        byes_needed = byes_per_round * n_rounds
-        return np.tile(np.arange(n_players, dtype=np.uint8), 5)[0:byes_needed].reshape(n_rounds, byes_per_round)
+        # byes cycle through the players in order, so counts stay balanced however many rounds there are
+        n_byes = byes.byes_per_round(n_players, n_courts, players_per_court)
+        return byes.fair_byes(n_players, n_rounds, n_byes).astype(index_dtype(n_players))
 
     def cartesian(self, arrays: np.ndarray, out=None) -> np.ndarray:
         """Generate a cartesian product of input arrays.
@@ -209,15 +317,19 @@ class Scheduler:
             int
 
         """
-        if dup_type == 'partner':
-            expected_shape = tuple([(self.n_courts * self.n_rounds * self.players_per_court) // 2, 2])
-        elif dup_type == 'opponent':
-            expected_shape = tuple([(self.n_courts * self.n_rounds * self.players_per_court), 2])
-        sched = sched.reshape(*expected_shape)
-        c = Counter(tuple(sorted(i)) for i in sched)
-        dupes = sum([(k - 1) * v for k, v in Counter(c.values()).items()]) 
+        if dup_type not in ('partner', 'opponent'):
+            raise ValueError(f'Invalid value for dup_type: {dup_type}')
+
+        # a whole schedule has its pairs gathered, anything else is already an array of pairs
+        sched = np.asarray(sched)
+        if sched.size == self.n_courts * self.n_rounds * self.players_per_court:
+            sched = scoring.schedule_pairs(sched, dup_type, self.players_per_court)
+        sched = sched.reshape(-1, 2)
+        pc = PairCounts(max(self.n_players, int(sched.max(initial=0)) + 1), self.players_per_court)
+        pc.add_pairs(sched, 'partner')
+        dupes = pc.partner_dupcount
         if return_data:
-            return dupes, c
+            return dupes, pc.pair_counter('partner')
         return dupes
 
     def dupcount(self, sched: np.ndarray, return_data: bool = False) -> int:
@@ -232,16 +344,68 @@ class Scheduler:
 
         """
         # now count duplicate partners
-        # partners is 3d array of (iterations, n_rounds * n_courts * players_per_court, players_per_court / 2)
-        # if 5 iterations, 5 rounds, 3 courts, 4 players per court
-        # shape should be 5, 60, 2
-        partners = sched.reshape(sched.shape[0] * sched.shape[1] // 2, 2)
-        sortidx = np.argsort(partners, axis=1)
-        dupcount = partners.shape[0] - np.unique(partners[np.arange(partners.shape[0], dtype=np.uint8)[:,None], sortidx], axis=0).shape[0]
+        # partners is 2d array of (n_rounds * n_courts * partner pairs per court, 2)
+        # if 5 rounds, 3 courts, 4 players per court, shape should be 30, 2
+        partners = scoring.schedule_pairs(sched, 'partner', self.players_per_court)
+        dupcount = partners.shape[0] - np.unique(np.sort(partners, axis=1), axis=0).shape[0]
         if return_data:
             return dupcount, partners
         return dupcount
 
+    def batch_dupcount(self, scheds: np.ndarray, n_players: int = None, players_per_court: int = None) -> np.ndarray:
+        """Counts duplicate partners for a batch of schedules
+
+        Args:
+            scheds(np.ndarray): array of shape (iterations, n_rounds, n_courts * players_per_court)
+            n_players(int): the total number of players in the pool
+            players_per_court(int): default 4
+
+        Returns:
+            np.ndarray
+
+        """
+        n_players = n_players if n_players else self.n_players
+        players_per_court = players_per_court if players_per_court else self.players_per_court
+        return scoring.batch_dupcount(scheds, n_players, players_per_court)
+
+    def batch_dupcount_weighted(self, 
+                                scheds: np.ndarray, 
+                                weights: np.ndarray = None, 
+                                n_players: int = None, 
+                                players_per_court: int = None) -> np.ndarray:
+        """Counts weighted duplicate partners for a batch of schedules
+
+        Args:
+            scheds(np.ndarray): array of shape (iterations, n_rounds, n_courts * players_per_court)
+            weights(np.ndarray): the weights to apply to duplicate counts
+            n_players(int): the total number of players in the pool
+            players_per_court(int): default 4
+
+        Returns:
+            np.ndarray
+
+        """
+        n_players = n_players if n_players else self.n_players
+        players_per_court = players_per_court if players_per_court else self.players_per_court
+        codes = scoring.pair_codes(scheds, 'partner', n_players, players_per_court)
+        return scoring.weighted_score(scoring.multiplicity_histogram(codes), weights)
+
+    def batch_oppdupcount(self, scheds: np.ndarray, n_players: int = None, players_per_court: int = None) -> np.ndarray:
+        """Counts duplicate opponents for a batch of schedules
+
+        Args:
+            scheds(np.ndarray): array of shape (iterations, n_rounds, n_courts * players_per_court)
+            n_players(int): the total number of players in the pool
+            players_per_court(int): default 4
+
+        Returns:
+            np.ndarray
+
+        """
+        n_players = n_players if n_players else self.n_players
+        players_per_court = players_per_court if players_per_court else self.players_per_court
+        return scoring.batch_oppdupcount(scheds, n_players, players_per_court)
+
     def dupcount_weighted(self, sched: np.ndarray, weights: np.ndarray = None) -> int:
         """Counts duplicate partners in a schedule
 
@@ -253,14 +417,8 @@ class Scheduler:
             int
 
         """
-        c = Counter([tuple(sorted(i)) for i in sched.reshape(sched.shape[0] * sched.shape[1] // 2, 2)])
-        n = max(c.values()) + 1
-        dupecount = np.zeros(n)
-        if weights is None:
-            weights = np.ones(n) + np.arange(0, .1 * n, .1)
-        for k, v in Counter(c.values()).items():
-            dupecount[k] = v 
-        return np.sum(dupecount * weights)
+        n_players = max(self.n_players, int(sched.max()) + 1)
+        return PairCounts.from_schedule(sched, n_players, self.players_per_court).weighted_dupcount('partner', weights)
 
     def oppdupcount(self, sched: np.ndarray, return_data: bool = False) -> int:
         """Calculates opponent dupcount for single schedule (with 1+ rounds)
@@ -273,17 +431,11 @@ class Scheduler:
             np.ndarray
 
         """
-        ppc = self.players_per_court
-        
-        # step 1: have to convert schedule into pairs of player-opponent
-        # the total number should be n_rounds * n_courts * players_per_court
-        opponents = np.array([self.cartesian(i) for i in 
-                              sched.reshape((sched.shape[0] * sched.shape[1]) // ppc, ppc // 2, ppc // 2)])
-
-        # step 2: need to reshape and sort the 2-element arrays because we are going to count tuples
-        expected_shape = self.n_rounds * self.n_courts, ppc, ppc // 2
-        assert opponents.shape == expected_shape, f'Expected {expected_shape}, got {opponents.shape}'
-        opponents = opponents.reshape(self.n_rounds * self.n_courts * ppc, ppc // 2)
+        # step 1: gather every player-opponent pair with the cached template for this configuration
+        # the total number should be n_rounds * n_courts * (players_per_court / 2) ** 2
+        opponents = scoring.schedule_pairs(sched, 'opponent', self.players_per_court)
+
+        # step 2: need to sort the 2-element arrays because we are going to count tuples
         opponents = np.sort(opponents, axis=-1)
 
         # step 3: return the dupcount and optional data 
@@ -303,25 +455,8 @@ class Scheduler:
             int
 
         """
-        ppc = self.players_per_court
-        
-        # step 1: have to convert schedule into pairs of player-opponent
-        # the total number should be n_rounds * n_courts * players_per_court
-        opponents = np.array([self.cartesian(i) for i in 
-                              sched.reshape(sched.shape[0] * sched.shape[1] // ppc, ppc // 2, ppc // 2)])
-
-        # step 2: need to reshape and sort the 2-element arrays because we are going to count tuples
-        opponents = np.sort(opponents.reshape(self.n_rounds * self.n_courts * ppc, 2), axis=-1)
-
-        # step 3: weighted counts
-        c = Counter([tuple(i) for i in sched])
-        n = max(c.values()) + 1
-        dupecount = np.zeros(n)
-        if weights is None:
-            weights = np.ones(n) + np.arange(0, .1 * n, .1)
-        for k, v in Counter(c.values()).items():
-            dupecount[k] = v 
-        return n
+        n_players = max(self.n_players, int(sched.max()) + 1)
+        return PairCounts.from_schedule(sched, n_players, self.players_per_court).weighted_dupcount('opponent', weights)
     
     def optimize_schedule(
             self,
@@ -330,7 +465,16 @@ class Scheduler:
             n_courts: int = None, 
             iterations: int = None, 
             players_per_court: int = None,
-            scoring_function: str = 'naive') -> Schedule:
+            scoring_function: str = 'naive',
+            strategy: str = 'sample',
+            seed: int = None,
+            time_budget_ms: float = None,
+            workers: int = None,
+            chunk_size: int = 1000,
+            target: Union[float, Tuple[float, float]] = None,
+            initial: Union[str, np.ndarray] = 'random',
+            progress: Callable[[dict], None] = None,
+            collect_stats: bool = False) -> Schedule:
         """Optimizes schedule for given parameters
         
         Args:
@@ -338,11 +482,33 @@ class Scheduler:
             n_rounds(int): number of rounds of play
             n_courts(int): number of courts to use
             iterations(int): number of iterations to optimize on, default 10000
+                             for the anneal strategy, this is the number of moves to try
             players_per_court(int): default 4
-            scoring_function(str): specifies how to score optimality of schedule, default 'naive'
+            scoring_function(str): 'naive' or 'weighted' partner scoring, default 'naive'
+                                   the anneal strategy only supports 'naive'
+            strategy(str): 'sample' draws the best of iterations random schedules, 
+                           'greedy' draws the best of iterations schedules built round by round,
+                           'anneal' improves one schedule with simulated annealing, default 'sample'
+            seed(int): seed for reproducible results, default None
+            time_budget_ms(float): time limit in milliseconds, default None
+                                   the sample and greedy strategies score batches until the deadline instead of
+                                   stopping after iterations, the anneal strategy stops at whichever comes first
+            workers(int): split iterations into seeded shards run in this many processes, default None
+            chunk_size(int): number of schedules to generate and score at a time, default 1000
+            target(float or tuple): stop once the best schedule scores at most this partner dupcount,
+                                    or (partner, opponent) dupcount, default None
+                                    with naive scoring the search also stops at the lower bounds
+            initial(str or np.ndarray): the schedule the anneal strategy starts from,
+                                        'random', 'greedy' or a schedule, default 'random'
+            progress(Callable): called as the search runs with a dict of iterations_done, iterations,
+                                and the best partner_dupcount and opponent_dupcount so far, default None
+                                iterations is None when sampling under a time budget
+            collect_stats(bool): time each stage and record counts, block sizes and
+                                 the best score trajectory in Schedule.stats, default False
 
         Returns:
             Schedule
+            iterations_used is the number of schedules or moves tried before stopping
 
         """    
         # process function arguments
@@ -351,34 +517,442 @@ class Scheduler:
         n_courts = n_courts if n_courts else self.n_courts
         n_rounds = n_rounds if n_rounds else self.n_rounds
         players_per_court = players_per_court if players_per_court else self.players_per_court
+        seed = seed if seed is not None else self.seed
+        time_budget_ms = time_budget_ms if time_budget_ms is not None else self.time_budget_ms
+        if scoring_function not in ('naive', 'weighted'):
+            raise ValueError(f'Invalid value for scoring_function: {scoring_function}')
+        # the swap moves are scored on naive dupcounts
+        if strategy == 'anneal' and scoring_function != 'naive':
+            raise ValueError(f'Invalid value for scoring_function: {scoring_function}, the anneal strategy only supports naive')
+
+        # results are cached when the canonical key determines them
+        # a target, time budget, starting schedule or spawned seed makes the result depend on more than the key
+        # stats describe one run, so a run that collects them always optimizes
+        key = None
+        if (self.cache is not None and target is None and time_budget_ms is None and isinstance(initial, str)
+                and not collect_stats
+                and (seed is None or isinstance(seed, (int, np.integer)))):
+            key = cache_key(n_players, n_courts, n_rounds, players_per_court, strategy, seed, scoring_function, iterations,
+                            chunk_size, workers, initial)
+
+        def optimize():
+            return self._optimize(n_players, n_rounds, n_courts, iterations, players_per_court, scoring_function,
+                                  strategy, seed, time_budget_ms, workers, chunk_size, target, initial, progress,
+                                  SearchStats() if collect_stats else None)
+
+        # concurrent misses for the same key wait on one optimization
+        if key is not None:
+            return self.cache.get_or_compute(key, optimize)
+        return optimize()
+
+    def _optimize(self, n_players, n_rounds, n_courts, iterations, players_per_court, scoring_function,
+                  strategy, seed, time_budget_ms, workers, chunk_size, target, initial, progress,
+                  stats: SearchStats = None) -> Schedule:
+        """Runs optimize_schedule once its arguments are resolved"""
+        # each worker runs an independently seeded shard and returns only its best schedule
+        # ties go to the lowest shard so the winner does not depend on completion order
+        if workers and workers > 1:
+            shards = [iterations // workers + (i < iterations % workers) for i in range(workers)]
+            params = [{'n_players': n_players, 'n_rounds': n_rounds, 'n_courts': n_courts, 'iterations': shard,
+                       'players_per_court': players_per_court, 'scoring_function': scoring_function,
+                       'strategy': strategy, 'time_budget_ms': time_budget_ms, 'chunk_size': chunk_size,
+                       'target': target, 'initial': initial, 'seed': shard_seed, 'collect_stats': stats is not None}
+                      for shard, shard_seed in zip(shards, self._seed_sequence(seed).spawn(workers)) if shard]
+            # progress is reported as each shard finishes
+            results = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for sched in executor.map(_optimize_shard, params):
+                    results.append(sched)
+                    best = min(results, key=lambda sched: (sched.partner_dupcount, sched.opponent_dupcount))
+                    if progress is not None:
+                        progress(_progress(sum(sched.iterations_used for sched in results), iterations,
+                                           best.partner_dupcount, best.opponent_dupcount))
+            best.iterations_used = sum(sched.iterations_used for sched in results)
+            if stats is not None:
+                # the trajectory is the winning shard's, timings are summed over the shards
+                stats.trajectory = best.stats.trajectory
+                for sched in results:
+                    stats.merge(sched.stats)
+                best.stats = stats.finish()
+            return best
+
+        # local search starts from one schedule and improves it with swap moves
+        if strategy == 'anneal':
+            start_seed, move_seed = self._seed_sequence(seed).spawn(2)
+            if isinstance(initial, np.ndarray):
+                start = initial.reshape(n_rounds, n_courts * players_per_court)
+            elif initial == 'greedy':
+                start = next(self.iter_greedy_schedules(n_players, n_rounds, n_courts, 1, players_per_court,
+                                                        seed=start_seed, stats=stats))[0]
+            elif initial == 'random':
+                start = self.create_schedules(n_players, n_rounds, n_courts, 1, players_per_court,
+                                              seed=start_seed, stats=stats)[0]
+            else:
+                raise ValueError(f'Invalid value for initial: {initial}')
+
+            # the best score trajectory comes from the progress reports
+            report = progress
+            if stats is not None:
+                def report(p):
+                    stats.add_best(p['iterations_done'], p['partner_dupcount'], p['opponent_dupcount'])
+                    if progress is not None:
+                        progress(p)
+
+            with timer(stats, 'local_search'):
+                optimal, partner_dupcount, opponent_dupcount, moves = anneal_schedule(
+                    start, n_players, players_per_court, iterations=iterations, time_budget_ms=time_budget_ms,
+                    seed=move_seed, target=self._targets(n_players, n_rounds, n_courts, players_per_court, 'naive', target),
+                    progress=report)
+            if stats is not None:
+                stats.add_best(moves, partner_dupcount, opponent_dupcount)
+                stats.finish()
+            return Schedule(n_players=n_players,
+                            players_per_court=players_per_court,
+                            schedule=optimal,
+                            partner_dupcount=np.int64(partner_dupcount),
+                            opponent_dupcount=np.int64(opponent_dupcount),
+                            iterations_used=moves,
+                            stats=stats)
+
+        if strategy not in ('sample', 'greedy'):
+            raise ValueError(f'Invalid value for strategy: {strategy}')
+
+        return self._sample(n_players, n_rounds, n_courts, iterations, players_per_court,
+                            scoring_function, seed, chunk_size, top_k=1, target=target, strategy=strategy,
+                            progress=progress, time_budget_ms=time_budget_ms, stats=stats)[0]
+
+    def top_schedules(
+            self,
+            k: int = 10,
+            n_players: int = None,
+            n_rounds: int = None,
+            n_courts: int = None,
+            iterations: int = None,
+            players_per_court: int = None,
+            scoring_function: str = 'naive',
+            objective: str = 'lexicographic',
+            partner_weight: float = 10.0,
+            strategy: str = 'sample',
+            seed: int = None,
+            chunk_size: int = 1000,
+            as_batch: bool = False) -> Union[List[Schedule], ScheduleBatch]:
+        """Samples random schedules and keeps the k best
+
+        Args:
+            k(int): the number of schedules to return, default 10
+            n_players(int): total number of players in pool
+            n_rounds(int): number of rounds of play
+            n_courts(int): number of courts to use
+            iterations(int): number of schedules to sample
+            players_per_court(int): default 4
+            scoring_function(str): 'naive' or 'weighted' partner scoring, default 'naive'
+            objective(str): 'lexicographic' minimizes partners then opponents,
+                            'weighted' minimizes partner_weight * partners + opponents, default 'lexicographic'
+            partner_weight(float): cost of a partner duplicate relative to an opponent duplicate, default 10
+            strategy(str): 'sample' for random schedules or 'greedy' for schedules built round by round, default 'sample'
+            seed(int): seed for reproducible results, default None
+            chunk_size(int): number of schedules to generate and score at a time, default 1000
+            as_batch(bool): return one ScheduleBatch instead of a list, default False
 
-        # get initial schedule - setdiff1d will remove shuffle so do shuffle later
-        # sched is shape (n_rounds, n_players)
-        scheds = self.create_schedules(n_players, n_rounds, n_courts, iterations, players_per_court)
-        print(scheds.dtype)
+        Returns:
+            List[Schedule] or ScheduleBatch
+            sorted from best to worst
+
+        """
+        if objective not in selection.OBJECTIVES:
+            raise ValueError(f'Invalid value for objective: {objective}')
+        batch = self._sample(n_players or self.n_players, n_rounds or self.n_rounds, n_courts or self.n_courts,
+                             iterations or self.iterations, players_per_court or self.players_per_court,
+                             scoring_function, seed if seed is not None else self.seed, chunk_size,
+                             top_k=k, objective=objective, partner_weight=partner_weight, strategy=strategy)
+        return batch if as_batch else batch.to_schedules()
+
+    def pareto_schedules(
+            self,
+            n_players: int = None,
+            n_rounds: int = None,
+            n_courts: int = None,
+            iterations: int = None,
+            players_per_court: int = None,
+            scoring_function: str = 'naive',
+            strategy: str = 'sample',
+            seed: int = None,
+            chunk_size: int = 1000,
+            as_batch: bool = False) -> Union[List[Schedule], ScheduleBatch]:
+        """Samples random schedules and keeps the Pareto front of partner and opponent dupcounts
+
+        No schedule on the front has both more partner duplicates and more
+        opponent duplicates than another, so organizers can trade one for the other.
+
+        Args:
+            n_players(int): total number of players in pool
+            n_rounds(int): number of rounds of play
+            n_courts(int): number of courts to use
+            iterations(int): number of schedules to sample
+            players_per_court(int): default 4
+            scoring_function(str): 'naive' or 'weighted' partner scoring, default 'naive'
+            strategy(str): 'sample' for random schedules or 'greedy' for schedules built round by round, default 'sample'
+            seed(int): seed for reproducible results, default None
+            chunk_size(int): number of schedules to generate and score at a time, default 1000
+            as_batch(bool): return one ScheduleBatch instead of a list, default False
+
+        Returns:
+            List[Schedule] or ScheduleBatch
+            sorted by increasing partner_dupcount
+
+        """
+        batch = self._sample(n_players or self.n_players, n_rounds or self.n_rounds, n_courts or self.n_courts,
+                             iterations or self.iterations, players_per_court or self.players_per_court,
+                             scoring_function, seed if seed is not None else self.seed, chunk_size, pareto=True,
+                             strategy=strategy)
+        return batch if as_batch else batch.to_schedules()
 
-        # for naive scoring function, we first minimize the count of duplicates
-        # from the 1+ schedules with the same duplicate count, we then minimize opponent duplicates
+    def reoptimize(
+            self,
+            played: np.ndarray,
+            n_rounds: int,
+            players: Sequence[int] = None,
+            n_courts: int = None,
+            players_per_court: int = None,
+            time_budget_ms: float = 200,
+            seed: int = None) -> Schedule:
+        """Re-optimizes the rest of a session after players join or leave
+
+        The rounds already played are fixed and seed the partner and opponent counts,
+        so the new rounds avoid repeating their pairs. Players with the most games so
+        far take the first byes. Greedy schedules built against the history get a quarter
+        of the time budget and the best one is annealed for the rest.
+
+        Args:
+            played(np.ndarray): the rounds played so far, shape (n_played, n_courts * players_per_court)
+            n_rounds(int): the number of rounds left to schedule
+            players(Sequence[int]): the players available from now on, new players take unused numbers,
+                                    default every player in the pool
+            n_courts(int): number of courts to use, default as many of the courts as the players can fill
+            players_per_court(int): default 4
+            time_budget_ms(float): time limit for the whole re-optimization, default 200
+            seed(int): seed for reproducible results, default None
+
+        Returns:
+            Schedule
+            the remaining rounds, the dupcounts include the rounds already played
+
+        """
+        start = time.perf_counter()
+        players_per_court = players_per_court if players_per_court else self.players_per_court
+        players = np.arange(self.n_players) if players is None else np.asarray(players)
+        played = np.asarray(played)
+        played = played.reshape(played.shape[0], -1) if played.size else np.zeros((0, 0), dtype=np.int64)
+        n_courts = min(n_courts if n_courts else self.n_courts, len(players) // players_per_court)
+        n_byes = byes.byes_per_round(len(players), n_courts, players_per_court)
+        n_pool = max(int(players.max()), int(played.max(initial=0))) + 1
+        seed = seed if seed is not None else self.seed
+        greedy_seed, move_seed = self._seed_sequence(seed).spawn(2)
+        rng = np.random.default_rng(greedy_seed)
+        history = PairCounts.from_schedule(played, n_pool, players_per_court)
+
+        # each restart draws new bye tie-breaks and court groupings, at least one always runs
+        best, best_score = None, None
+        greedy_deadline = start + time_budget_ms / 4000
+        while best is None or time.perf_counter() < greedy_deadline:
+            order = byes.history_order(players, played, rng)
+            sched = greedy_schedule(n_pool, n_rounds, n_courts, players_per_court, pc=history, seed=rng,
+                                    byes=byes.fair_byes(len(players), n_rounds, n_byes, order), players=players)
+            pc = PairCounts.from_schedule(np.concatenate([played.ravel(), sched.ravel()]), n_pool, players_per_court)
+            if best is None or (pc.partner_dupcount, pc.opponent_dupcount) < best_score:
+                best, best_score = sched, (pc.partner_dupcount, pc.opponent_dupcount)
+
+        # the move budget is effectively unlimited so the time budget sets the cooling schedule
+        optimal, (partner_dupcount, opponent_dupcount) = best.reshape(n_rounds, n_courts, players_per_court), best_score
+        # part of the budget is held back for building the result after the search stops
+        remaining_ms = time_budget_ms * (1 - REOPTIMIZE_MARGIN) - (time.perf_counter() - start) * 1000
+        if remaining_ms > 0:
+            missed = len(played) - np.bincount(played.ravel().astype(np.intp), minlength=n_pool)
+            optimal, partner_dupcount, opponent_dupcount, _ = anneal_schedule(
+                best, n_pool, players_per_court, iterations=10 ** 7, time_budget_ms=remaining_ms, seed=move_seed,
+                players=players, history=history, prior_byes=missed)
+        return Schedule(n_players=n_pool,
+                        players_per_court=players_per_court,
+                        schedule=optimal,
+                        partner_dupcount=np.int64(partner_dupcount),
+                        opponent_dupcount=np.int64(opponent_dupcount))
+
+    def _sample(
+            self,
+            n_players: int,
+            n_rounds: int,
+            n_courts: int,
+            iterations: int,
+            players_per_court: int,
+            scoring_function: str,
+            seed: int,
+            chunk_size: int,
+            top_k: int = 1,
+            objective: str = 'lexicographic',
+            partner_weight: float = 10.0,
+            pareto: bool = False,
+            target: Union[float, Tuple[float, float]] = None,
+            strategy: str = 'sample',
+            progress: Callable[[dict], None] = None,
+            time_budget_ms: float = None,
+            stats: SearchStats = None) -> ScheduleBatch:
+        """Streams random or greedy schedules and keeps either the top_k or the Pareto front"""
+        if scoring_function not in ('naive', 'weighted'):
+            raise ValueError(f'Invalid value for scoring_function: {scoring_function}')
+        targets = self._targets(n_players, n_rounds, n_courts, players_per_court, scoring_function, target)
+        iterations_used = 0
+
+        # schedules are generated and scored one block at a time and only the running top_k are kept
+        # so peak memory depends on chunk_size rather than iterations
+        kept = None
+        generate = self.iter_greedy_schedules if strategy == 'greedy' else self.iter_schedules
+        if time_budget_ms:
+            # the clock starts once the scorers are warm, a cold process would otherwise
+            # spend the budget selecting the backend and loading its kernels
+            self._warm_up(n_players, n_rounds, n_courts, players_per_court, scoring_function)
+            blocks = self._timed_blocks(generate, n_players, n_rounds, n_courts, players_per_court, chunk_size,
+                                        self._seed_sequence(seed), time_budget_ms, stats)
+            iterations = None
+        else:
+            blocks = generate(n_players, n_rounds, n_courts, iterations, players_per_court, chunk_size,
+                              self._seed_sequence(seed), stats=stats)
+        for scheds in blocks:
+            iterations_used += scheds.shape[0]
+
+            # for naive scoring function, we first minimize the count of duplicates
+            # from the 1+ schedules with the same duplicate count, we then minimize opponent duplicates
+            # for weighted scoring function, we put a penalty on higher duplicate numbers (3+)
+            with timer(stats, 'partner_scoring'):
+                if scoring_function == 'naive':
+                    dupcounts = self.batch_dupcount(scheds, n_players, players_per_court)
+                else:
+                    dupcounts = self.batch_dupcount_weighted(scheds, n_players=n_players, players_per_court=players_per_court)
+
+            # opponents only need scoring for candidates that can still make the top_k
+            # the Pareto front needs them all
+            with timer(stats, 'selection'):
+                if pareto:
+                    sched_idx = np.ones(dupcounts.shape[0], dtype=bool)
+                else:
+                    sched_idx = dupcounts <= selection.partner_cutoff(dupcounts, kept, top_k, objective, partner_weight)
+                candidates = scheds[sched_idx] if sched_idx.any() else None
+            if candidates is not None:
+                with timer(stats, 'opponent_scoring'):
+                    oppdupcounts = self.batch_oppdupcount(candidates, n_players, players_per_court)
+                with timer(stats, 'selection'):
+                    block = (candidates, dupcounts[sched_idx], oppdupcounts)
+                    if pareto:
+                        kept = selection.merge_pareto(kept, block)
+                    else:
+                        kept = selection.merge_top(kept, block, top_k, objective, partner_weight)
+            if stats is not None:
+                stats.add_block(scheds.nbytes, scheds.shape[0])
+                stats.counts['opponent_scored'] += 0 if candidates is None else candidates.shape[0]
+                stats.add_best(iterations_used, kept[1][0], kept[2][0])
+            if progress is not None:
+                progress(_progress(iterations_used, iterations, kept[1][0], kept[2][0]))
+
+            # stop once every kept schedule meets a target, no later block can improve on the lower bounds
+            if (pareto or kept[0].shape[0] == top_k) and any(
+                    (kept[1] <= tp).all() and (kept[2] <= to).all() for tp, to in targets):
+                logging.getLogger(__name__).debug(f'Target reached after {iterations_used} schedules')
+                break
+
+        return ScheduleBatch(schedules=kept[0].reshape(-1, n_rounds, n_courts * players_per_court),
+                             partner_dupcounts=kept[1],
+                             opponent_dupcounts=kept[2],
+                             n_players=n_players,
+                             players_per_court=players_per_court,
+                             iterations_used=iterations_used,
+                             stats=stats.finish() if stats is not None else None)
+
+    def _warm_up(self,
+                 n_players: int,
+                 n_rounds: int,
+                 n_courts: int,
+                 players_per_court: int,
+                 scoring_function: str):
+        """Selects the kernel backend and scores a one schedule block so later blocks run warm"""
+        kernels.backend
+        sched = (np.arange(n_rounds * n_courts * players_per_court) % n_players).astype(index_dtype(n_players))
+        sched = sched.reshape(1, n_rounds, -1)
         if scoring_function == 'naive':
-            dupcounts = np.array([self.dupcount(sched) for sched in scheds])
-            sched_idx = dupcounts == dupcounts.min()
-            candidates = scheds[sched_idx]
-            oppdupcounts = np.array([self.oppdupcount(s) for s in candidates])
-            optimal = candidates[oppdupcounts.argmin()].reshape(n_rounds, n_courts, players_per_court)
-
-        # for weighted scoring function, we put a penalty on higher duplicate numbers (3+)
-        # we also try to balance partner and opponent duplicates more
-        if scoring_function == 'weighted':
-            dupcounts = np.array([self.dupcount_weighted(sched) for sched in scheds])
-            oppdupcounts = np.array([self.dupcount_weighted(sched) for sched in scheds])
-            sched_idx = dupcounts == dupcounts.min()
-            candidates = scheds[sched_idx]
-            oppdupcounts = np.array([self.oppdupcount(s) for s in candidates])
-            optimal = candidates[oppdupcounts.argmin()].reshape(n_rounds, n_courts, players_per_court)
-
-        return Schedule(schedule=optimal, partner_dupcount=dupcounts.min(), opponent_dupcount=oppdupcounts.min())
+            self.batch_dupcount(sched, n_players, players_per_court)
+        else:
+            self.batch_dupcount_weighted(sched, n_players=n_players, players_per_court=players_per_court)
+        self.batch_oppdupcount(sched, n_players, players_per_court)
 
     @staticmethod
-    def shuffle_along(X):
+    def _timed_blocks(generate: Callable,
+                      n_players: int,
+                      n_rounds: int,
+                      n_courts: int,
+                      players_per_court: int,
+                      chunk_size: int,
+                      seed: np.random.SeedSequence,
+                      time_budget_ms: float,
+                      stats: SearchStats = None) -> Iterator[np.ndarray]:
+        """Yields blocks of schedules until the time budget runs out
+
+        The time between yields covers generating a block and the caller scoring it,
+        so each block is sized from the measured time per schedule to take about a
+        quarter of the time left. Blocks shrink as the deadline nears, and none
+        starts unless at least one schedule is expected to fit.
+
+        """
+        rng = np.random.default_rng(seed)
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        # the first block is a single schedule since a greedy restart can take most of a short budget
+        size = 1
+        while True:
+            start = time.perf_counter()
+            yield next(generate(n_players, n_rounds, n_courts, size, players_per_court, size, rng, stats=stats))
+            now = time.perf_counter()
+            per_schedule = (now - start) / size
+            remaining = deadline - now
+            if remaining < per_schedule:
+                return
+            size = int(min(max(remaining / 4 / per_schedule, 1), chunk_size))
+
+    @staticmethod
+    def _targets(n_players: int,
+                 n_rounds: int,
+                 n_courts: int,
+                 players_per_court: int,
+                 scoring_function: str,
+                 target: Union[float, Tuple[float, float]] = None) -> List[Tuple[float, float]]:
+        """The (partner, opponent) scores at which a search can stop
+
+        Naive dupcounts cannot go below the lower bounds, weighted scores have no known bound.
+
+        """
+        targets = []
+        if scoring_function == 'naive':
+            targets.append(bounds.lower_bounds(n_players, n_rounds, n_courts, players_per_court))
+        if target is not None:
+            targets.append(tuple(target) if isinstance(target, (tuple, list)) else (target, np.inf))
+        return targets
+
+    @staticmethod
+    def _seed_sequence(seed) -> np.random.SeedSequence:
+        """Converts an int, None or SeedSequence to a SeedSequence"""
+        return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+    @staticmethod
+    def shuffle_along(X, rng: np.random.Generator = None):
         """Minimal in place independent-row shuffler."""
-        [np.random.shuffle(x) for x in X]
\ No newline at end of file
+        kernels.backend.shuffle_rows(X, rng if rng is not None else np.random.default_rng())
+
+
+def _progress(iterations_done: int, iterations: int, partner_dupcount, opponent_dupcount) -> dict:
+    """The dict passed to optimize_schedule progress callbacks"""
+    return {'iterations_done': int(iterations_done), 'iterations': None if iterations is None else int(iterations),
+            'partner_dupcount': np.asarray(partner_dupcount).item(),
+            'opponent_dupcount': np.asarray(opponent_dupcount).item()}
+
+
+def _optimize_shard(params: dict) -> Schedule:
+    """Runs one seeded shard of a parallel optimization in a worker process"""
+    s = Scheduler(params['n_rounds'], params['n_courts'], n_players=params['n_players'],
+                  players_per_court=params['players_per_court'])
+    return s.optimize_schedule(**params)
@@ -1,16 +1,19 @@
 # pyscheduler/scheduler.py
 
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import functools
 import logging
-import random
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
 import numpy as np
-import pandas as pd
 
 from pyscheduler.helper import *
 from pyscheduler.scheduler import Scheduler
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class ScheduleSearch:
     """"Class for researching schedule options for a variety of parameters
@@ -57,6 +60,8 @@ class ScheduleSearch:
             players_per_court: int = 4
         ) -> Dict[Tuple[int, int, int], np.ndarray]:
         """Generates optimal schedules for a variety of combinations
+
+        Runs serially in memory, see library.sweep_library for a parallel, resumable sweep.
         
         Args:
             n_players_range(tuple): default (9, 26)
@@ -80,8 +85,9 @@ class ScheduleSearch:
                         logging.info(f'Starting {n_players}-{n_rounds}-{n_courts}')
                         try:
                             if n_players // players_per_court >= n_courts:
-                                s = Scheduler(None, n_rounds, n_courts)
-                                results[(n_players, n_rounds, n_courts)] = s.optimize_schedule()
+                                s = Scheduler(n_rounds, n_courts, n_players=n_players, 
+                                              players_per_court=players_per_court, iterations=self.iterations)
+                                results[(n_players, n_rounds, n_courts)] = s.optimize_schedule().schedule
                         except ValueError as e:
                             logging.exception(e)
         return results
@@ -94,8 +100,9 @@ class ScheduleSearch:
             n_courts: int, 
             trials: int = 500, 
             iterations: int = 10000, 
-            players_per_court: int = 4
-        ) -> pd.DataFrame:
+            players_per_court: int = 4,
+            seed: int = None
+        ) -> 'pd.DataFrame':
         """Runs n trials to optimizes schedule for given parameters
         
         Args:
@@ -105,59 +112,90 @@ class ScheduleSearch:
             trials(int): number of trials to run, default 500
             iterations(int): number of iterations per trial to optimize on, default 10000
             players_per_court(int): default 4
+            seed(int or SeedSequence): seed for reproducible trials, default None
 
         Returns:
             tuple
             pd.DataFrame, Dict[int, pd.DataFrame], Dict[int, pd.DataFrame]
 
         """    
+        import pandas as pd
+
         trial_results = []
         psumms = {}
         osumms = {}
 
+        # summaries stay numpy arrays until the DataFrames are built at the end
+        seeds = Scheduler._seed_sequence(seed).spawn(trials)
         for i in range(1, trials + 1):
-            s = Scheduler(None, n_rounds, n_courts, iterations=iterations, players_per_court=players_per_court)
-            sched = {(n_players, n_rounds, n_courts): s.optimize_schedule()}
-            df = schedule_table(sched)
-            pcounts, psumm = partner_summary(df)
-            psumms[i] = psumm
-            for k, v in pcounts.items():
-                result = {'trial': i, 'count_type': 'partner', 'count_value': k, 'count_count': v}
-                trial_results.append(result)
-            ocounts, osumm = opponent_summary(df)
-            osumms[i] = osumm
-            for k, v in ocounts.items():
-                result = {'trial': i, 'count_type': 'opponent', 'count_value': k, 'count_count': v}
-                trial_results.append(result)
-
-        return pd.DataFrame(trial_results), psumms, osumms
-
-
-    def _trial(i, n_players, n_rounds, n_courts, max_trials, max_iterations, **kwargs):
-        trials = int(random.random() * max_trials)
-        iterations = int(random.random() * max_iterations)
-        return {
-            'tt': i,
-            'n_players': n_players, 
-            'n_rounds': n_rounds, 
-            'n_courts': n_courts, 
-            'max_trials': max_trials,
-            'max_iterations': max_iterations,
-            'trials': trials,
-            'iterations': iterations,
-            'results': optimization_trials(n_players, n_rounds, n_courts, trials, iterations)
-        }
-
-
-    def trials_of_trials(n_players: int, 
-                        n_rounds: int, 
-                        n_courts: int,
-                        max_trials: int = 10,
-                        max_iterations: int = 1000,
-                        max_tt: int = 50) -> List[Tuple]:
-        """Tests out different combinations of trial parameters"""
-        with Manager() as manager:
-            with manager.Pool() as p:
-                wanted = ['n_players', 'n_rounds', 'n_courts', 'max_trials', 'max_iterations']
-                args = {k: v for k, v in locals().items() if k in wanted}
-                return p.map(functools.partial(_trial, **args), range(1, max_tt + 1))
\ No newline at end of file
+            s = Scheduler(n_rounds, n_courts, n_players=n_players, iterations=iterations, 
+                          players_per_court=players_per_court, seed=seeds[i - 1])
+            sched = s.optimize_schedule().schedule
+            for count_type, summs in (('partner', psumms), ('opponent', osumms)):
+                hist, summs[i] = pair_summary(sched, count_type, n_players, players_per_court)
+                times = np.flatnonzero(hist)
+                trial_results.append((np.full(times.shape[0], i), [count_type] * times.shape[0], times, hist[times]))
+
+        columns = [np.concatenate(column) for column in zip(*trial_results)] or [[]] * 4
+        trial_results = pd.DataFrame(dict(zip(('trial', 'count_type', 'count_value', 'count_count'), columns)))
+        psumms = {i: summary_frame(table, 'partner') for i, table in psumms.items()}
+        osumms = {i: summary_frame(table, 'opponent') for i, table in osumms.items()}
+        return trial_results, psumms, osumms
+
+
+    def trials_of_trials(self,
+                         n_players: int, 
+                         n_rounds: int, 
+                         n_courts: int,
+                         max_trials: int = 10,
+                         max_iterations: int = 1000,
+                         max_tt: int = 50,
+                         workers: int = None,
+                         seed: int = None) -> List[dict]:
+        """Tests out different combinations of trial parameters
+        
+        Args:
+            n_players(int): total number of players in pool
+            n_rounds(int): number of rounds of play
+            n_courts(int): number of courts to use
+            max_trials(int): maximum number of trials per run, default 10
+            max_iterations(int): maximum number of iterations per trial, default 1000
+            max_tt(int): number of runs, default 50
+            workers(int): number of processes, default None (one per cpu)
+            seed(int): seed for the random trial parameters, default None
+
+        Returns:
+            List[dict]
+
+        """
+        args = {'n_players': n_players, 'n_rounds': n_rounds, 'n_courts': n_courts, 
+                'max_trials': max_trials, 'max_iterations': max_iterations}
+        seeds = np.random.SeedSequence(seed).spawn(max_tt)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(functools.partial(_trial, **args), range(1, max_tt + 1), seeds))
+
+
+def _trial(i: int, 
+           seed: np.random.SeedSequence,
+           n_players: int, 
+           n_rounds: int, 
+           n_courts: int, 
+           max_trials: int, 
+           max_iterations: int) -> dict:
+    """Runs one randomly sized set of optimization trials in a worker process"""
+    trial_seed, seed = seed.spawn(2)
+    rng = np.random.default_rng(seed)
+    trials = int(rng.integers(1, max_trials + 1))
+    iterations = int(rng.integers(1, max_iterations + 1))
+    search = ScheduleSearch(None, n_rounds, n_courts)
+    return {
+        'tt': i,
+        'n_players': n_players, 
+        'n_rounds': n_rounds, 
+        'n_courts': n_courts, 
+        'max_trials': max_trials,
+        'max_iterations': max_iterations,
+        'trials': trials,
+        'iterations': iterations,
+        'results': search.optimization_trials(n_players, n_rounds, n_courts, trials, iterations, seed=trial_seed)
+    }
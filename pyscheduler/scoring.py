@@ -0,0 +1,203 @@
+# pyscheduler/scoring.py
+
+import functools
+import itertools
+from typing import Union
+
+import numpy as np
+
+from pyscheduler import kernels
+
+
+def _read_only(arr: np.ndarray) -> np.ndarray:
+    # cached arrays are shared by every caller
+    arr.setflags(write=False)
+    return arr
+
+
+@functools.lru_cache(maxsize=None)
+def partner_positions(players_per_court: int = 4) -> np.ndarray:
+    """Positions within a court that form partner pairs
+
+    Args:
+        players_per_court(int): default 4, first half of court is team 1, second half is team 2
+
+    Returns:
+        np.ndarray of shape (n_pairs, 2), read-only
+
+    """
+    team_size = players_per_court // 2
+    pairs = [pair for team in range(2)
+             for pair in itertools.combinations(range(team * team_size, (team + 1) * team_size), 2)]
+    return _read_only(np.array(pairs, dtype=np.intp).reshape(-1, 2))
+
+
+@functools.lru_cache(maxsize=None)
+def opponent_positions(players_per_court: int = 4) -> np.ndarray:
+    """Positions within a court that form opponent pairs
+
+    Args:
+        players_per_court(int): default 4, first half of court is team 1, second half is team 2
+
+    Returns:
+        np.ndarray of shape (n_pairs, 2), read-only
+
+    """
+    team_size = players_per_court // 2
+    pairs = itertools.product(range(team_size), range(team_size, players_per_court))
+    return _read_only(np.array(list(pairs), dtype=np.intp).reshape(-1, 2))
+
+
+def _positions(kind: str, players_per_court: int) -> np.ndarray:
+    if kind == 'partner':
+        return partner_positions(players_per_court)
+    if kind == 'opponent':
+        return opponent_positions(players_per_court)
+    raise ValueError(f'Invalid value for kind: {kind}')
+
+
+def _gather(positions: np.ndarray, players_per_court: int, n_games: int) -> np.ndarray:
+    """Offsets court positions to every game of a flattened schedule"""
+    # column-major so each side of the pairs is a contiguous index array
+    starts = np.arange(n_games, dtype=np.intp) * players_per_court
+    return np.asfortranarray((starts[:, None, None] + positions[None, :, :]).reshape(-1, 2))
+
+
+@functools.lru_cache(maxsize=256)
+def pair_template(kind: str, players_per_court: int = 4, n_courts: int = 1, n_rounds: int = 1) -> np.ndarray:
+    """Indexes into a flattened schedule of every partner or opponent pair, built once per configuration
+
+    Gathering a schedule, or a batch of them, with the template gets every
+    pair in one fancy-index: sched.reshape(-1)[template] or scheds.reshape(len(scheds), -1)[:, template].
+
+    Args:
+        kind(str): 'partner' or 'opponent'
+        players_per_court(int): default 4, first half of court is team 1, second half is team 2
+        n_courts(int): number of courts, default 1
+        n_rounds(int): number of rounds, default 1
+
+    Returns:
+        np.ndarray of shape (n_rounds * n_courts * n_pairs, 2), read-only
+
+    """
+    return _read_only(_gather(_positions(kind, players_per_court), players_per_court, n_courts * n_rounds))
+
+
+def schedule_pairs(sched: np.ndarray, kind: str, players_per_court: int = 4) -> np.ndarray:
+    """Gets every partner or opponent pair in a schedule, see pair_template
+
+    Args:
+        sched(np.ndarray): the schedule, any shape that reshapes to (n_games, players_per_court)
+        kind(str): 'partner' or 'opponent'
+        players_per_court(int): default 4
+
+    Returns:
+        np.ndarray of shape (n_games * n_pairs, 2)
+
+    """
+    sched = np.asarray(sched)
+    return sched.reshape(-1)[pair_template(kind, players_per_court, sched.size // players_per_court)]
+
+
+def pair_codes(scheds: np.ndarray,
+               positions: Union[str, np.ndarray],
+               n_players: int,
+               players_per_court: int = 4) -> np.ndarray:
+    """Encodes every pair in a batch of schedules as lo * n_players + hi
+
+    Args:
+        scheds(np.ndarray): array of shape (iterations, n_rounds, n_courts * players_per_court)
+        positions(str or np.ndarray): 'partner', 'opponent', or pair positions within a court, see partner_positions
+        n_players(int): the total number of players in the pool
+        players_per_court(int): default 4
+
+    Returns:
+        np.ndarray of shape (iterations, n_rounds * n_courts * n_pairs)
+
+    """
+    # one gather per side pulls every pair out of the flattened schedules
+    # min and max run in the schedule dtype, the codes are int64 so they cannot wrap
+    n_games = int(np.prod(scheds.shape[1:])) // players_per_court
+    if isinstance(positions, str):
+        template = pair_template(positions, players_per_court, n_games)
+    else:
+        template = _gather(np.asarray(positions, dtype=np.intp).reshape(-1, 2), players_per_court, n_games)
+    flat = scheds.reshape(scheds.shape[0], -1)
+    left = flat[:, template[:, 0]]
+    right = flat[:, template[:, 1]]
+    codes = np.minimum(left, right).astype(np.int64)
+    codes *= n_players
+    codes += np.maximum(left, right)
+    return codes
+
+
+def count_duplicates(codes: np.ndarray) -> np.ndarray:
+    """Counts repeated pair codes in each row (number of pairs - number of unique pairs)
+
+    Args:
+        codes(np.ndarray): array of shape (iterations, n_pairs) created by pair_codes
+
+    Returns:
+        np.ndarray of shape (iterations,)
+
+    """
+    return kernels.backend.count_duplicates(codes)
+
+
+def multiplicity_histogram(codes: np.ndarray) -> np.ndarray:
+    """Counts, for each row, how many pairs occur exactly k times
+
+    Args:
+        codes(np.ndarray): array of shape (iterations, n_pairs) created by pair_codes
+
+    Returns:
+        np.ndarray of shape (iterations, max_multiplicity + 1)
+
+    """
+    return kernels.backend.multiplicity_histogram(codes)
+
+
+def weighted_score(hist: np.ndarray, weights: np.ndarray = None) -> np.ndarray:
+    """Applies weights to a multiplicity histogram
+
+    Args:
+        hist(np.ndarray): array created by multiplicity_histogram
+        weights(np.ndarray): the weights to apply to duplicate counts, default 1 + .1 * multiplicity
+
+    Returns:
+        np.ndarray of shape (iterations,)
+
+    """
+    if weights is None:
+        weights = np.ones(hist.shape[1]) + 0.1 * np.arange(hist.shape[1])
+    return hist @ np.asarray(weights)[:hist.shape[1]]
+
+
+def batch_dupcount(scheds: np.ndarray, n_players: int, players_per_court: int = 4) -> np.ndarray:
+    """Counts duplicate partners for every schedule in a batch
+
+    Args:
+        scheds(np.ndarray): array of shape (iterations, n_rounds, n_courts * players_per_court)
+        n_players(int): the total number of players in the pool
+        players_per_court(int): default 4
+
+    Returns:
+        np.ndarray of shape (iterations,)
+
+    """
+    return count_duplicates(pair_codes(scheds, 'partner', n_players, players_per_court))
+
+
+def batch_oppdupcount(scheds: np.ndarray, n_players: int, players_per_court: int = 4) -> np.ndarray:
+    """Counts duplicate opponents for every schedule in a batch
+
+    Args:
+        scheds(np.ndarray): array of shape (iterations, n_rounds, n_courts * players_per_court)
+        n_players(int): the total number of players in the pool
+        players_per_court(int): default 4
+
+    Returns:
+        np.ndarray of shape (iterations,)
+
+    """
+    return count_duplicates(pair_codes(scheds, 'opponent', n_players, players_per_court))
@@ -0,0 +1,123 @@
+# pyscheduler/selection.py
+
+from typing import Tuple
+
+import numpy as np
+
+
+# a scored block is (schedules, dupcounts, oppdupcounts) with one row per candidate
+Scored = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+OBJECTIVES = ('lexicographic', 'weighted')
+
+
+def objective_order(dupcounts: np.ndarray,
+                    oppdupcounts: np.ndarray,
+                    objective: str = 'lexicographic',
+                    partner_weight: float = 10.0) -> np.ndarray:
+    """Orders candidates from best to worst, ties keep their original order
+
+    Args:
+        dupcounts(np.ndarray): partner scores of shape (n,)
+        oppdupcounts(np.ndarray): opponent scores of shape (n,)
+        objective(str): 'lexicographic' minimizes partners then opponents,
+                        'weighted' minimizes partner_weight * partners + opponents, default 'lexicographic'
+        partner_weight(float): cost of a partner duplicate relative to an opponent duplicate, default 10
+
+    Returns:
+        np.ndarray of shape (n,)
+
+    """
+    if objective == 'lexicographic':
+        return np.lexsort((oppdupcounts, dupcounts))
+    if objective == 'weighted':
+        return np.argsort(partner_weight * dupcounts + oppdupcounts, kind='stable')
+    raise ValueError(f'Invalid value for objective: {objective}')
+
+
+def partner_cutoff(dupcounts: np.ndarray,
+                   kept: Scored,
+                   k: int,
+                   objective: str = 'lexicographic',
+                   partner_weight: float = 10.0) -> float:
+    """The largest partner score in a block that can still make the top k
+
+    Opponent scores are never negative, so a candidate whose partner score alone
+    is worse than the kth best in the block, or than the worst kept candidate, can be
+    dropped before its opponents are scored. The weighted objective only prunes once
+    k candidates are kept, on the worst kept cost divided by partner_weight.
+
+    Args:
+        dupcounts(np.ndarray): partner scores of the block
+        kept(Scored): the current top k, or None
+        k(int): the number of candidates to keep
+        objective(str): see objective_order
+        partner_weight(float): see objective_order
+
+    Returns:
+        float
+
+    """
+    full = kept is not None and kept[0].shape[0] >= k
+    if objective == 'weighted':
+        # the block's kth partner score does not bound a weighted objective, a lower
+        # partner score can lose to a higher one on opponents, so only a full top k does
+        if not full:
+            return np.inf
+        return (partner_weight * kept[1] + kept[2]).max() / partner_weight
+    k = min(k, dupcounts.shape[0])
+    cutoff = np.partition(dupcounts, k - 1)[k - 1]
+    if not full:
+        return cutoff
+    return min(cutoff, kept[1].max())
+
+
+def merge_top(kept: Scored,
+              block: Scored,
+              k: int,
+              objective: str = 'lexicographic',
+              partner_weight: float = 10.0) -> Scored:
+    """Merges a scored block into the k best, ties go to kept
+
+    Args:
+        kept(Scored): the current top k, or None
+        block(Scored): (schedules, dupcounts, oppdupcounts)
+        k(int): the number of candidates to keep
+        objective(str): see objective_order
+        partner_weight(float): see objective_order
+
+    Returns:
+        Scored
+        sorted from best to worst
+
+    """
+    if kept is not None:
+        block = tuple(np.concatenate([a, b]) for a, b in zip(kept, block))
+    order = objective_order(block[1], block[2], objective, partner_weight)[:k]
+    return tuple(a[order] for a in block)
+
+
+def merge_pareto(front: Scored, block: Scored) -> Scored:
+    """Merges a scored block into the Pareto front of (dupcount, oppdupcount)
+
+    Only one candidate is kept per point on the front, ties go to front.
+
+    Args:
+        front(Scored): the current front, or None
+        block(Scored): (schedules, dupcounts, oppdupcounts)
+
+    Returns:
+        Scored
+        sorted by increasing dupcount
+
+    """
+    if front is not None:
+        block = tuple(np.concatenate([a, b]) for a, b in zip(front, block))
+    order = np.lexsort((block[2], block[1]))
+    dupcounts, oppdupcounts = block[1][order], block[2][order]
+
+    # after sorting by dupcount, a candidate is on the front when it beats
+    # the best oppdupcount of every candidate before it
+    best_before = np.minimum.accumulate(np.concatenate([[np.inf], oppdupcounts[:-1]]))
+    on_front = oppdupcounts < best_before
+    return tuple(a[order[on_front]] for a in block)
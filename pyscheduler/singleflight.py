@@ -0,0 +1,111 @@
+# pyscheduler/singleflight.py
+
+import hashlib
+from pathlib import Path
+import threading
+from typing import Any, Callable, Hashable, Union
+
+try:
+    import fcntl
+except ImportError:
+    # file locks are posix only, elsewhere just threads are coordinated
+    fcntl = None
+
+
+class _Call:
+    """One in-flight call that other threads can wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time and shares its result with concurrent callers
+
+    Threads asking for a key that is already being computed wait for it and get
+    the same result. With lock_dir set, processes are coordinated through a file
+    lock per key, and lookup is checked once the lock is held so a process that
+    waited picks up the result another process stored instead of computing it again.
+
+    Usage:
+        flights = SingleFlight(lock_dir='/tmp/pyscheduler-locks')
+        sched = flights.do(key, lambda: s.optimize_schedule(), lookup=lambda: cache.get(key))
+
+    """
+    def __init__(self, lock_dir: Union[str, Path] = None):
+        """Instantiate SingleFlight object
+
+        Args:
+            lock_dir(str or Path): directory for per-key lock files, default None coordinates threads only
+
+        Returns:
+            SingleFlight
+
+        """
+        self.lock_dir = Path(lock_dir) if lock_dir else None
+        if self.lock_dir:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], lookup: Callable[[], Any] = None) -> Any:
+        """Returns lookup() if it finds a result, otherwise fn(), running fn at most once at a time per key
+
+        Args:
+            key(Hashable): identifies identical calls
+            fn(Callable): computes the result, it should store it where lookup can find it
+            lookup(Callable): returns a stored result or None, default None
+
+        Returns:
+            Any
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, lookup)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _run(self, key: Hashable, fn: Callable[[], Any], lookup: Callable[[], Any]) -> Any:
+        """Runs fn under the key's file lock unless lookup finds a result first"""
+        if self.lock_dir is None or fcntl is None:
+            return self._lookup_or_call(fn, lookup)
+        fn_lock = self.lock_dir / (hashlib.sha1(repr(key).encode()).hexdigest() + '.lock')
+        with open(fn_lock, 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                return self._lookup_or_call(fn, lookup)
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _lookup_or_call(self, fn: Callable[[], Any], lookup: Callable[[], Any]) -> Any:
+        # a call that finished just before this one started has already stored its result
+        if lookup is not None:
+            result = lookup()
+            if result is not None:
+                return result
+        with self._lock:
+            self.runs += 1
+        return fn()
@@ -0,0 +1,121 @@
+# pyscheduler/stats.py
+
+from contextlib import nullcontext
+import time
+from typing import Any, Dict, List, Tuple
+
+
+# the stages an optimization spends its time in, see SearchStats
+STAGES = ('generation', 'byes', 'partner_scoring', 'opponent_scoring', 'selection', 'local_search')
+
+# shared by every disabled timer so instrumentation off costs one call and no allocation
+_UNTIMED = nullcontext()
+
+
+class _Timer:
+    """Adds the time spent inside a with block to one stage"""
+    __slots__ = ('stats', 'stage', 'start')
+
+    def __init__(self, stats: 'SearchStats', stage: str):
+        self.stats = stats
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.stats.timings[self.stage] += time.perf_counter() - self.start
+
+
+def timer(stats: 'SearchStats', stage: str):
+    """Times a with block into stats, or does nothing when stats is None
+
+    Args:
+        stats(SearchStats): where the time is added, default None
+        stage(str): one of STAGES
+
+    Returns:
+        context manager
+
+    """
+    return _UNTIMED if stats is None else _Timer(stats, stage)
+
+
+class SearchStats:
+    """Where an optimization spent its time and what it looked at
+
+    timings are seconds per stage, counts are blocks, schedules generated and
+    schedules scored on opponents, block_bytes and peak_block_bytes are the sizes
+    of the generated schedule arrays, and trajectory holds a
+    (iterations_done, elapsed seconds, partner_dupcount, opponent_dupcount)
+    tuple each time the best schedule improved.
+
+    Usage:
+        sched = s.optimize_schedule(collect_stats=True)
+        sched.stats.timings['partner_scoring']
+        metrics.send(sched.stats.to_dict())
+
+    """
+    def __init__(self):
+        """Instantiate SearchStats object
+
+        Returns:
+            SearchStats
+
+        """
+        self.timings = dict.fromkeys(STAGES, 0.0)
+        self.counts = {'blocks': 0, 'schedules': 0, 'opponent_scored': 0}
+        self.block_bytes = 0
+        self.peak_block_bytes = 0
+        self.trajectory: List[Tuple[int, float, float, float]] = []
+        self.elapsed = 0.0
+        self._start = time.perf_counter()
+
+    def add_block(self, nbytes: int, n_schedules: int):
+        """Counts one generated block of schedules"""
+        self.counts['blocks'] += 1
+        self.counts['schedules'] += n_schedules
+        self.block_bytes += nbytes
+        self.peak_block_bytes = max(self.peak_block_bytes, nbytes)
+
+    def add_best(self, iterations_done: int, partner_dupcount, opponent_dupcount):
+        """Records the best scores if they improved on the last ones recorded"""
+        best = (float(partner_dupcount), float(opponent_dupcount))
+        if not self.trajectory or best < self.trajectory[-1][2:]:
+            self.trajectory.append((int(iterations_done), time.perf_counter() - self._start) + best)
+
+    def finish(self) -> 'SearchStats':
+        """Stops the clock for elapsed"""
+        self.elapsed = time.perf_counter() - self._start
+        return self
+
+    def merge(self, other: 'SearchStats') -> 'SearchStats':
+        """Adds another run's timings and counts to these, for example a worker shard
+
+        Timings add up across workers, so they can exceed elapsed. The trajectory is left alone.
+
+        """
+        for stage, seconds in other.timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        for name, count in other.counts.items():
+            self.counts[name] = self.counts.get(name, 0) + count
+        self.block_bytes += other.block_bytes
+        self.peak_block_bytes = max(self.peak_block_bytes, other.peak_block_bytes)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Flattens the stats into one dict of numbers, for a metrics pipeline
+
+        Returns:
+            dict
+            keys are <stage>_s for each stage, each count, block_bytes, peak_block_bytes,
+            elapsed_s, improvements and the final best partner_dupcount and opponent_dupcount
+
+        """
+        data = {f'{stage}_s': seconds for stage, seconds in self.timings.items()}
+        data.update(self.counts)
+        data.update({'block_bytes': self.block_bytes, 'peak_block_bytes': self.peak_block_bytes,
+                     'elapsed_s': self.elapsed, 'improvements': len(self.trajectory)})
+        if self.trajectory:
+            data['partner_dupcount'], data['opponent_dupcount'] = self.trajectory[-1][2:]
+        return data
@@ -23,7 +23,8 @@ def run():
       author_email='sansbacon@gmail.com',
       license='MIT',
       packages=find_packages(),
-      package_data={'pyscheduler': ['data/*.json']},
+      package_data={'pyscheduler': ['data/*.json', 'data/*.bin']},
+      extras_require={'numba': ['numba']},
       zip_safe=False,
       classifiers=[
          'Programming Language :: Python :: 3',
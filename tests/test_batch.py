@@ -0,0 +1,69 @@
+# tests/test_batch.py
+
+import numpy as np
+import pytest
+
+from pyscheduler import Schedule, ScheduleBatch, Scheduler
+from pyscheduler.batch import index_dtype
+
+
+@pytest.fixture
+def batch():
+    s = Scheduler(n_rounds=8, n_courts=5, n_players=22, seed=0)
+    return s.top_schedules(k=20, iterations=500, as_batch=True)
+
+
+@pytest.mark.parametrize('n, dtype', [(2, np.uint8), (256, np.uint8), (257, np.uint16),
+                                      (65536, np.uint16), (65537, np.uint32)])
+def test_index_dtype(n, dtype):
+    """Tests the smallest dtype that holds every index is picked"""
+    assert index_dtype(n) == dtype
+
+
+def test_batch(batch):
+    """Tests the batch holds compact parallel arrays"""
+    assert len(batch) == 20
+    assert batch.schedules.shape == (20, 8, 20)
+    assert batch.schedules.dtype == np.uint8
+    assert batch.schedules.flags['C_CONTIGUOUS']
+    assert (batch.n_rounds, batch.n_courts) == (8, 5)
+    assert list(zip(batch.partner_dupcounts, batch.opponent_dupcounts)) == sorted(
+        zip(batch.partner_dupcounts, batch.opponent_dupcounts))
+
+
+def test_batch_views(batch):
+    """Tests indexing gives Schedule views and slices give batches"""
+    sched = batch[3]
+    assert isinstance(sched, Schedule)
+    assert sched.schedule.shape == (8, 5, 4)
+    assert np.shares_memory(sched.schedule, batch.schedules)
+    assert (sched.partner_dupcount, sched.opponent_dupcount) == (batch.partner_dupcounts[3], batch.opponent_dupcounts[3])
+    assert sched.player_count == 22
+
+    head = batch[:5]
+    assert isinstance(head, ScheduleBatch) and len(head) == 5
+    assert np.shares_memory(head.schedules, batch.schedules)
+    assert [s.partner_dupcount for s in batch.to_schedules()] == batch.partner_dupcounts.tolist()
+
+
+def test_batch_sort(batch):
+    """Tests sorting by the weighted objective"""
+    weighted = batch.sort(objective='weighted', partner_weight=1)
+    cost = weighted.partner_dupcounts + weighted.opponent_dupcounts
+    assert (np.diff(cost) >= 0).all()
+    assert sorted(map(bytes, weighted.schedules)) == sorted(map(bytes, batch.schedules))
+
+
+def test_from_schedules(batch):
+    """Tests a batch rebuilt from its schedules matches it"""
+    rebuilt = ScheduleBatch.from_schedules(batch.to_schedules())
+    assert np.array_equal(rebuilt.schedules, batch.schedules)
+    assert np.array_equal(rebuilt.opponent_dupcounts, batch.opponent_dupcounts)
+    wide = ScheduleBatch(batch.schedules.astype(np.int64), batch.partner_dupcounts, batch.opponent_dupcounts, n_players=300)
+    assert wide.schedules.dtype == np.uint16
+
+
+def test_batch_mismatched_scores(batch):
+    """Tests scores must line up with schedules"""
+    with pytest.raises(ValueError):
+        ScheduleBatch(batch.schedules, batch.partner_dupcounts[:3], batch.opponent_dupcounts, n_players=22)
@@ -0,0 +1,29 @@
+# tests/test_bounds.py
+
+import pytest
+
+from pyscheduler import Scheduler
+from pyscheduler.bounds import games_played, lower_bounds
+
+
+def test_games_played():
+    """Tests byes are spread as evenly as possible"""
+    games = games_played(13, 5, 3)
+    assert games.sum() == 5 * 3 * 4
+    assert set(games.tolist()) == {4, 5}
+
+
+def test_lower_bounds_round_robin():
+    """Tests the bounds for four players on one court, where every pair must meet twice as opponents"""
+    assert lower_bounds(4, 3, 1) == (0, 6)
+    assert lower_bounds(4, 4, 1) == (2, 10)
+
+
+@pytest.mark.parametrize('n_players,n_rounds,n_courts', [(13, 5, 3), (8, 7, 2), (9, 12, 2), (20, 10, 4)])
+def test_lower_bounds_hold(n_players, n_rounds, n_courts):
+    """Tests no sampled schedule beats the lower bounds"""
+    s = Scheduler(n_rounds, n_courts, n_players=n_players, iterations=500, seed=0)
+    scheds = s.create_schedules()
+    partners, opponents = lower_bounds(n_players, n_rounds, n_courts)
+    assert s.batch_dupcount(scheds).min() >= partners
+    assert s.batch_oppdupcount(scheds).min() >= opponents
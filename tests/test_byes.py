@@ -0,0 +1,35 @@
+# tests/test_byes.py
+
+import numpy as np
+import pytest
+
+from pyscheduler import byes
+
+
+def test_byes_per_round():
+    """Tests the byes fill the courts exactly"""
+    assert byes.byes_per_round(13, 3) == 1
+    assert byes.byes_per_round(12, 3) == 0
+    assert byes.byes_per_round(13, 2, players_per_court=6) == 1
+    with pytest.raises(ValueError):
+        byes.byes_per_round(11, 3)
+
+
+@pytest.mark.parametrize('n_players,n_rounds,n_byes', [(13, 12, 1), (11, 40, 3), (10, 9, 5), (9, 7, 4)])
+def test_fair_byes(n_players, n_rounds, n_byes):
+    """Tests bye counts are balanced and byes are never back to back when avoidable"""
+    order = np.random.default_rng(0).permutation(n_players)
+    assigned = byes.fair_byes(n_players, n_rounds, n_byes, order)
+    assert assigned.shape == (n_rounds, n_byes)
+    counts = np.bincount(assigned.flatten(), minlength=n_players)
+    assert counts.max() - counts.min() <= 1
+    for earlier, later in zip(assigned, assigned[1:]):
+        assert not set(earlier) & set(later)
+
+
+def test_random_lineups():
+    """Tests byes and players on court split every round of every candidate"""
+    bye_sets, players = byes.random_lineups(13, 5, 1, 20, np.random.default_rng(0))
+    assert bye_sets.shape == (20, 5, 1) and players.shape == (20, 5, 12)
+    rounds = np.sort(np.concatenate([bye_sets, players], axis=2), axis=2)
+    assert (rounds == np.arange(13)).all()
@@ -0,0 +1,99 @@
+# tests/test_cache.py
+
+import time
+
+import numpy as np
+
+from pyscheduler import ScheduleCache, Scheduler, Schedule
+from pyscheduler.cache import cache_key
+
+
+def make_schedule(n: int = 0) -> Schedule:
+    return Schedule(n_players=8, schedule=np.arange(16).reshape(2, 2, 4) + n, partner_dupcount=n, opponent_dupcount=n)
+
+
+def test_cache_key():
+    """Tests numpy and python values make the same key"""
+    assert cache_key(np.int64(13), 3, 5) == cache_key(13, np.uint8(3), 5.0)
+    assert cache_key(13, 3, 5, seed=1) != cache_key(13, 3, 5, seed=2)
+
+
+def test_lru_eviction():
+    """Tests the least recently used entry is evicted first"""
+    cache = ScheduleCache(maxsize=2)
+    for n in range(2):
+        cache.put(n, make_schedule(n))
+    assert cache.get(0).partner_dupcount == 0
+    cache.put(2, make_schedule(2))
+    assert 1 not in cache and 0 in cache and 2 in cache
+    assert cache.get(1) is None
+    assert cache.stats() == {'hits': 1, 'disk_hits': 0, 'misses': 1, 'evictions': 1, 'size': 2}
+
+
+def test_ttl():
+    """Tests entries expire after ttl seconds"""
+    cache = ScheduleCache(ttl=0.05)
+    cache.put('a', make_schedule())
+    assert cache.get('a') is not None
+    time.sleep(0.1)
+    assert cache.get('a') is None
+
+
+def test_copies(tmp_path):
+    """Tests mutating a stored or returned schedule leaves the cached one unchanged"""
+    for cache in (ScheduleCache(), ScheduleCache(path=tmp_path)):
+        stored = make_schedule()
+        cache.put('a', stored)
+        stored.schedule[:] = 0
+        cache.get('a').schedule[:] = 0
+        cache.get_or_compute('a', make_schedule).schedule[:] = 0
+        assert np.array_equal(cache.get('a').schedule, make_schedule().schedule)
+
+    # a schedule reloaded from disk
+    cache.clear()
+    cache.get('a').schedule[:] = 0
+    assert np.array_equal(cache.get('a').schedule, make_schedule().schedule)
+
+
+def test_disk_tier(tmp_path):
+    """Tests a new cache reloads schedules written by another"""
+    ScheduleCache(path=tmp_path).put(cache_key(8, 2, 2), make_schedule(3))
+    cache = ScheduleCache(path=tmp_path)
+    sched = cache.get(cache_key(8, 2, 2))
+    assert np.array_equal(sched.schedule, make_schedule(3).schedule)
+    assert sched.partner_dupcount == 3 and sched.n_players == 8
+    assert cache.get(cache_key(8, 2, 2)) is not None
+    assert cache.stats()['disk_hits'] == 1 and cache.stats()['hits'] == 1
+
+
+def test_scheduler_cache():
+    """Tests optimize_schedule reuses cached results for the same canonical key"""
+    cache = ScheduleCache()
+    s = Scheduler(n_players=13, n_rounds=5, n_courts=3, iterations=50, seed=0, cache=cache)
+    first = s.optimize_schedule()
+    assert np.array_equal(first.schedule, s.optimize_schedule().schedule)
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    s.optimize_schedule(seed=1)
+    s.optimize_schedule(strategy='greedy', iterations=5)
+    assert cache.stats()['misses'] == 3
+
+    # a target or time budget bypasses the cache
+    s.optimize_schedule(target=100)
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 3
+
+
+def test_scheduler_cache_search_arguments():
+    """Tests chunk_size, workers and initial, which change the result for a seed, each get their own entry"""
+    cache = ScheduleCache()
+    s = Scheduler(n_players=22, n_rounds=8, n_courts=5, iterations=100, seed=1, cache=cache)
+    small = s.optimize_schedule(chunk_size=30)
+    large = s.optimize_schedule(chunk_size=1000)
+    assert cache.stats()['misses'] == 2
+    assert np.array_equal(large.schedule, Scheduler(8, 5, n_players=22, iterations=100, seed=1).optimize_schedule().schedule)
+    assert not np.array_equal(small.schedule, large.schedule)
+    s.optimize_schedule(chunk_size=1000, workers=1)
+    assert cache.stats()['hits'] == 1
+    s.optimize_schedule(chunk_size=1000, workers=2)
+    s.optimize_schedule(strategy='anneal', initial='random')
+    s.optimize_schedule(strategy='anneal', initial='greedy')
+    assert cache.stats()['misses'] == 5
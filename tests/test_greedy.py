@@ -0,0 +1,45 @@
+# tests/test_greedy.py
+
+import numpy as np
+
+from pyscheduler import PairCounts, Scheduler
+from pyscheduler.greedy import greedy_round, greedy_schedule
+
+
+def test_greedy_round():
+    """Tests a round avoids partners that are already taken when it can"""
+    pc = PairCounts(8)
+    pc.add_court([0, 1, 2, 3])
+    pc.add_court([4, 5, 6, 7])
+    for seed in range(10):
+        courts = greedy_round(np.arange(8), pc, 2, np.random.default_rng(seed))
+        assert sorted(p for court in courts for p in court) == list(range(8))
+        new = PairCounts(8)
+        for court in courts:
+            new.add_court(court)
+        assert (np.minimum(pc.partners, new.partners)).sum() == 0
+
+
+def test_greedy_schedule():
+    """Tests the schedule respects byes, is reproducible and beats random sampling"""
+    s = Scheduler(n_players=13, n_rounds=5, n_courts=3, iterations=50, seed=0)
+    byes = s.calculate_byes()
+    sched = greedy_schedule(13, 5, 3, byes=byes, seed=1)
+    assert sched.shape == (5, 12)
+    for row, bye in zip(sched, byes):
+        assert sorted(row.tolist() + bye.tolist()) == list(range(13))
+    assert np.array_equal(sched, greedy_schedule(13, 5, 3, byes=byes, seed=1))
+
+    greedy = s.batch_dupcount(greedy_schedule(13, 5, 3, byes=byes, seed=1)[None])[0]
+    assert greedy <= s.batch_dupcount(s.create_schedules()).min()
+
+
+def test_greedy_schedule_history():
+    """Tests pairs played before the schedule are avoided and pc is not modified"""
+    pc = PairCounts(8)
+    pc.add_court([0, 1, 2, 3])
+    scheds = [greedy_schedule(8, 1, 2, pc=pc, seed=seed) for seed in range(5)]
+    assert pc.partner_dupcount == 0 and pc.partners.sum() == 4
+    dupcounts = [PairCounts.from_schedule(np.concatenate([[0, 1, 2, 3], sched[0]]), 8).partner_dupcount
+                 for sched in scheds]
+    assert min(dupcounts) == 0
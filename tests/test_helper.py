@@ -0,0 +1,62 @@
+# tests/test_helper.py
+
+from collections import Counter
+import itertools
+
+import numpy as np
+import pytest
+
+from pyscheduler import Scheduler
+from pyscheduler.helper import (histogram_counter, opponent_summary, pair_summary, partner_summary, readable_schedule,
+                                schedule_table, summary_frame)
+
+
+@pytest.fixture
+def sched():
+    return Scheduler(n_rounds=8, n_courts=5, n_players=22, seed=0).optimize_schedule(iterations=50).schedule
+
+
+def _counts(sched, kind):
+    """Counts pairs one court at a time"""
+    counts = Counter()
+    for court in sched.reshape(-1, 4).tolist():
+        if kind == 'partner':
+            pairs = [court[:2], court[2:]]
+        else:
+            pairs = itertools.product(court[:2], court[2:])
+        counts.update(tuple(sorted(pair)) for pair in pairs)
+    return counts
+
+
+@pytest.mark.parametrize('kind', ['partner', 'opponent'])
+def test_pair_summary(sched, kind):
+    """Tests the histogram and pair table match counting court by court"""
+    counts = _counts(sched, kind)
+    hist, table = pair_summary(sched, kind, n_players=22)
+    assert histogram_counter(hist) == Counter(counts.values())
+    assert table.shape == (2 * len(counts), 3)
+    assert {(a, b): t for a, b, t in table.tolist() if a < b} == counts
+    assert {(a, b): t for b, a, t in table.tolist() if a < b} == counts
+
+
+def test_table_summaries(sched):
+    """Tests the schedule_table summaries match pair_summary"""
+    df = schedule_table({(22, 8, 5): sched})
+    assert df.shape == (40, 7)
+    assert df['round'].max() == 8 and df['game'].max() == 5
+    for summarize, kind in ((partner_summary, 'partner'), (opponent_summary, 'opponent')):
+        counter, frame = summarize(df)
+        hist, table = pair_summary(sched, kind)
+        assert counter == histogram_counter(hist)
+        assert list(frame.columns) == ['player', kind, 'times']
+        assert frame.equals(summary_frame(table, kind))
+
+
+def test_readable_schedule():
+    """Tests matchups put the first half of each court on one line, for any court size"""
+    players = ['a', 'b', 'c', 'd', 'e', 'f', 'g']
+    rounds = readable_schedule(players, np.array([[[0, 1, 2, 3, 4, 5]], [[6, 5, 4, 3, 2, 1]]]))
+    assert rounds[0]['matchups'] == ['a-b-c\nd-e-f']
+    assert rounds[1]['matchups'] == ['g-f-e\nd-c-b']
+    assert rounds[0]['byes'].tolist() == ['g']
+    assert readable_schedule(players, np.array([[[0, 1, 2, 3]]]))[0]['matchups'] == ['a-b\nc-d']
@@ -0,0 +1,73 @@
+# tests/test_imports.py
+
+import subprocess
+import sys
+
+import pytest
+
+
+def _run(code: str) -> str:
+    """Runs code in a fresh interpreter and returns what it prints"""
+    return subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def test_import_is_lazy():
+    """Tests importing the package and looking up a library schedule loads neither pandas nor numba"""
+    code = ("import sys\n"
+            "import pyscheduler\n"
+            "from pyscheduler.library import default_library\n"
+            "default_library().get(2, 4, 9)\n"
+            "pyscheduler.ScheduleSearch\n"
+            "print(sorted(m for m in ('pandas', 'numba') if m in sys.modules))")
+    assert _run(code) == '[]'
+
+
+def test_pandas_loads_on_first_dataframe():
+    """Tests pandas is imported once a DataFrame is built"""
+    code = ("import sys\n"
+            "import numpy as np\n"
+            "from pyscheduler.helper import pair_summary, summary_frame\n"
+            "_, table = pair_summary(np.arange(8).reshape(2, 4))\n"
+            "print('pandas' in sys.modules)\n"
+            "summary_frame(table)\n"
+            "print('pandas' in sys.modules)")
+    assert _run(code).split() == ['False', 'True']
+
+
+def test_backend_selected_on_first_use():
+    """Tests the kernel backend defaults to numpy and honors PYSCHEDULER_BACKEND when it is first used"""
+    code = ("import os, sys\n"
+            "os.environ.pop('PYSCHEDULER_BACKEND', None)\n"
+            "from pyscheduler import Scheduler, kernels\n"
+            "Scheduler(5, 3, n_players=13).optimize_schedule(iterations=10)\n"
+            "print(kernels.backend.name, 'numba' in sys.modules)")
+    assert _run(code) == 'numpy False'
+
+
+def test_backend_numba_opt_in():
+    """Tests PYSCHEDULER_BACKEND=numba selects the numba kernels"""
+    pytest.importorskip('numba')
+    code = ("import os\n"
+            "os.environ['PYSCHEDULER_BACKEND'] = 'numba'\n"
+            "from pyscheduler import kernels\n"
+            "print(kernels.backend.name)")
+    assert _run(code) == 'numba'
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'numba'])
+def test_time_budget_cold_start(backend):
+    """Tests a fresh process keeps to its time budget and spends it searching, not warming up"""
+    if backend == 'numba':
+        pytest.importorskip('numba')
+    code = ("import os, time\n"
+            f"os.environ['PYSCHEDULER_BACKEND'] = '{backend}'\n"
+            "from pyscheduler import Scheduler\n"
+            "s = Scheduler(8, 5, n_players=22)\n"
+            "start = time.perf_counter()\n"
+            "sched = s.optimize_schedule(time_budget_ms=100, seed=1)\n"
+            "print((time.perf_counter() - start) * 1000, sched.iterations_used)")
+    elapsed_ms, iterations_used = _run(code).split()
+    assert int(iterations_used) > 100
+    if backend == 'numpy':
+        # numba's warm up happens before the clock starts but still counts here
+        assert float(elapsed_ms) < 100 + 50
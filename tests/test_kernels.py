@@ -0,0 +1,91 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from pyscheduler import kernels, scoring
+
+
+def _backends():
+    backends = [kernels.get_backend('numpy')]
+    try:
+        backends.append(kernels.get_backend('numba'))
+    except ImportError:
+        pass
+    return backends
+
+
+@pytest.fixture
+def codes() -> np.ndarray:
+    rng = np.random.default_rng(3)
+    return rng.integers(0, 40, size=(200, 60))
+
+
+def test_count_duplicates_reference(codes: np.ndarray):
+    """Tests every backend against a Counter reference"""
+    expected = np.array([sum(v - 1 for v in Counter(row.tolist()).values()) for row in codes])
+    for backend in _backends():
+        assert np.array_equal(backend.count_duplicates(codes), expected), backend.name
+
+
+def test_multiplicity_histogram_reference(codes: np.ndarray):
+    """Tests every backend against a Counter reference"""
+    for backend in _backends():
+        hist = backend.multiplicity_histogram(codes)
+        for row, counts in zip(codes, hist):
+            expected = Counter(Counter(row.tolist()).values())
+            assert {k: v for k, v in enumerate(counts) if v} == dict(expected), backend.name
+
+
+def test_backends_identical(sample_schedule: np.ndarray):
+    """Tests numba and numpy backends give bit-identical scores"""
+    pytest.importorskip('numba')
+    numpy_backend, numba_backend = kernels.get_backend('numpy'), kernels.get_backend('numba')
+    for positions in (scoring.partner_positions(), scoring.opponent_positions()):
+        codes = scoring.pair_codes(sample_schedule, positions, 13)
+        assert np.array_equal(numpy_backend.count_duplicates(codes), numba_backend.count_duplicates(codes))
+        assert np.array_equal(numpy_backend.multiplicity_histogram(codes), numba_backend.multiplicity_histogram(codes))
+    X, Y = (np.tile(np.arange(13, dtype=np.uint8), (50, 1)) for _ in range(2))
+    numpy_backend.shuffle_rows(X, np.random.default_rng(5))
+    numba_backend.shuffle_rows(Y, np.random.default_rng(5))
+    assert np.array_equal(X, Y)
+
+
+def test_shuffle_rows():
+    """Tests every backend shuffles rows in place, keeps each row's values and is reproducible"""
+    for backend in _backends():
+        X = np.tile(np.arange(12, dtype=np.uint8), (50, 1))
+        backend.shuffle_rows(X, np.random.default_rng(5))
+        assert np.array_equal(np.sort(X, axis=1), np.tile(np.arange(12), (50, 1))), backend.name
+        assert len({tuple(row) for row in X}) > 1
+        Y = np.tile(np.arange(12, dtype=np.uint8), (50, 1))
+        backend.shuffle_rows(Y, np.random.default_rng(5))
+        assert np.array_equal(X, Y), backend.name
+
+
+def test_set_backend():
+    """Tests selecting a backend by name"""
+    current = kernels.backend.name
+    try:
+        assert kernels.set_backend('numpy').name == 'numpy'
+        assert kernels.backend.name == 'numpy'
+        with pytest.raises(ValueError):
+            kernels.get_backend('foo')
+    finally:
+        kernels.set_backend(current)
+
+
+def test_same_schedule_any_backend():
+    """Tests a seed gives the same schedule whichever backend is selected"""
+    pytest.importorskip('numba')
+    from pyscheduler import Scheduler
+
+    current = kernels.backend.name
+    try:
+        scheds = []
+        for name in ('numpy', 'numba'):
+            kernels.set_backend(name)
+            scheds.append(Scheduler(5, 3, n_players=13).optimize_schedule(iterations=100, seed=7).schedule)
+    finally:
+        kernels.set_backend(current)
+    assert np.array_equal(*scheds)
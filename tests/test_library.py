@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pytest
+
+from pyscheduler import Schedule, Scheduler
+from pyscheduler.library import ScheduleLibrary, build_library, default_library, merge_library, read_json, sweep_library, write_library
+
+
+def test_default_library_matches_json():
+    """Tests the packaged library holds the same schedules as schedule.json"""
+    lib = default_library()
+    schedules = read_json()
+    assert len(lib) == len(schedules)
+    for sched in schedules[::25]:
+        found = lib.get(sched.n_courts, sched.n_rounds, sched.n_players)
+        assert np.array_equal(found.schedule, sched.schedule)
+        assert found.partner_dupcount == sched.partner_dupcount
+        assert found.opponent_dupcount == sched.opponent_dupcount
+
+
+def test_lookup_is_view():
+    """Tests lookups are read-only views into the memory map"""
+    sched = default_library().get(2, 4, 9)
+    assert sched.schedule.shape == (4, 2, 4)
+    assert not sched.schedule.flags.writeable
+    assert np.shares_memory(sched.schedule, default_library()._mm)
+    assert default_library().get(99, 4, 9) is None
+
+
+def test_write_library(tmp_path):
+    """Tests round trip and validation"""
+    sched = Schedule(n_players=6, schedule=np.array([[[0, 1, 2, 3]], [[4, 5, 0, 1]]]), partner_dupcount=1, opponent_dupcount=0)
+    lib = ScheduleLibrary(write_library(tmp_path / 'lib.bin', [sched]))
+    assert (1, 2, 6, 4) in lib
+    assert lib.keys() == [(1, 2, 6, 4)]
+    assert np.array_equal(lib.get(1, 2, 6).schedule, sched.schedule)
+
+    bad = tmp_path / 'bad.bin'
+    bad.write_bytes(b'x' * 32)
+    with pytest.raises(ValueError):
+        ScheduleLibrary(bad)
+
+
+def test_build_library(tmp_path):
+    """Tests converting schedule.json"""
+    lib = ScheduleLibrary(build_library(path=tmp_path / 'lib.bin'))
+    assert lib.keys() == default_library().keys()
+
+
+def test_merge_library_strictly_better(tmp_path):
+    """Tests a stored schedule is only replaced by a strictly better one"""
+    path = tmp_path / 'lib.bin'
+    old = Schedule(n_players=6, schedule=np.array([[[0, 1, 2, 3]], [[0, 1, 4, 5]]]), partner_dupcount=1, opponent_dupcount=0)
+    tie = Schedule(n_players=6, schedule=np.array([[[0, 1, 2, 3]], [[1, 0, 5, 4]]]), partner_dupcount=1, opponent_dupcount=0)
+    better = Schedule(n_players=6, schedule=np.array([[[0, 1, 2, 3]], [[0, 2, 4, 5]]]), partner_dupcount=0, opponent_dupcount=1)
+    write_library(path, [old])
+    assert merge_library(path, [tie])[1] == 0
+    assert np.array_equal(ScheduleLibrary(path).get(1, 2, 6).schedule, old.schedule)
+    assert merge_library(path, [better])[1] == 1
+    assert np.array_equal(ScheduleLibrary(path).get(1, 2, 6).schedule, better.schedule)
+
+
+def test_sweep_library_resume(tmp_path):
+    """Tests the sweep skips cells in the checkpoint and merges everything into the library"""
+    path = tmp_path / 'lib.bin'
+    checkpoint = tmp_path / 'lib.checkpoint'
+    done = {'n_courts': 2, 'n_rounds': 2, 'n_players': 9, 'players_per_court': 4, 'partner_dupcount': 0,
+            'opponent_dupcount': 0, 'schedule': [[[0, 1, 2, 3], [4, 5, 6, 7]], [[0, 2, 4, 6], [1, 3, 5, 8]]]}
+    checkpoint.write_text(json.dumps(done) + '\n{"partial')
+    path, changed = sweep_library((8, 10), (2, 3), (1, 3), iterations=50, path=path, checkpoint=checkpoint, workers=2, seed=1)
+    lib = ScheduleLibrary(path)
+    assert changed == 4
+    assert sorted(lib.keys()) == [(1, 2, 8, 4), (1, 2, 9, 4), (2, 2, 8, 4), (2, 2, 9, 4)]
+    assert np.array_equal(lib.get(2, 2, 9).schedule, np.array(done['schedule']))
+    for sched in lib:
+        assert sched.schedule.shape == (sched.n_rounds, sched.n_courts, 4)
+
+    # everything is in the checkpoint now, so a rerun has nothing to do
+    assert len(checkpoint.read_text().splitlines()) == 5
+    assert sweep_library((8, 10), (2, 3), (1, 3), iterations=50, path=path, checkpoint=checkpoint, workers=2)[1] == 0
+
+
+def test_write_library_large_pool(tmp_path):
+    """Tests schedules with more than 256 players are stored in a wider dtype"""
+    big = Scheduler(n_rounds=3, n_courts=40, n_players=300, seed=0).optimize_schedule(iterations=5)
+    small = Schedule(n_players=6, schedule=np.array([[[0, 1, 2, 3]], [[4, 5, 0, 1]]]), partner_dupcount=1, opponent_dupcount=0)
+    lib = ScheduleLibrary(write_library(tmp_path / 'lib.bin', [small, big]))
+    found = lib.get(40, 3, 300)
+    assert found.schedule.dtype == np.uint16
+    assert np.array_equal(found.schedule, big.schedule)
+    assert np.array_equal(lib.get(1, 2, 6).schedule, small.schedule)
+    assert lib.get(1, 2, 6).schedule.dtype == np.uint8
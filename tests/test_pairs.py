@@ -0,0 +1,70 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from pyscheduler import PairCounts, Scheduler
+
+
+def test_from_schedule(sample_schedule: np.ndarray, sample_dupcounts: np.ndarray, sample_dupcounts_opp: np.ndarray):
+    """Tests dupcounts match the scheduler methods"""
+    for sched, dups, oppdups in zip(sample_schedule, sample_dupcounts, sample_dupcounts_opp):
+        pc = PairCounts.from_schedule(sched, n_players=13)
+        assert pc.partner_dupcount == dups
+        assert pc.opponent_dupcount == oppdups
+
+
+def test_add_remove_court():
+    """Tests incremental updates match a rebuild"""
+    pc = PairCounts(8)
+    pc.add_court([0, 1, 2, 3])
+    pc.add_court([1, 0, 4, 5])
+    assert (pc.partner_dupcount, pc.opponent_dupcount) == (1, 0)
+    pc.add_court([0, 4, 2, 5])
+    assert (pc.partner_dupcount, pc.opponent_dupcount) == (1, 2)
+    pc.remove_court([1, 0, 4, 5])
+    assert (pc.partner_dupcount, pc.opponent_dupcount) == (0, 1)
+    assert np.array_equal(pc.partners, PairCounts.from_schedule(np.array([[0, 1, 2, 3], [0, 4, 2, 5]]), 8).partners)
+
+
+def test_swap_delta(sample_schedule: np.ndarray):
+    """Tests swap deltas against full recounts and that swap_delta leaves counts unchanged"""
+    sched = sample_schedule[0].reshape(5, 3, 4)
+    courts = sched.tolist()
+    pc = PairCounts.from_schedule(sched, n_players=13)
+    before = pc.partners.copy(), pc.opponents.copy()
+    for (c1, i), (c2, j) in itertools.combinations(itertools.product(range(3), range(4)), 2):
+        rnd = courts[2]
+        court_a, court_b = rnd[c1], rnd[c2]
+        delta = pc.swap_delta(court_a, i, court_b, j)
+        assert np.array_equal(pc.partners, before[0]) and np.array_equal(pc.opponents, before[1])
+        swapped = [[list(court) for court in r] for r in courts]
+        swapped[2][c1][i], swapped[2][c2][j] = swapped[2][c2][j], swapped[2][c1][i]
+        rebuilt = PairCounts.from_schedule(np.array(swapped), n_players=13)
+        assert delta == (rebuilt.partner_dupcount - pc.partner_dupcount, rebuilt.opponent_dupcount - pc.opponent_dupcount)
+
+
+def test_swap_bye():
+    """Tests swapping a player with a player on a bye"""
+    pc = PairCounts(5)
+    court = [0, 1, 2, 3]
+    pc.add_court(court)
+    pc.add_court([0, 1, 2, 4])
+    assert pc.partner_dupcount == 1
+    assert pc.swap(court, 1, player=4) == (-1, -1)
+    assert court == [0, 4, 2, 3]
+
+
+def test_summary(sample_schedule: np.ndarray):
+    """Tests histograms and per-player counts"""
+    sched = sample_schedule[0]
+    pc = PairCounts.from_schedule(sched, n_players=13)
+    summary = pc.summary()
+    hist = summary['partner_histogram']
+    assert (hist * np.arange(hist.shape[0])).sum() == sched.size // 2
+    assert summary['partner_player_dupcounts'].sum() == 2 * np.count_nonzero(np.triu(pc.partners) > 1)
+    s = Scheduler(n_players=13, n_rounds=5, n_courts=3)
+    assert pc.weighted_dupcount('partner') == pytest.approx(s.dupcount_weighted(sched))
+    assert sum(pc.pair_counter('partner').values()) == sched.size // 2
+    with pytest.raises(ValueError):
+        pc.histogram('foo')
@@ -1,11 +1,11 @@
 
 import itertools
-import random
+import time
 
 import numpy as np
 import pytest
 
-from pyscheduler import Scheduler, Schedule
+from pyscheduler import PairCounts, Scheduler, Schedule
 
 
 @pytest.fixture
@@ -85,16 +85,18 @@ def test_create_schedules(s: Scheduler):
     assert scheds.shape == (s.iterations, s.n_rounds, s.n_courts * s.players_per_court)    
 
 
-def test_calculate_byes(player_names, tprint):
-    """Tests correct shape of calculate_byes"""
-    n_players = random.choice(range(13, 16))
+@pytest.mark.parametrize('n_players', [13, 14, 15])
+def test_calculate_byes(n_players, tprint):
+    """Tests correct shape and fair counts of calculate_byes"""
     iterations = 50
     params = {'n_players': n_players, 'n_rounds': 12, 'n_courts': 3, 'iterations': iterations}
     s = Scheduler(**params)
     byes = s.calculate_byes()
     tprint(byes)
     assert byes.shape == (s.n_rounds, n_players - (s.n_courts * s.players_per_court))    
-    assert set(byes.flatten()) == set(range(n_players))
+    assert set(byes.flatten()) == set(range(min(n_players, byes.size)))
+    counts = np.bincount(byes.flatten(), minlength=n_players)
+    assert counts.max() - counts.min() <= 1
 
 
 def test_cartesian():
@@ -171,4 +173,323 @@ def test_shuffle_along(s: Scheduler):
         s.shuffle_along(a)
         if np.array_equal(a, b):
             failures += 1
-    assert failures < 2
\ No newline at end of file
+    assert failures < 2
+
+def test_batch_dupcount(s: Scheduler, sample_schedule: np.ndarray, sample_dupcounts: np.ndarray):
+    """Tests batch dupcount matches per-schedule dupcount"""
+    assert np.array_equal(s.batch_dupcount(sample_schedule), sample_dupcounts)
+    scheds = s.create_schedules()
+    assert np.array_equal(s.batch_dupcount(scheds), np.array([s.dupcount(sched) for sched in scheds]))
+
+
+def test_batch_oppdupcount(s: Scheduler, sample_schedule: np.ndarray, sample_dupcounts_opp: np.ndarray):
+    """Tests batch oppdupcount matches per-schedule oppdupcount"""
+    assert np.array_equal(s.batch_oppdupcount(sample_schedule), sample_dupcounts_opp)
+    scheds = s.create_schedules()
+    assert np.array_equal(s.batch_oppdupcount(scheds), np.array([s.oppdupcount(sched) for sched in scheds]))
+
+
+def test_batch_dupcount_weighted(s: Scheduler, sample_schedule: np.ndarray):
+    """Tests batch weighted dupcount matches per-schedule weighted dupcount"""
+    expected = np.array([s.dupcount_weighted(sched) for sched in sample_schedule])
+    assert np.allclose(s.batch_dupcount_weighted(sample_schedule), expected)
+
+
+def test_optimize_schedule_anneal(s: Scheduler):
+    """Tests the anneal strategy returns a valid, correctly scored, reproducible schedule"""
+    sched = s.optimize_schedule(strategy='anneal', iterations=2000, seed=7)
+    assert sched.schedule.shape == (s.n_rounds, s.n_courts, s.players_per_court)
+    for rnd in sched.schedule:
+        assert len(set(rnd.flatten())) == s.n_courts * s.players_per_court
+    flat = sched.schedule.reshape(1, s.n_rounds, -1)
+    assert s.batch_dupcount(flat)[0] == sched.partner_dupcount
+    assert s.batch_oppdupcount(flat)[0] == sched.opponent_dupcount
+    again = s.optimize_schedule(strategy='anneal', iterations=2000, seed=7)
+    assert np.array_equal(sched.schedule, again.schedule)
+
+
+def test_optimize_schedule_invalid_strategy(s: Scheduler):
+    with pytest.raises(ValueError):
+        s.optimize_schedule(strategy='foo')
+
+
+def test_optimize_schedule_workers(s: Scheduler):
+    """Tests parallel shards return a valid schedule that is reproducible with a seed"""
+    sched = s.optimize_schedule(iterations=200, workers=2, seed=11)
+    assert sched.schedule.shape == (s.n_rounds, s.n_courts, s.players_per_court)
+    assert s.batch_dupcount(sched.schedule.reshape(1, s.n_rounds, -1))[0] == sched.partner_dupcount
+    again = s.optimize_schedule(iterations=200, workers=2, seed=11)
+    assert np.array_equal(sched.schedule, again.schedule)
+
+
+def test_iter_schedules(s: Scheduler):
+    """Tests schedules are created in blocks of at most chunk_size"""
+    blocks = list(s.iter_schedules(iterations=45, chunk_size=20))
+    assert [block.shape[0] for block in blocks] == [20, 20, 5]
+    assert all(block.shape[1:] == (s.n_rounds, s.n_courts * s.players_per_court) for block in blocks)
+
+
+def test_optimize_schedule_chunked(s: Scheduler):
+    """Tests chunked scoring reports the scores of the schedule it returns"""
+    for scoring_function in ('naive', 'weighted'):
+        sched = s.optimize_schedule(iterations=95, chunk_size=10, scoring_function=scoring_function)
+        flat = sched.schedule.reshape(1, s.n_rounds, -1)
+        assert s.batch_oppdupcount(flat)[0] == sched.opponent_dupcount
+
+
+def test_create_schedules_seed(s: Scheduler):
+    """Tests seeded schedule creation and optimization are reproducible"""
+    assert np.array_equal(s.create_schedules(seed=3), s.create_schedules(seed=3))
+    assert not np.array_equal(s.create_schedules(seed=3), s.create_schedules(seed=4))
+    assert np.array_equal(s.optimize_schedule(seed=3).schedule, s.optimize_schedule(seed=3).schedule)
+    seeded = Scheduler(n_players=13, n_rounds=5, n_courts=3, iterations=50, seed=9)
+    assert np.array_equal(seeded.optimize_schedule().schedule, seeded.optimize_schedule().schedule)
+
+
+def test_top_schedules(s: Scheduler):
+    """Tests top_schedules is sorted, streams consistently and starts with the optimal schedule"""
+    top = s.top_schedules(k=5, iterations=200, seed=1, chunk_size=30)
+    scores = [(sched.partner_dupcount, sched.opponent_dupcount) for sched in top]
+    assert len(top) == 5
+    assert scores == sorted(scores)
+    assert np.array_equal(top[0].schedule, s.optimize_schedule(iterations=200, seed=1, chunk_size=30).schedule)
+
+    # streaming keeps the same top 5 as ranking every sampled schedule at once
+    scheds = np.concatenate(list(s.iter_schedules(iterations=200, chunk_size=30, seed=s._seed_sequence(1))))
+    ranked = sorted(zip(s.batch_dupcount(scheds), s.batch_oppdupcount(scheds)))
+    assert scores == ranked[:5]
+
+    weighted = s.top_schedules(k=5, iterations=200, seed=1, objective='weighted', partner_weight=2)
+    costs = [2 * sched.partner_dupcount + sched.opponent_dupcount for sched in weighted]
+    assert costs == sorted(costs)
+    with pytest.raises(ValueError):
+        s.top_schedules(objective='bogus')
+
+
+@pytest.mark.parametrize('partner_weight, k, chunk_size', [(1, 1, 1000), (1, 3, 30), (10, 3, 1000)])
+def test_top_schedules_weighted_exhaustive(s: Scheduler, partner_weight, k, chunk_size):
+    """Tests the weighted top k matches scoring every sampled schedule"""
+    for seed in range(10):
+        top = s.top_schedules(k=k, iterations=500, seed=seed, chunk_size=chunk_size,
+                              objective='weighted', partner_weight=partner_weight)
+        scheds = np.concatenate(list(s.iter_schedules(iterations=500, chunk_size=chunk_size,
+                                                      seed=s._seed_sequence(seed))))
+        costs = partner_weight * s.batch_dupcount(scheds) + s.batch_oppdupcount(scheds)
+        assert [partner_weight * sched.partner_dupcount + sched.opponent_dupcount for sched in top] == sorted(costs)[:k]
+
+
+def test_pareto_schedules(s: Scheduler):
+    """Tests no schedule on the Pareto front is dominated by another sampled schedule"""
+    front = s.pareto_schedules(iterations=200, seed=1, chunk_size=30)
+    scores = [(sched.partner_dupcount, sched.opponent_dupcount) for sched in front]
+    assert scores == sorted(scores)
+    assert all(a[1] > b[1] for a, b in zip(scores, scores[1:]))
+    best = s.optimize_schedule(iterations=200, seed=1, chunk_size=30)
+    assert scores[0] == (best.partner_dupcount, best.opponent_dupcount)
+    for sched in front:
+        flat = sched.schedule.reshape(1, s.n_rounds, -1)
+        assert s.batch_oppdupcount(flat)[0] == sched.opponent_dupcount
+
+
+def test_optimize_schedule_stops_at_bound():
+    """Tests sampling and annealing stop once a schedule meets the lower bounds"""
+    s = Scheduler(n_players=4, n_rounds=3, n_courts=1, iterations=10000, seed=0)
+    sched = s.optimize_schedule(chunk_size=100)
+    assert (sched.partner_dupcount, sched.opponent_dupcount) == (0, 6)
+    assert sched.iterations_used < 10000
+    sched = s.optimize_schedule(strategy='anneal')
+    assert (sched.partner_dupcount, sched.opponent_dupcount) == (0, 6)
+    assert sched.iterations_used < 10000
+
+
+def test_optimize_schedule_target(s: Scheduler):
+    """Tests a reachable target stops the search after the first block"""
+    sched = s.optimize_schedule(iterations=1000, chunk_size=100, target=100)
+    assert sched.iterations_used == 100
+    sched = s.optimize_schedule(iterations=1000, chunk_size=100, target=(100, 100), scoring_function='weighted')
+    assert sched.iterations_used == 100
+    sched = s.optimize_schedule(iterations=1000, strategy='anneal', target=(100, 100))
+    assert sched.iterations_used == 0
+    sched = s.optimize_schedule(iterations=1000, chunk_size=100, target=-1)
+    assert sched.iterations_used == 1000
+
+
+def test_optimize_schedule_greedy(s: Scheduler):
+    """Tests the greedy strategy and greedy starting point for annealing"""
+    sched = s.optimize_schedule(strategy='greedy', iterations=20, seed=0)
+    assert sched.schedule.shape == (s.n_rounds, s.n_courts, 4)
+    assert sched.iterations_used <= 20
+    flat = sched.schedule.reshape(1, s.n_rounds, -1)
+    assert s.batch_dupcount(flat)[0] == sched.partner_dupcount
+    annealed = s.optimize_schedule(strategy='anneal', initial='greedy', iterations=500, seed=0)
+    assert annealed.partner_dupcount <= s.optimize_schedule(strategy='greedy', iterations=1, seed=0).partner_dupcount
+    start = s.create_schedules(iterations=1, seed=0)[0]
+    assert s.optimize_schedule(strategy='anneal', initial=start, iterations=10).schedule.shape == (s.n_rounds, s.n_courts, 4)
+    with pytest.raises(ValueError):
+        s.optimize_schedule(strategy='anneal', initial='bogus')
+
+
+def test_optimize_schedule_scoring_function(s: Scheduler):
+    """Tests unknown scoring functions and ones the anneal strategy cannot apply are rejected"""
+    for strategy in ('sample', 'greedy', 'anneal'):
+        with pytest.raises(ValueError):
+            s.optimize_schedule(strategy=strategy, scoring_function='bogus')
+    with pytest.raises(ValueError):
+        s.optimize_schedule(strategy='anneal', scoring_function='weighted')
+
+
+def test_calculate_byes_many_rounds():
+    """Tests byes stay balanced when byes outnumber 5 times the players"""
+    s = Scheduler(n_players=11, n_rounds=40, n_courts=2)
+    byes = s.calculate_byes()
+    assert byes.shape == (40, 3)
+    counts = np.bincount(byes.flatten(), minlength=11)
+    assert counts.max() - counts.min() <= 1
+
+
+def test_create_schedules_byes(s: Scheduler):
+    """Tests each schedule has its own balanced byes with no player sitting out back to back"""
+    scheds = s.create_schedules(iterations=200, seed=0)
+    played = np.zeros((200, s.n_rounds, s.n_players), dtype=bool)
+    np.put_along_axis(played, scheds.astype(np.intp), True, axis=2)
+    byes = ~played
+    assert (byes.sum(axis=2) == s.n_players - s.n_courts * s.players_per_court).all()
+    counts = byes.sum(axis=1)
+    assert (counts.max(axis=1) - counts.min(axis=1) <= 1).all()
+    assert not (byes[:, 1:] & byes[:, :-1]).any()
+    assert len(set(byes[:, 0].argmax(axis=1).tolist())) > 1
+
+
+def test_optimize_schedule_anneal_byes():
+    """Tests annealing keeps byes balanced and never creates back-to-back byes"""
+    s = Scheduler(n_players=15, n_rounds=8, n_courts=3, iterations=3000, seed=0)
+    sched = s.optimize_schedule(strategy='anneal')
+    played = np.zeros((s.n_rounds, s.n_players), dtype=bool)
+    np.put_along_axis(played, sched.schedule.reshape(s.n_rounds, -1).astype(np.intp), True, axis=1)
+    counts = (~played).sum(axis=0)
+    assert counts.max() - counts.min() <= 1
+    assert not (~played[1:] & ~played[:-1]).any()
+
+
+def test_reoptimize():
+    """Tests re-optimizing the rest of a session after players join and leave"""
+    s = Scheduler(n_players=22, n_rounds=8, n_courts=5, iterations=200, seed=0)
+    played = s.optimize_schedule().schedule[:3].reshape(3, -1)
+    players = np.setdiff1d(np.arange(25), [3, 7])
+    start = time.perf_counter()
+    sched = s.reoptimize(played, 5, players, time_budget_ms=100, seed=1)
+    assert (time.perf_counter() - start) * 1000 < 150
+    assert sched.schedule.shape == (5, 5, 4)
+    assert not np.isin(sched.schedule, [3, 7]).any()
+    assert np.isin([22, 23, 24], sched.schedule).all()
+    for row in sched.schedule.reshape(5, -1):
+        assert len(set(row.tolist())) == 20
+
+    # dupcounts cover the whole session
+    session = np.concatenate([played.ravel(), sched.schedule.ravel()])
+    pc = PairCounts.from_schedule(session, 25)
+    assert (pc.partner_dupcount, pc.opponent_dupcount) == (sched.partner_dupcount, sched.opponent_dupcount)
+
+    # the late arrivals have the fewest games so they never sit out
+    for row in sched.schedule.reshape(5, -1):
+        assert np.isin([22, 23, 24], row).all()
+
+
+def test_reoptimize_no_history():
+    """Tests re-optimizing before any round has been played"""
+    s = Scheduler(n_players=13, n_rounds=5, n_courts=3, iterations=50, seed=0)
+    for played in ([], np.zeros((0, 12), dtype=np.uint8)):
+        sched = s.reoptimize(played, 5, time_budget_ms=20, seed=1)
+        assert sched.schedule.shape == (5, 3, 4)
+        pc = PairCounts.from_schedule(sched.schedule, 13)
+        assert (pc.partner_dupcount, pc.opponent_dupcount) == (sched.partner_dupcount, sched.opponent_dupcount)
+        played = np.zeros((5, 13), dtype=bool)
+        np.put_along_axis(played, sched.schedule.reshape(5, -1).astype(np.intp), True, axis=1)
+        counts = (~played).sum(axis=0)
+        assert counts.max() - counts.min() <= 1
+
+
+def test_reoptimize_time_budget():
+    """Tests the default time budget covers the whole re-optimization"""
+    s = Scheduler(n_players=22, n_rounds=8, n_courts=5, iterations=200, seed=0)
+    played = s.optimize_schedule().schedule[:3].reshape(3, -1)
+    players = np.setdiff1d(np.arange(25), [3, 7])
+    s.reoptimize(played, 5, players, time_budget_ms=20, seed=0)
+    for seed in range(3):
+        start = time.perf_counter()
+        s.reoptimize(played, 5, players, seed=seed)
+        assert (time.perf_counter() - start) * 1000 <= 200 + 3
+
+
+def test_reoptimize_fewer_courts():
+    """Tests courts are dropped when too few players are left to fill them"""
+    s = Scheduler(n_players=13, n_rounds=5, n_courts=3, iterations=50, seed=0)
+    played = s.optimize_schedule().schedule[:2]
+    sched = s.reoptimize(played, 3, np.arange(10), time_budget_ms=20)
+    assert sched.schedule.shape == (3, 2, 4)
+
+
+def test_optimize_schedule_progress(s: Scheduler):
+    """Tests progress is reported as the search runs"""
+    for strategy, iterations in (('sample', 300), ('anneal', 3000)):
+        reports = []
+        sched = s.optimize_schedule(strategy=strategy, iterations=iterations, chunk_size=100, seed=0,
+                                    progress=reports.append)
+        assert len(reports) >= 3
+        assert [r['iterations_done'] for r in reports] == sorted(r['iterations_done'] for r in reports)
+        assert all(r['iterations'] == iterations for r in reports)
+        assert reports[-1]['partner_dupcount'] >= sched.partner_dupcount
+    assert reports[0]['partner_dupcount'] >= reports[-1]['partner_dupcount']
+
+
+def test_optimize_schedule_time_budget(s: Scheduler):
+    """Tests sampling stops once the time budget runs out"""
+    s.optimize_schedule(iterations=10, seed=0)
+    for strategy in ('sample', 'greedy'):
+        reports = []
+        start = time.perf_counter()
+        sched = s.optimize_schedule(strategy=strategy, time_budget_ms=100, iterations=10, seed=0,
+                                    progress=reports.append)
+        assert time.perf_counter() - start < 0.5
+        assert sched.iterations_used > 10
+        assert all(r['iterations'] is None for r in reports)
+
+
+def test_scheduler_time_budget():
+    """Tests the Scheduler time budget is the default for optimize_schedule"""
+    s = Scheduler(n_rounds=8, n_courts=5, n_players=22, iterations=10, seed=0, time_budget_ms=50)
+    assert s.optimize_schedule().iterations_used > 10
+    assert Scheduler(n_rounds=8, n_courts=5, n_players=22, iterations=10, seed=0).optimize_schedule().iterations_used == 10
+
+
+def test_dupcount_many_pairs():
+    """Tests dupcount when a schedule has more than 256 partner pairs"""
+    s = Scheduler(n_rounds=6, n_courts=22, n_players=100, seed=0)
+    sched = s.create_schedules(iterations=1)[0]
+    assert sched.size // 2 > 256
+    assert s.dupcount(sched) == PairCounts.from_schedule(sched, 100).partner_dupcount
+
+
+def test_large_event():
+    """Tests a 330 player, 40 court event stays within its memory and time budget"""
+    import tracemalloc
+
+    s = Scheduler(n_rounds=10, n_courts=40, n_players=330, seed=0)
+    scheds = s.create_schedules(iterations=5)
+    assert scheds.dtype == np.uint16
+    assert all(np.array_equal(np.sort(row), np.unique(row)) and row.max() < 330 for row in scheds.reshape(50, -1))
+    assert s.calculate_byes().max() >= 256
+
+    s.optimize_schedule(iterations=2)
+    tracemalloc.start()
+    start = time.perf_counter()
+    sched = s.optimize_schedule(iterations=500, chunk_size=100, collect_stats=True)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    pc = PairCounts.from_schedule(sched.schedule, 330)
+    assert (sched.partner_dupcount, sched.opponent_dupcount) == (pc.partner_dupcount, pc.opponent_dupcount)
+    assert sched.stats.peak_block_bytes == 100 * 10 * 160 * 2
+    assert peak < 20 * 2 ** 20
+    assert elapsed < 5
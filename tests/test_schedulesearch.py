@@ -0,0 +1,20 @@
+# tests/test_schedulesearch.py
+
+import pytest
+
+from pyscheduler import ScheduleSearch
+
+
+def test_trials_of_trials():
+    """Tests every run draws at least one trial of at least one iteration and is reproducible"""
+    pytest.importorskip('pandas')
+    search = ScheduleSearch(None, 5, 3)
+    runs = search.trials_of_trials(13, 5, 3, max_trials=2, max_iterations=1, max_tt=4, workers=1, seed=0)
+    assert [run['tt'] for run in runs] == [1, 2, 3, 4]
+    for run in runs:
+        assert 1 <= run['trials'] <= 2 and run['iterations'] == 1
+        trial_results, psumms, osumms = run['results']
+        assert set(trial_results['trial']) == set(psumms) == set(osumms) == set(range(1, run['trials'] + 1))
+    again = search.trials_of_trials(13, 5, 3, max_trials=2, max_iterations=1, max_tt=4, workers=1, seed=0)
+    assert [run['trials'] for run in runs] == [run['trials'] for run in again]
+    assert all(a['results'][0].equals(b['results'][0]) for a, b in zip(runs, again))
@@ -0,0 +1,63 @@
+# tests/test_scoring.py
+
+from collections import Counter
+import itertools
+
+import numpy as np
+import pytest
+
+from pyscheduler import PairCounts, Scheduler, scoring
+
+
+def _reference_pairs(sched: np.ndarray, kind: str, players_per_court: int) -> list:
+    """Pairs one court at a time"""
+    half = players_per_court // 2
+    pairs = []
+    for court in sched.reshape(-1, players_per_court).tolist():
+        if kind == 'partner':
+            pairs += [pair for team in (court[:half], court[half:]) for pair in itertools.combinations(team, 2)]
+        else:
+            pairs += list(itertools.product(court[:half], court[half:]))
+    return pairs
+
+
+@pytest.mark.parametrize('players_per_court', [2, 4, 6, 8])
+@pytest.mark.parametrize('kind', ['partner', 'opponent'])
+def test_schedule_pairs(players_per_court, kind):
+    """Tests the gathered pairs match pairing court by court for singles, doubles and larger formats"""
+    s = Scheduler(n_rounds=5, n_courts=3, n_players=3 * players_per_court + 2, players_per_court=players_per_court, seed=0)
+    sched = s.create_schedules(iterations=1)[0]
+    pairs = scoring.schedule_pairs(sched, kind, players_per_court)
+    assert pairs.tolist() == [list(pair) for pair in _reference_pairs(sched, kind, players_per_court)]
+
+
+def test_pair_template_cached():
+    """Tests templates are built once per configuration and cannot be changed"""
+    template = scoring.pair_template('opponent', 4, 3, 5)
+    assert template is scoring.pair_template('opponent', 4, 3, 5)
+    assert template.shape == (60, 2)
+    assert not template.flags.writeable
+    with pytest.raises(ValueError):
+        scoring.pair_template('teammate', 4, 3, 5)
+
+
+def test_pair_codes_kind(sample_schedule: np.ndarray):
+    """Tests pair codes from a kind match pair codes from positions"""
+    for kind, positions in (('partner', scoring.partner_positions()), ('opponent', scoring.opponent_positions())):
+        assert np.array_equal(scoring.pair_codes(sample_schedule, kind, 13),
+                              scoring.pair_codes(sample_schedule, np.array(positions), 13))
+
+
+@pytest.mark.parametrize('players_per_court', [2, 6])
+def test_scorers_other_formats(players_per_court):
+    """Tests the single schedule scorers agree with a Counter for singles and triples"""
+    s = Scheduler(n_rounds=6, n_courts=3, n_players=3 * players_per_court + 1, players_per_court=players_per_court, seed=1)
+    for sched in s.create_schedules(iterations=5):
+        for kind, scorer in (('partner', s.dupcount), ('opponent', s.oppdupcount)):
+            counts = Counter(tuple(sorted(pair)) for pair in _reference_pairs(sched, kind, players_per_court))
+            expected = sum(v - 1 for v in counts.values())
+            assert scorer(sched) == expected
+            assert s.counter_dups(sched, kind) == expected
+        pc = PairCounts.from_schedule(sched, s.n_players, players_per_court)
+        assert s.oppdupcount_weighted(sched) == pc.weighted_dupcount('opponent')
+        assert s.batch_oppdupcount(sched[None])[0] == pc.opponent_dupcount
@@ -0,0 +1,40 @@
+# tests/test_selection.py
+
+import numpy as np
+
+from pyscheduler import selection
+
+
+def scored(dupcounts, oppdupcounts):
+    return np.arange(len(dupcounts)), np.array(dupcounts), np.array(oppdupcounts)
+
+
+def test_merge_top():
+    """Tests the top k survive across blocks and ties go to kept"""
+    kept = selection.merge_top(None, scored([3, 1, 2], [0, 5, 1]), 2)
+    assert kept[1].tolist() == [1, 2]
+    kept = selection.merge_top(kept, scored([1, 0], [5, 9]), 2)
+    assert kept[1].tolist() == [0, 1]
+    assert kept[0].tolist() == [1, 1]
+    kept = selection.merge_top(None, scored([3, 1, 2], [0, 5, 1]), 2, objective='weighted', partner_weight=1)
+    assert kept[1].tolist() == [3, 2]
+
+
+def test_merge_pareto():
+    """Tests only non-dominated points are kept, one candidate per point"""
+    front = selection.merge_pareto(None, scored([0, 1, 1, 2, 3], [9, 4, 4, 6, 2]))
+    assert list(zip(front[1].tolist(), front[2].tolist())) == [(0, 9), (1, 4), (3, 2)]
+    assert front[0].tolist() == [0, 1, 4]
+    front = selection.merge_pareto(front, scored([0, 2], [3, 1]))
+    assert list(zip(front[1].tolist(), front[2].tolist())) == [(0, 3), (2, 1)]
+
+
+def test_partner_cutoff():
+    """Tests the cutoff never drops a candidate that could make the top k"""
+    kept = scored([1, 2], [4, 0])
+    assert selection.partner_cutoff(np.array([0, 5, 3]), kept, 2) == 2
+    assert selection.partner_cutoff(np.array([0, 5, 3]), kept, 2, 'weighted', 10) == 2
+    assert selection.partner_cutoff(np.array([0, 5, 3]), None, 2) == 3
+    # weighted never prunes before k candidates are kept
+    assert selection.partner_cutoff(np.array([0, 5, 3]), None, 2, 'weighted', 1) == np.inf
+    assert selection.partner_cutoff(np.array([0, 5, 3]), scored([1], [4]), 2, 'weighted', 1) == np.inf
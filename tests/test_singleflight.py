@@ -0,0 +1,88 @@
+# tests/test_singleflight.py
+
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from pyscheduler import ScheduleCache, Scheduler
+from pyscheduler.singleflight import SingleFlight, fcntl
+
+
+def test_threads_share_one_call():
+    """Tests concurrent calls for one key run fn once and share its result"""
+    flights = SingleFlight()
+    cache = {}
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.1)
+        cache['key'] = object()
+        return cache['key']
+
+    with ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(flights.do, 'key', slow, lambda: cache.get('key')) for _ in range(8)]
+        results = [f.result() for f in futures]
+    assert flights.runs == 1
+    assert all(result is results[0] for result in results)
+
+    # a later call finds the stored result without running fn
+    assert flights.do('key', slow, lambda: cache.get('key')) is results[0]
+    assert flights.runs == 1
+
+
+def test_errors_are_shared():
+    """Tests waiting callers get the leader's exception and the key can be retried"""
+    flights = SingleFlight()
+
+    def fail():
+        time.sleep(0.05)
+        raise RuntimeError('failed')
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(flights.do, 'key', fail) for _ in range(4)]
+        for f in futures:
+            with pytest.raises(RuntimeError):
+                f.result()
+    assert flights.do('key', lambda: 1) == 1
+
+
+def _process_call(lock_dir, store, log):
+    def compute():
+        with open(log, 'a') as fh:
+            fh.write('run\n')
+        time.sleep(0.2)
+        store.write_text('done')
+        return 'done'
+
+    def lookup():
+        return store.read_text() if store.exists() else None
+
+    SingleFlight(lock_dir).do('key', compute, lookup)
+
+
+@pytest.mark.skipif(fcntl is None, reason='file locks need fcntl')
+def test_processes_share_one_call(tmp_path):
+    """Tests processes wait on the file lock and pick up the stored result"""
+    store, log = tmp_path / 'store.txt', tmp_path / 'log.txt'
+    ctx = multiprocessing.get_context('fork')
+    procs = [ctx.Process(target=_process_call, args=(tmp_path / 'locks', store, log)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert log.read_text().count('run') == 1
+
+
+def test_cache_get_or_compute():
+    """Tests concurrent identical optimizations through a cache run once"""
+    cache = ScheduleCache()
+    s = Scheduler(n_players=13, n_rounds=5, n_courts=3, iterations=200, seed=0, cache=cache)
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: s.optimize_schedule(), range(4)))
+    assert cache.flights.runs == 1
+    assert all(np.array_equal(sched.schedule, results[0].schedule) for sched in results)
@@ -0,0 +1,60 @@
+# tests/test_stats.py
+
+import time
+
+from pyscheduler import Scheduler
+from pyscheduler.stats import STAGES, SearchStats, timer
+
+
+def test_timer():
+    """Tests timer adds to its stage and does nothing without stats"""
+    stats = SearchStats()
+    with timer(stats, 'byes'):
+        time.sleep(0.01)
+    assert stats.timings['byes'] >= 0.01
+    assert sum(stats.timings.values()) == stats.timings['byes']
+    with timer(None, 'byes'):
+        pass
+    assert timer(None, 'byes') is timer(None, 'generation')
+
+
+def test_add_best():
+    """Tests the trajectory only records improvements"""
+    stats = SearchStats()
+    for i, best in enumerate([(5, 30), (5, 30), (4, 40), (4, 35), (4, 36)]):
+        stats.add_best(i, *best)
+    assert [point[2:] for point in stats.trajectory] == [(5, 30), (4, 40), (4, 35)]
+    assert [point[0] for point in stats.trajectory] == [0, 2, 3]
+
+
+def test_merge():
+    """Tests merged stats add up timings and counts"""
+    stats, other = SearchStats(), SearchStats()
+    stats.timings['generation'], other.timings['generation'] = 1.0, 2.0
+    stats.add_block(100, 10)
+    other.add_block(300, 30)
+    stats.merge(other)
+    assert stats.timings['generation'] == 3.0
+    assert stats.counts['schedules'] == 40
+    assert (stats.block_bytes, stats.peak_block_bytes) == (400, 300)
+
+
+def test_optimize_schedule_stats():
+    """Tests optimize_schedule records stats only when asked"""
+    s = Scheduler(n_rounds=8, n_courts=5, n_players=22, seed=0)
+    assert s.optimize_schedule(iterations=100).stats is None
+
+    sched = s.optimize_schedule(iterations=1000, chunk_size=250, collect_stats=True)
+    stats = sched.stats
+    assert stats.counts['blocks'] == 4
+    assert stats.counts['schedules'] == sched.iterations_used == 1000
+    assert 0 < stats.counts['opponent_scored'] <= 1000
+    assert stats.peak_block_bytes == 250 * 8 * 20
+    assert all(stats.timings[stage] > 0 for stage in ('generation', 'byes', 'partner_scoring', 'opponent_scoring', 'selection'))
+    assert sum(stats.timings.values()) <= stats.elapsed
+    assert stats.trajectory[-1][2:] == (sched.partner_dupcount, sched.opponent_dupcount)
+    assert set(stats.to_dict()) >= {f'{stage}_s' for stage in STAGES} | {'elapsed_s', 'blocks', 'peak_block_bytes'}
+
+    sched = s.optimize_schedule(strategy='anneal', iterations=3000, collect_stats=True)
+    assert sched.stats.timings['local_search'] > 0
+    assert sched.stats.trajectory[-1][2:] == (sched.partner_dupcount, sched.opponent_dupcount)